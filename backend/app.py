@@ -1,11 +1,33 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load .env from backend directory before any module reads its settings
+load_dotenv(dotenv_path=Path(__file__).resolve().parent / '.env')
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.api import routes
-from src.storage.db import init_db
+from src.api import metrics, routes
+from src.monitoring.metrics import MetricsMiddleware
+from src.storage.db import async_engine, init_db
+from src.services.llm_service import get_llm_service
+from src.services.extraction_pipeline import shutdown_parse_pool
+from src.workers.job_queue import job_queue
+
 
-app = FastAPI(title="Legal Tabular Review API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    # Jobs left unfinished by a stopped server (not by other live ones sharing the DB)
+    job_queue.recover()
+    # Configure the LLM client once, up front, instead of on the first request
+    app.state.llm = get_llm_service()
+    yield
+    shutdown_parse_pool()
+    await async_engine.dispose()
 
-init_db()
+
+app = FastAPI(title="Legal Tabular Review API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -16,7 +38,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Times every request by route template for /metrics
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(routes.router, prefix="/api")
+app.include_router(metrics.router)
 
 @app.get("/health")
 def health_check() -> dict:
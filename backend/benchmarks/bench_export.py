@@ -0,0 +1,123 @@
+"""
+Export benchmark: time and peak Python memory to produce the document x
+question grid for a synthetic project, per format, next to materializing
+every answer through the ORM (what clients had to do via the nested project
+JSON before /export-project existed).
+
+    python benchmarks/bench_export.py --documents 5000 --questions 20
+
+The project is generated in a temporary SQLite database, so nothing in the
+real database is touched. Memory is the tracemalloc peak while the export
+is consumed, so it reflects what the server holds at once, not the output size.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def seed(documents: int, questions: int) -> str:
+    from src.models.db_models import AnswerModel, DocumentModel, ProjectModel, question_id_for
+    from src.storage.db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        project = ProjectModel(name="Export benchmark", status="completed")
+        db.add(project)
+        db.flush()
+        texts = [f"Field {q:03d}" for q in range(questions)]
+        for start in range(0, documents, 1000):
+            docs = [
+                {"id": str(uuid.uuid4()), "project_id": project.id, "filename": f"contract-{d:06d}.pdf",
+                 "status": "parsed"}
+                for d in range(start, min(documents, start + 1000))
+            ]
+            db.bulk_insert_mappings(DocumentModel, docs)
+            db.bulk_insert_mappings(AnswerModel, [
+                {"id": str(uuid.uuid4()), "project_id": project.id, "document_id": doc["id"],
+                 "question_id": question_id_for(text), "question_text": text,
+                 "value": f"{text} value for {doc['filename']} " * 3, "confidence": 0.8,
+                 "citations": [{"text": "Quoted clause text " * 5, "source": doc["filename"]}],
+                 "status": "completed"}
+                for doc in docs for text in texts
+            ])
+        db.commit()
+        return project.id
+    finally:
+        db.close()
+
+
+def measure(fn) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak / (1024 * 1024), 1), "bytes": size}
+
+
+def run(args) -> dict:
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from src.models.db_models import ProjectModel
+    from src.models.schemas import Project
+    from src.services.export_service import ExportService, ExportUnavailableError
+    from src.storage.db import SessionLocal
+
+    project_id = seed(args.documents, args.questions)
+    results = {}
+
+    def orm_json() -> int:
+        db = SessionLocal()
+        try:
+            project = db.execute(
+                select(ProjectModel)
+                .options(selectinload(ProjectModel.documents), selectinload(ProjectModel.answers))
+                .where(ProjectModel.id == project_id)
+            ).scalar_one()
+            return len(Project.model_validate(project).model_dump_json())
+        finally:
+            db.close()
+
+    results["orm_json"] = measure(orm_json)
+    for fmt in args.formats:
+        try:
+            ExportService.check_format(fmt)
+        except ExportUnavailableError as e:
+            results[fmt] = {"skipped": str(e)}
+            continue
+        results[fmt] = measure(lambda: sum(len(piece) for piece in ExportService.stream(project_id, fmt)))
+
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"  {name:<10} skipped ({r['skipped']})", file=sys.stderr)
+        else:
+            print(f"  {name:<10} {r['seconds']:7.3f}s  peak {r['peak_mb']:7.1f} MB  "
+                  f"{r['bytes'] / 1e6:8.1f} MB out", file=sys.stderr)
+    return {"documents": args.documents, "questions": args.questions, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=15)
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet", "xlsx"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the storage module creates its engines
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        sys.path.insert(0, BACKEND_DIR)
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
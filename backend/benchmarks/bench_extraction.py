@@ -0,0 +1,242 @@
+"""
+Extraction pipeline benchmark over the contracts bundled in data/.
+
+Runs parse -> chunk -> extract -> persist for every PDF/HTML/TXT file and
+reports per-stage latency, throughput (docs/minute), peak memory and DB
+write time. Results are written as JSON so runs from different commits can
+be compared:
+
+    python benchmarks/bench_extraction.py --output before.json
+    python benchmarks/bench_extraction.py --output after.json --compare before.json
+
+Extraction uses the offline rule-based path (LLMService._mock_extract) by
+default so numbers are deterministic and need no network; pass --llm to go
+through the configured LLMService instead (see fake_gemini_server.py for
+running that against a local quota-enforcing endpoint).
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DATA_DIR = os.path.abspath(os.path.join(BACKEND_DIR, "..", "data"))
+SUPPORTED = (".pdf", ".html", ".htm", ".txt")
+
+DEFAULT_QUESTIONS = [
+    "Effective Date",
+    "Parties",
+    "Governing Law",
+    "Termination",
+    "Payment Terms",
+    "Limitation of Liability",
+    "Confidentiality",
+    "Indemnification",
+]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageTimer:
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def measure(self, stage: str, fn, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        entry = self.stages.setdefault(stage, {"seconds": [], "peak_alloc_mb": 0.0})
+        entry["seconds"].append(elapsed)
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            entry["peak_alloc_mb"] = max(entry["peak_alloc_mb"], peak)
+        return result, elapsed
+
+    def summary(self) -> dict:
+        out = {}
+        for stage, entry in self.stages.items():
+            secs = sorted(entry["seconds"])
+            out[stage] = {
+                "count": len(secs),
+                "total_s": round(sum(secs), 4),
+                "mean_s": round(sum(secs) / len(secs), 4),
+                "p50_s": round(secs[len(secs) // 2], 4),
+                "max_s": round(secs[-1], 4),
+            }
+            if self.trace_memory:
+                out[stage]["peak_alloc_mb"] = round(entry["peak_alloc_mb"], 2)
+        return out
+
+
+def run(args) -> dict:
+    # Point the app at a throwaway DB before any src module creates the engine
+    tmp_dir = tempfile.mkdtemp(prefix="bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    os.environ.setdefault("PARSE_CACHE_DIR", os.path.join(tmp_dir, "parse-cache"))
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(tmp_dir, "llm_cache.sqlite"))
+    if args.llm:
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=os.path.join(BACKEND_DIR, ".env"))
+    else:
+        os.environ["GEMINI_API_KEY"] = ""
+    sys.path.insert(0, BACKEND_DIR)
+
+    from src.indexing.parser import DocumentParser
+    from src.indexing.chunker import chunk_pages
+    from src.services.llm_service import LLMService
+    from src.services.llm_client import llm_client
+    from src.services.project_service import ProjectService
+    from src.models.db_models import ProjectModel, DocumentModel, question_id_for
+    from src.storage.db import SessionLocal, init_db
+    import uuid
+
+    init_db()
+    files = sorted(
+        f for f in os.listdir(args.data_dir)
+        if f.lower().endswith(SUPPORTED) and not f.startswith(".")
+    )
+    if args.files:
+        files = [f for f in files if f in set(args.files)]
+    questions = args.questions or DEFAULT_QUESTIONS
+
+    llm = LLMService()
+    extract = llm.extract_answers if args.llm else llm._mock_extract
+    timer = StageTimer(args.tracemalloc)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    db = SessionLocal()
+    project = ProjectModel(name="benchmark", status="pending")
+    db.add(project)
+    db.commit()
+
+    per_doc = []
+    wall_started = time.perf_counter()
+    for _ in range(args.repeat):
+        for filename in files:
+            path = os.path.join(args.data_dir, filename)
+            parse = DocumentParser.parse if args.warm else DocumentParser.parse_uncached
+            parsed, t_parse = timer.measure("parse", parse, path)
+            chunks, t_chunk = timer.measure("chunk", lambda: list(chunk_pages(parsed.iter_pages())))
+            results, t_extract = timer.measure("extract", extract, parsed.text, questions)
+
+            doc = DocumentModel(project_id=project.id, filename=filename, status="parsed")
+            db.add(doc)
+            db.flush()
+            rows = [
+                dict(
+                    id=str(uuid.uuid4()), project_id=project.id, document_id=doc.id,
+                    question_id=question_id_for(r["question"]), question_text=r["question"],
+                    value=str(r.get("value")), confidence=float(r.get("confidence", 0.0)),
+                    citations=[{"text": r.get("citation", ""), "source": filename}], status="completed",
+                )
+                for r in results if r.get("question")
+            ]
+
+            def persist():
+                ProjectService._upsert_answers(db, rows)
+                db.commit()
+
+            _, t_persist = timer.measure("persist", persist)
+            per_doc.append({
+                "file": filename,
+                "bytes": os.path.getsize(path),
+                "chars": len(parsed.text),
+                "pages": len(parsed.pages),
+                "chunks": len(chunks),
+                "parse_s": round(t_parse, 4),
+                "chunk_s": round(t_chunk, 4),
+                "extract_s": round(t_extract, 4),
+                "persist_s": round(t_persist, 4),
+            })
+            print(f"  {filename:<32} parse {t_parse:7.3f}s  chunk {t_chunk:6.3f}s  "
+                  f"extract {t_extract:6.3f}s  persist {t_persist:6.3f}s", file=sys.stderr)
+    wall = time.perf_counter() - wall_started
+    db.close()
+
+    stages = timer.summary()
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "files": files,
+            "questions": len(questions),
+            "repeat": args.repeat,
+            "warm_parse_cache": args.warm,
+            "llm": "service" if args.llm else "mock",
+        },
+        "documents": len(per_doc),
+        "wall_s": round(wall, 4),
+        "throughput_docs_per_min": round(len(per_doc) / wall * 60, 2) if wall else None,
+        "db_write_s": stages.get("persist", {}).get("total_s", 0.0),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "stages": stages,
+        "llm_client": llm_client.stats() if args.llm else None,
+        "per_document": per_doc,
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\nvs {baseline.get('commit')} ({baseline.get('timestamp')})")
+    rows = [("wall_s", current["wall_s"], baseline.get("wall_s")),
+            ("throughput_docs_per_min", current["throughput_docs_per_min"], baseline.get("throughput_docs_per_min")),
+            ("peak_rss_mb", current["peak_rss_mb"], baseline.get("peak_rss_mb"))]
+    for stage, stats in current["stages"].items():
+        rows.append((f"{stage}.total_s", stats["total_s"], baseline.get("stages", {}).get(stage, {}).get("total_s")))
+    for name, now, before in rows:
+        if before:
+            print(f"  {name:<28} {before:>10} -> {now:>10}  ({(now - before) / before * 100:+.1f}%)")
+        else:
+            print(f"  {name:<28} {'n/a':>10} -> {now:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--files", nargs="*", help="Only benchmark these filenames")
+    parser.add_argument("--questions", nargs="*", help="Override the default question set")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--warm", action="store_true", help="Use the parse cache instead of always parsing")
+    parser.add_argument("--llm", action="store_true", help="Extract through LLMService instead of the offline path")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Track per-stage Python allocation peaks (slows parsing considerably)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({k: v for k, v in results.items() if k != "per_document"}, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+HTML parsing benchmark: the previous BeautifulSoup/html.parser get_text()
+path against the block parser's backends (html.parser and lxml), for speed
+and for how well the resulting text chunks line up with clause structure.
+
+    python benchmarks/bench_html.py
+    python benchmarks/bench_html.py --files EX-10.2.html --repeat 20
+
+Chunk quality is reported as the share of chunks whose first line is a
+clause/section heading and the number of clause numbers ("1.1", "(a)")
+left alone on a line, separated from the text they number.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DATA_DIR = os.path.abspath(os.path.join(BACKEND_DIR, "..", "data"))
+
+_ORPHAN_NUMBER = re.compile(r'^[ \t]*(?:\d{1,3}(?:\.\d{1,3})*\.?|\([a-z0-9]{1,4}\))[ \t]*$', re.MULTILINE)
+
+
+def _bs4_text(path: str) -> str:
+    from bs4 import BeautifulSoup
+
+    with open(path, "r", encoding="utf-8") as f:
+        return BeautifulSoup(f, "html.parser").get_text(separator="\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--files", nargs="*", help="Only benchmark these filenames")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from src.indexing.chunker import chunk_text
+    from src.indexing.html_parser import _HEADING_RE, parse_html
+
+    paths = [
+        os.path.join(args.data_dir, f) for f in sorted(os.listdir(args.data_dir))
+        if f.lower().endswith((".html", ".htm")) and (not args.files or f in args.files)
+    ]
+    parsers = {"lxml": lambda p: parse_html(p, "lxml")[0], "html.parser": lambda p: parse_html(p, "html.parser")[0]}
+    try:
+        import bs4  # noqa: F401
+        parsers = {"bs4 (previous)": _bs4_text, **parsers}
+    except ImportError:
+        print("bs4 not installed; skipping the previous path", file=sys.stderr)
+
+    results = {}
+    for path in paths:
+        name = os.path.basename(path)
+        results[name] = {}
+        for label, fn in parsers.items():
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                text = fn(path)
+                timings.append(time.perf_counter() - started)
+            chunks = chunk_text(text)
+            aligned = sum(1 for c in chunks if _HEADING_RE.match(c.text.lstrip()))
+            results[name][label] = {
+                "best_s": round(min(timings), 4),
+                "chars": len(text),
+                "chunks": len(chunks),
+                "chunks_starting_at_heading": round(aligned / len(chunks), 3) if chunks else 0.0,
+                "orphaned_clause_numbers": len(_ORPHAN_NUMBER.findall(text)),
+            }
+
+        baseline = next(iter(results[name].values()))["best_s"]
+        print(f"\n{name} ({os.path.getsize(path) / 1024:.0f} KB)")
+        for label, r in results[name].items():
+            print(f"  {label:<16} {r['best_s'] * 1000:8.1f} ms  x{baseline / r['best_s']:5.1f}  "
+                  f"chunks {r['chunks']:4d}  heading-aligned {r['chunks_starting_at_heading']:.0%}  "
+                  f"orphaned numbers {r['orphaned_clause_numbers']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
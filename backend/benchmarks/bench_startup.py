@@ -0,0 +1,123 @@
+"""
+Cold-start benchmark: how long fresh interpreters take to import the API app
+and the modules CLI tools and parse workers use, and which heavy
+dependencies each import pulls in.
+
+Every measurement runs in a new subprocess so nothing is already imported:
+
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --compare startup.json
+
+Module timings come from `python -X importtime` (cumulative microseconds).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Entry points: the API app, a CLI-style service import and a spawned parse worker
+TARGETS = {
+    "api_app": "import app",
+    "project_service": "import src.services.project_service",
+    "parse_worker": "import src.indexing.parser",
+}
+HEAVY_MODULES = ["google.generativeai", "pdfplumber", "pdfminer", "lxml"]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+
+
+def wall_seconds(statement: str) -> float:
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    return float(_run(code).stdout.strip().splitlines()[-1])
+
+
+def import_profile(statement: str, top: int) -> dict:
+    """Cumulative import time per module and which heavy modules got loaded."""
+    cumulative = {}
+    for line in _run(statement, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        try:
+            cumulative[name.strip()] = int(cum)
+        except ValueError:
+            continue  # header row
+    slowest = sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "total_ms": round(max(cumulative.values(), default=0) / 1000, 1),
+        "heavy_loaded": {m: m in cumulative for m in HEAVY_MODULES},
+        "slowest_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+
+def run(args) -> dict:
+    targets = {}
+    for name, statement in TARGETS.items():
+        samples = [wall_seconds(statement) for _ in range(args.repeat)]
+        targets[name] = {
+            "median_s": round(statistics.median(samples), 4),
+            "min_s": round(min(samples), 4),
+            **import_profile(statement, args.top),
+        }
+        print(f"  {name:<16} median {targets[name]['median_s']:.3f}s", file=sys.stderr)
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "targets": targets,
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\nvs {baseline.get('commit')} ({baseline.get('timestamp')})")
+    for name, stats in current["targets"].items():
+        before = baseline.get("targets", {}).get(name, {}).get("median_s")
+        now = stats["median_s"]
+        if before:
+            print(f"  {name:<16} {before:>8} -> {now:>8}  ({(now - before) / before * 100:+.1f}%)")
+        else:
+            print(f"  {name:<16} {'n/a':>8} -> {now:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per target")
+    parser.add_argument("--output", default="startup_results.json")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
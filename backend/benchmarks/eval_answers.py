@@ -0,0 +1,102 @@
+"""
+Extraction quality check against human-labeled reference answers.
+
+Extracts every (document, question) cell in the gold file and scores the
+answers with EvaluationService: coverage, exact / normalized / fuzzy
+accuracy and normalization validity, per field and per document, plus the
+worst mismatches. Meant for CI on prompt or retrieval changes:
+
+    python benchmarks/eval_answers.py --min-fuzzy-accuracy 0.8
+    python benchmarks/eval_answers.py --llm --output eval.json
+    python benchmarks/eval_answers.py --project <project_id>   # stored answers
+
+The gold file is CSV, long (filename, question, value) or the wide
+/export-project grid. Extraction uses the offline rule-based path unless
+--llm is given; exits 1 when an accuracy floor is not met.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DATA_DIR = os.path.abspath(os.path.join(BACKEND_DIR, "..", "data"))
+DEFAULT_GOLD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gold", "labels.csv")
+
+
+def extract(gold, args) -> list:
+    """(filename, question, value, confidence) rows from a fresh extraction of the gold cells."""
+    from src.indexing.parser import DocumentParser
+    from src.services.llm_service import LLMService
+
+    llm = LLMService()
+    rows = []
+    for filename in sorted(set(gold.filename.tolist())):
+        questions = sorted(set(gold.question[gold.filename == filename].tolist()))
+        parsed = DocumentParser.parse(os.path.join(args.data_dir, filename))
+        if args.llm:
+            results = llm.extract_answers(parsed.text, questions, chunks=parsed.get_chunks())
+        else:
+            results = llm._mock_extract(parsed.text, questions)
+        rows.extend(
+            (filename, r["question"], r.get("value"), float(r.get("confidence", 0.0)))
+            for r in results if r.get("question")
+        )
+        print(f"  extracted {len(results):3d} answers from {filename}", file=sys.stderr)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gold", default=DEFAULT_GOLD)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--project", help="Score this project's stored answers instead of extracting")
+    parser.add_argument("--llm", action="store_true", help="Extract through LLMService instead of the offline path")
+    parser.add_argument("--output", help="Write the full report as JSON here")
+    parser.add_argument("--min-fuzzy-accuracy", type=float)
+    parser.add_argument("--min-coverage", type=float)
+    args = parser.parse_args()
+
+    if not args.project:
+        # Fresh extraction: keep caches out of the working tree
+        tmp_dir = tempfile.mkdtemp(prefix="eval-")
+        os.environ.setdefault("PARSE_CACHE_DIR", os.path.join(tmp_dir, "parse-cache"))
+        os.environ.setdefault("LLM_CACHE_PATH", os.path.join(tmp_dir, "llm_cache.sqlite"))
+    if args.llm:
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=os.path.join(BACKEND_DIR, ".env"))
+    sys.path.insert(0, BACKEND_DIR)
+    from src.services.evaluation_service import EvaluationService, LabelColumns
+
+    gold = EvaluationService.load_gold_csv(args.gold)
+    if args.project:
+        report = EvaluationService.evaluate_project(args.project, gold)
+    else:
+        report = EvaluationService.evaluate(gold, LabelColumns.from_rows(extract(gold, args)))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report["summary"], indent=2))
+    for field in report["fields"]:
+        print(f"  {field['question']:<32} coverage {field['coverage'] or 0:.2f}  "
+              f"exact {field['exact_accuracy']:.2f}  normalized {field['normalized_accuracy']:.2f}  "
+              f"fuzzy {field['fuzzy_accuracy']:.2f}", file=sys.stderr)
+    for note in report["notes"]:
+        print(f"  ! {note['filename']} / {note['question']}: {note['reason']} "
+              f"(expected {note['expected']!r}, got {note['predicted']!r})", file=sys.stderr)
+
+    summary = report["summary"]
+    failed = [
+        f"{name} {summary[name]} < {floor}"
+        for name, floor in (("fuzzy_accuracy", args.min_fuzzy_accuracy), ("coverage", args.min_coverage))
+        if floor is not None and (summary[name] or 0.0) < floor
+    ]
+    if failed:
+        print("FAILED: " + "; ".join(failed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
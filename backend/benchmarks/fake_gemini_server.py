@@ -0,0 +1,144 @@
+"""
+Local stand-in for the Gemini generateContent REST endpoint, for exercising
+the rate-limited LLM client without a real key or quota.
+
+The server enforces a requests-per-minute quota (sliding 60 s window) and
+answers 429 RESOURCE_EXHAUSTED beyond it, like the real API. It can also add
+latency and random 503s. Answers echo each question id from the batched
+prompt so responses parse like real ones.
+
+    python benchmarks/fake_gemini_server.py --rpm 30 --latency 0.5 &
+    GEMINI_API_KEY=fake GEMINI_API_ENDPOINT=http://127.0.0.1:8765 \\
+        LLM_REQUESTS_PER_MINUTE=30 python benchmarks/bench_extraction.py --llm
+
+Counters (served, throttled, failed) are printed every --report seconds.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_QUESTIONS_RE = re.compile(r"Questions:\s*(\[.*?\])\s*Output format:", re.S)
+
+
+class FakeGemini:
+    def __init__(self, rpm: int, latency: float, error_rate: float):
+        self.rpm = rpm
+        self.latency = latency
+        self.error_rate = error_rate
+        self.window = deque()
+        self.lock = threading.Lock()
+        self.served = 0
+        self.throttled = 0
+        self.failed = 0
+
+    def admit(self) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0] >= 60:
+                self.window.popleft()
+            if len(self.window) >= self.rpm:
+                self.throttled += 1
+                return False
+            self.window.append(now)
+            return True
+
+    def answer(self, prompt: str) -> str:
+        match = _QUESTIONS_RE.search(prompt)
+        questions = json.loads(match.group(1)) if match else []
+        return json.dumps([
+            {
+                "id": q.get("id"),
+                "question": q.get("question"),
+                "value": f"Fake answer for {q.get('question')}",
+                "confidence": 0.9,
+                "citation": ", ".join(q.get("excerpts", [])),
+            }
+            for q in questions
+        ])
+
+
+def make_handler(fake: FakeGemini):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, reason: str, message: str) -> None:
+            self._reply(status, {"error": {"code": status, "message": message, "status": reason}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.split("?")[0].endswith(":generateContent"):
+                return self._error(404, "NOT_FOUND", f"Unknown method {self.path}")
+            if not fake.admit():
+                return self._error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+            if fake.latency:
+                time.sleep(fake.latency)
+            if random.random() < fake.error_rate:
+                with fake.lock:
+                    fake.failed += 1
+                return self._error(503, "UNAVAILABLE", "The model is overloaded. Please try again later.")
+
+            prompt = "".join(
+                part.get("text", "")
+                for content in request.get("contents", [])
+                for part in content.get("parts", [])
+            )
+            with fake.lock:
+                fake.served += 1
+            self._reply(200, {
+                "candidates": [{
+                    "content": {"role": "model", "parts": [{"text": fake.answer(prompt)}]},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }]
+            })
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=60, help="Requests per minute before answering 429")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every admitted call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of admitted calls answered 503")
+    parser.add_argument("--report", type=float, default=10.0, help="Seconds between counter reports")
+    args = parser.parse_args()
+
+    fake = FakeGemini(args.rpm, args.latency, args.error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    print(f"Fake Gemini listening on http://{args.host}:{server.server_port} (rpm={args.rpm})", file=sys.stderr)
+
+    def report():
+        started = time.monotonic()
+        while True:
+            time.sleep(args.report)
+            minutes = (time.monotonic() - started) / 60
+            print(f"served={fake.served} ({fake.served / minutes:.1f}/min) throttled={fake.throttled} "
+                  f"failed={fake.failed}", file=sys.stderr)
+
+    threading.Thread(target=report, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from typing import Iterable
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..monitoring.metrics import CONTENT_TYPE, Sample, metrics
+from ..indexing.parse_cache import parse_cache
+from ..indexing.clause_diff import diff_cache
+from ..services.llm_cache import llm_cache
+from ..services.llm_batcher import llm_batcher
+from ..services.llm_client import llm_client
+from ..services.extraction_pipeline import parse_queue_depth
+from ..workers.job_queue import job_queue
+
+router = APIRouter()
+
+_CIRCUIT_STATES = ("closed", "half_open", "open")
+
+
+def _runtime_samples() -> Iterable[Sample]:
+    """Counters the caches, queues and LLM client already keep, read at scrape time."""
+    caches = {"parse": parse_cache.stats(), "llm": llm_cache.stats(), "clause_diff": diff_cache.stats()}
+    yield ("legal_review_cache_hits_total", "counter", "Cache hits",
+           [({"cache": name}, s["hits"]) for name, s in caches.items()])
+    yield ("legal_review_cache_misses_total", "counter", "Cache misses",
+           [({"cache": name}, s["misses"]) for name, s in caches.items()])
+    yield ("legal_review_cache_hit_ratio", "gauge", "Cache hits / lookups since start",
+           [({"cache": name}, s["hit_rate"]) for name, s in caches.items()])
+
+    jobs = job_queue.stats()
+    batches = llm_batcher.stats()
+    yield ("legal_review_jobs_queued", "gauge", "Extraction jobs waiting for a worker", [({}, jobs["queued"])])
+    yield ("legal_review_jobs_running", "gauge", "Extraction jobs running", [({}, jobs["running"])])
+    yield ("legal_review_parses_in_flight", "gauge", "Documents queued or being parsed in the parse pool",
+           [({}, parse_queue_depth())])
+    yield ("legal_review_llm_questions_queued", "gauge", "Questions waiting to be batched",
+           [({}, batches["queued_questions"])])
+    yield ("legal_review_llm_batches_in_flight", "gauge", "LLM batches being sent",
+           [({}, batches["in_flight_batches"])])
+    yield ("legal_review_llm_batches_total", "counter", "LLM batches dispatched", [({}, batches["batches"])])
+    yield ("legal_review_llm_batched_questions_total", "counter", "Questions sent in LLM batches",
+           [({}, batches["questions"])])
+
+    client = llm_client.stats()
+    outcomes = [({"outcome": k}, client[k])
+                for k in ("calls", "failures", "retries", "throttled", "rejected_open_circuit")]
+    yield ("legal_review_llm_requests_total", "counter", "LLM API requests by outcome", outcomes)
+    yield ("legal_review_llm_rate_limit_wait_seconds_total", "counter", "Time spent waiting on LLM rate limits",
+           [({}, client["rate_limit_wait_seconds"])])
+    yield ("legal_review_llm_circuit_state", "gauge", "1 for the LLM circuit breaker's current state",
+           [({"state": state}, int(client["circuit"] == state)) for state in _CIRCUIT_STATES])
+
+
+metrics.collect(_runtime_samples)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """Prometheus metrics: stage and request latency histograms, LLM volume, caches and queues."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -1,47 +1,240 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Body
-from typing import List, Dict
-from ..models.schemas import Project, ProjectCreateRequest, Answer, Document
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Body, Depends, File, Form, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional
+import asyncio
+import re
+from ..models.schemas import (
+    Project, ProjectCreateRequest, Answer, Document, RequestStatus, ProjectInfo, ProjectPage, AnswerPage,
+    DocumentSpan, UploadResponse, UploadedFile, GoldLabel, SearchPage
+)
 from ..services.project_service import ProjectService
+from ..services.evaluation_service import EvaluationService, LabelColumns
+from ..services.export_service import ExportService, ExportUnavailableError, EXPORT_FORMATS
+from ..services.search_service import SearchService
+from ..services.ingest_service import IngestService, UploadTooLargeError, SUPPORTED_EXTENSIONS
 from ..models.db_models import ProjectModel
+from ..indexing.parse_cache import parse_cache
+from ..indexing.clause_diff import diff_cache
+from ..services.llm_cache import llm_cache
+from ..services.llm_batcher import llm_batcher
+from ..services.llm_client import llm_client
+from ..workers.job_queue import job_queue
+from ..services.extraction_pipeline import parse_queue_depth
+from ..storage.db import get_async_db
 
 router = APIRouter()
 
-@router.post("/create-project-async")
-async def create_project(request: ProjectCreateRequest):
-    return await ProjectService.create_project(request)
+@router.post("/create-project-async", response_model=ProjectInfo)
+async def create_project(request: ProjectCreateRequest, db: AsyncSession = Depends(get_async_db)):
+    return await ProjectService.create_project(db, request)
 
-@router.get("/get-project-info/{project_id}")
-async def get_project_info(project_id: str):
-    project = await ProjectService.get_project(project_id)
+@router.post("/upload-documents", response_model=UploadResponse)
+async def upload_documents(files: List[UploadFile] = File(...), project_id: Optional[str] = Form(None),
+                           db: AsyncSession = Depends(get_async_db)):
+    """
+    Store uploaded documents in the data directory and queue them for parsing.
+    Uploads identical to an existing file reuse it. With project_id, the files
+    are also added to that project.
+    """
+    if project_id and not await ProjectService.project_exists(db, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    names = [IngestService.safe_filename(f.filename) for f in files]
+    for upload, name in zip(files, names):
+        if name is None:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file {upload.filename!r}; expected one of {sorted(SUPPORTED_EXTENSIONS)}",
+            )
+
+    stored = []
+    for upload, name in zip(files, names):
+        try:
+            # Copy and hash off the event loop; the upload is already spooled by the multipart parser
+            stored.append(UploadedFile(**await asyncio.to_thread(IngestService.store_upload, upload.file, name)))
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            await upload.close()
+
+    documents = []
+    if project_id:
+        documents = await ProjectService.add_documents(db, project_id, [f.filename for f in stored])
+    return UploadResponse(files=stored, project_id=project_id, documents=documents)
+
+@router.get("/get-project-info/{project_id}", response_model=ProjectInfo)
+async def get_project_info(project_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Project summary and documents; answers are served by /get-project-answers."""
+    project = await ProjectService.get_project_info(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
-@router.get("/list-projects")
-async def list_projects():
-    return await ProjectService.list_projects()
+@router.get("/get-project-answers/{project_id}", response_model=AnswerPage)
+async def get_project_answers(
+    project_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=2000),
+    document_id: Optional[str] = None,
+    question_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not await ProjectService.project_exists(db, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return await ProjectService.get_project_answers(db, project_id, offset, limit, document_id, question_id)
+
+@router.get("/get-document-span/{document_id}", response_model=DocumentSpan)
+async def get_document_span(
+    document_id: str,
+    start: int = Query(..., ge=0),
+    end: int = Query(..., ge=0),
+    context: int = Query(200, ge=0, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Document text at a citation's start/end offsets, with surrounding context."""
+    span = await ProjectService.get_document_span(db, document_id, start, end, context)
+    if not span:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return span
+
+@router.get("/compare-documents/{left_document_id}/{right_document_id}")
+async def compare_documents(left_document_id: str, right_document_id: str, include_unchanged: bool = False,
+                            db: AsyncSession = Depends(get_async_db)):
+    """
+    Align the clauses of two documents and diff them. Pairs are changed,
+    removed (left only) or added (right only); unchanged pairs are left out
+    unless include_unchanged=true.
+    """
+    result = await ProjectService.compare_documents(db, left_document_id, right_document_id, include_unchanged)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return result
+
+@router.get("/export-project/{project_id}")
+async def export_project(
+    project_id: str,
+    format: str = Query("csv", pattern="^(csv|xlsx|parquet)$"),
+    confidence: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Download the project's answers as a document x question table (one row per
+    document, one column per question). Streamed in batches, so large projects
+    are never held in memory; confidence=true adds a score column per question.
+    """
+    name = await ExportService.project_name(db, project_id)
+    if name is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        ExportService.check_format(format)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = re.sub(r'[^\w.-]+', '_', name).strip('_') or project_id
+    # A sync generator: Starlette iterates it in the threadpool, using the workers' sync sessions
+    return StreamingResponse(
+        ExportService.stream(project_id, format, confidence),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
+
+@router.post("/evaluate-project/{project_id}")
+async def evaluate_project(project_id: str, labels: List[GoldLabel] = Body(...),
+                           db: AsyncSession = Depends(get_async_db)):
+    """
+    Score the project's answers against human-labeled reference values:
+    coverage, exact / normalized / fuzzy accuracy and normalization validity,
+    overall, per field and per document, with the worst mismatches as notes.
+    """
+    if not await ProjectService.project_exists(db, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    gold = LabelColumns.from_rows([(l.filename, l.question, l.value) for l in labels])
+    return await asyncio.to_thread(EvaluationService.evaluate_project, project_id, gold)
+
+@router.get("/list-projects", response_model=ProjectPage)
+async def list_projects(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Paged project summaries with document/answer counts. `q` filters by name."""
+    return await ProjectService.list_projects(db, offset, limit, status=status, search=q)
+
+@router.get("/search", response_model=SearchPage)
+async def search(
+    q: str = Query(..., min_length=1),
+    scope: str = Query("all", pattern="^(all|documents|answers)$"),
+    project_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Full-text search across projects over document text and answer values,
+    best matches first. Every word or "quoted phrase" must match; word* matches a prefix.
+    """
+    return await SearchService.search(db, q, scope, project_id, offset, limit)
 
 @router.get("/list-available-files")
 async def list_available_files():
     """List files in the data directory available for ingestion."""
     return await ProjectService.list_available_files()
 
+@router.get("/get-cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters for the parse, clause diff and LLM response caches, LLM batching and client metrics, and parses in flight."""
+    return {
+        "parse": parse_cache.stats(),
+        "clause_diff": diff_cache.stats(),
+        "llm": llm_cache.stats(),
+        "llm_batches": llm_batcher.stats(),
+        "llm_client": llm_client.stats(),
+        "parse_queue": {"in_flight": parse_queue_depth()},
+    }
+
 @router.delete("/delete-project/{project_id}")
-async def delete_project(project_id: str):
+async def delete_project(project_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a project and all associated data."""
-    success = await ProjectService.delete_project(project_id)
+    # Running jobs stop at their next document boundary instead of writing into a deleted project
+    await asyncio.to_thread(job_queue.cancel_project, project_id)
+    success = await ProjectService.delete_project(db, project_id)
     if not success:
         raise HTTPException(status_code=404, detail="Project not found")
     return {"status": "deleted", "project_id": project_id}
 
 @router.post("/generate-all-answers/{project_id}")
-async def generate_all_answers(project_id: str, questions: List[str] = Body(...)):
-    project = await ProjectService.get_project(project_id)
-    if not project:
+async def generate_all_answers(project_id: str, questions: List[str] = Body(...), force: bool = False,
+                               db: AsyncSession = Depends(get_async_db)):
+    """
+    Queue extraction for the project. Only (document, question) cells that are
+    missing, failed, or whose file changed are extracted unless force=true.
+    """
+    if not await ProjectService.project_exists(db, project_id):
         raise HTTPException(status_code=404, detail="Project not found")
-    
-    await ProjectService.generate_answers(project_id, questions)
-    return {"status": "processing_started", "project_id": project_id}
+
+    # The job queue records jobs through the workers' sync sessions
+    request_id = await asyncio.to_thread(job_queue.submit, project_id, questions, force=force)
+    return {"status": "processing_started", "project_id": project_id, "request_id": request_id}
+
+# Job endpoints use the job queue's sync sessions, so they are plain functions
+# that FastAPI runs in its threadpool rather than on the event loop
+@router.get("/get-request-status/{request_id}", response_model=RequestStatus)
+def get_request_status(request_id: str):
+    """Status and per-document / per-answer progress of a background job."""
+    status = job_queue.get_status(request_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return status
+
+@router.post("/cancel-request/{request_id}")
+def cancel_request(request_id: str):
+    """Cancel a queued or running job; running jobs stop at the next document."""
+    if not job_queue.cancel(request_id):
+        raise HTTPException(status_code=404, detail="Request not found")
+    return {"status": "cancel_requested", "request_id": request_id}
 
 @router.post("/define-fields/{project_id}")
 async def define_fields(project_id: str, fields: List[Dict[str, str]] = Body(...)):
@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+import os
+import re
+
+# Target chunk size in characters; clauses are merged up to this size
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1500"))
+CHUNK_MIN_CHARS = int(os.getenv("CHUNK_MIN_CHARS", "300"))
+
+# Lines that start a new clause: "ARTICLE IV", "Section 2.1", "12.3 Term", "(a) ...", plus blank lines
+_CLAUSE_START = re.compile(
+    r'^[ \t]*(?:'
+    r'(?:ARTICLE|Article|SECTION|Section|EXHIBIT|Exhibit|SCHEDULE|Schedule)\s+[\dIVXLC]+[\w.]*'
+    r'|\d{1,3}(?:\.\d{1,3})*\.?\s+[A-Z]'
+    r'|\([a-z0-9]{1,4}\)\s'
+    r')'
+    r'|^[ \t]*$',
+    re.MULTILINE,
+)
+# Section-level headings ("ARTICLE IV", "Section 2", "3. Delivery", "3.1 Packing"): a chunk
+# that already has min_chars is closed here instead of merging into the next section
+_SECTION_START = re.compile(
+    r'[ \t]*(?:(?:ARTICLE|Article|SECTION|Section)\s+[\dIVXLC]+|\d{1,3}(?:\.\d{1,3})?\.?\s+[A-Z])'
+)
+
+
+@dataclass
+class Chunk:
+    index: int
+    start: int
+    end: int
+    text: str
+    # Page the chunk starts on, when chunked from a page stream
+    page_number: Optional[int] = None
+
+
+def _clause_boundaries(text: str) -> List[int]:
+    bounds = {0, len(text)}
+    for m in _CLAUSE_START.finditer(text):
+        bounds.add(m.start())
+    return sorted(bounds)
+
+
+def _split_long(text: str, start: int, end: int, max_chars: int) -> List[tuple]:
+    """
+    Split an oversized span at line (or, failing that, word) breaks.
+    """
+    spans = []
+    while end - start > max_chars:
+        cut = text.rfind("\n", start + max_chars // 2, start + max_chars)
+        if cut == -1:
+            cut = text.rfind(" ", start + max_chars // 2, start + max_chars)
+        if cut == -1:
+            cut = start + max_chars
+        spans.append((start, cut))
+        start = cut
+    spans.append((start, end))
+    return spans
+
+
+def clause_spans(text: str, min_chars: int, max_chars: int) -> List[tuple]:
+    """
+    (start, end) spans of individual clauses, trimmed of surrounding
+    whitespace. Fragments shorter than min_chars (a bare "(a)" or a heading
+    line) are joined to the clause that follows; clauses longer than
+    max_chars are split at line breaks.
+    """
+    bounds = _clause_boundaries(text)
+    spans = []
+    pending = None
+    for s, e in zip(bounds, bounds[1:]):
+        start = s if pending is None else pending
+        body = text[start:e]
+        if not body.strip():
+            continue
+        if len(body.strip()) < min_chars and e < len(text):
+            pending = start
+            continue
+        pending = None
+        for ps, pe in _split_long(text, start, e, max_chars):
+            piece = text[ps:pe]
+            lead = len(piece) - len(piece.lstrip())
+            trail = len(piece) - len(piece.rstrip())
+            if pe - trail > ps + lead:
+                spans.append((ps + lead, pe - trail))
+    return spans
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_MAX_CHARS, min_chars: int = CHUNK_MIN_CHARS) -> List[Chunk]:
+    """
+    Split text into clause-aligned chunks with character offsets.
+
+    Clause starts (headings, numbered sections, list items, blank lines) are
+    candidate boundaries. Adjacent clauses are merged until the chunk would
+    exceed max_chars or the next clause opens a new section; a chunk is only
+    closed mid-clause when a single clause is itself longer than max_chars.
+    """
+    bounds = _clause_boundaries(text)
+    spans = []
+    for s, e in zip(bounds, bounds[1:]):
+        spans.extend(_split_long(text, s, e, max_chars))
+
+    chunks: List[Chunk] = []
+    cur_start = cur_end = None
+    for s, e in spans:
+        if cur_start is None:
+            cur_start, cur_end = s, e
+        elif (cur_end - cur_start) >= min_chars and _SECTION_START.match(text, s):
+            _append_chunk(chunks, text, cur_start, cur_end)
+            cur_start, cur_end = s, e
+        elif (e - cur_start) <= max_chars or ((cur_end - cur_start) < min_chars and (e - cur_start) <= max_chars * 2):
+            # Merge while it fits; let runt chunks overshoot a little rather than stand alone
+            cur_end = e
+        else:
+            _append_chunk(chunks, text, cur_start, cur_end)
+            cur_start, cur_end = s, e
+    if cur_start is not None:
+        _append_chunk(chunks, text, cur_start, cur_end)
+    return chunks
+
+
+def _append_chunk(chunks: List[Chunk], text: str, start: int, end: int) -> None:
+    body = text[start:end]
+    if not body.strip():
+        return
+    # Trim surrounding whitespace but keep offsets pointing at the trimmed text
+    lead = len(body) - len(body.lstrip())
+    trail = len(body) - len(body.rstrip())
+    start, end = start + lead, end - trail
+    chunks.append(Chunk(index=len(chunks), start=start, end=end, text=text[start:end]))
+
+
+def chunk_pages(pages: Iterable, max_chars: int = CHUNK_MAX_CHARS, min_chars: int = CHUNK_MIN_CHARS) -> Iterator[Chunk]:
+    """
+    Streaming counterpart of chunk_text over parser PageText items.
+
+    Only the current page plus the unfinished clause carried over from the
+    previous one are held in memory; every chunk except the last in the
+    window is final and is yielded with document-level offsets.
+    """
+    buffer = ""
+    base = 0  # document offset of buffer[0]
+    page_starts: List[tuple] = []  # (document offset, page_number) still covered by buffer
+    emitted = 0
+
+    def page_at(offset: int) -> Optional[int]:
+        number = None
+        for start, page_number in page_starts:
+            if start > offset:
+                break
+            number = page_number
+        return number
+
+    def relocate(chunk: Chunk) -> Chunk:
+        nonlocal emitted
+        start = base + chunk.start
+        out = Chunk(index=emitted, start=start, end=base + chunk.end, text=chunk.text, page_number=page_at(start))
+        emitted += 1
+        return out
+
+    for page in pages:
+        if buffer:
+            buffer += "\n"
+        else:
+            base = page.start
+        page_starts.append((page.start, page.page_number))
+        buffer += page.text
+
+        window = chunk_text(buffer, max_chars, min_chars)
+        if len(window) < 2:
+            continue
+        for chunk in window[:-1]:
+            yield relocate(chunk)
+        # Keep the trailing chunk open: the next page may continue its clause
+        keep_from = window[-1].start
+        buffer = buffer[keep_from:]
+        base += keep_from
+        # Forget pages that end before the buffer, keeping the one it starts on
+        page_starts = [(max(start, base), number) for start, number in page_starts
+                       if start > base or number == page_at(base)]
+
+    for chunk in chunk_text(buffer, max_chars, min_chars):
+        yield relocate(chunk)
@@ -0,0 +1,132 @@
+from bisect import bisect_right
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+import os
+import re
+
+from .parser import ParsedDocument
+
+# Fuzzy matches below this similarity are treated as "not found"
+CITATION_MIN_RATIO = float(os.getenv("CITATION_MIN_RATIO", "0.8"))
+# Snippets shorter than this (after cleanup) are too ambiguous to place
+CITATION_MIN_CHARS = 12
+
+_WS_RE = re.compile(r'\s+')
+# Ellipses separate quoted fragments in model and rule-based citations
+_ELLIPSIS_RE = re.compile(r'\.{3,}|…')
+_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'", "\xa0": " "})
+_ANCHOR_CHARS = 24
+_MAX_CANDIDATES = 8
+
+
+def _normalize(text: str) -> Tuple[str, List[int], List[int]]:
+    """
+    Collapse whitespace runs to one space, unify quotes and lower-case.
+    Returns the normalized text plus breakpoints mapping normalized offsets
+    back to the original: for norm offsets >= starts[i], add shifts[i].
+    """
+    pieces = []
+    starts = [0]
+    shifts = [0]
+    last = 0
+    removed = 0
+    for m in _WS_RE.finditer(text):
+        pieces.append(text[last:m.start()])
+        pieces.append(" ")
+        removed += (m.end() - m.start()) - 1
+        last = m.end()
+        # First normalized offset after this run, and the total shift from there on
+        starts.append(m.end() - removed)
+        shifts.append(removed)
+    pieces.append(text[last:])
+    collapsed = "".join(pieces).translate(_QUOTES)
+    lowered = collapsed.lower()
+    # lower() can change the length of a few characters; keep offsets exact
+    return (lowered if len(lowered) == len(collapsed) else collapsed), starts, shifts
+
+
+def _clean_snippet(snippet: str) -> str:
+    """Longest fragment between ellipses, without labels or wrapping quotes."""
+    fragments = [f.strip().strip('"“”\'') for f in _ELLIPSIS_RE.split(snippet)]
+    return max(fragments, key=len) if fragments else ""
+
+
+class CitationLocator:
+    """
+    Resolves citation snippets to (page, start, end) spans in a parsed
+    document.
+
+    The document is normalized once; each lookup is then an exact substring
+    search over the normalized text, falling back to anchoring on a few
+    fixed-size slices of the snippet and scoring the candidate windows with
+    SequenceMatcher. Offsets are into ParsedDocument.text.
+    """
+
+    def __init__(self, parsed: ParsedDocument):
+        self.parsed = parsed
+        self.norm, self._starts, self._shifts = _normalize(parsed.text)
+        self._page_starts = [start for _, start, _ in parsed.pages]
+        self._page_numbers = [number for number, _, _ in parsed.pages]
+
+    def _to_original(self, norm_offset: int) -> int:
+        return norm_offset + self._shifts[bisect_right(self._starts, norm_offset) - 1]
+
+    def page_at(self, offset: int) -> Optional[int]:
+        i = bisect_right(self._page_starts, offset) - 1
+        return self._page_numbers[i] if i >= 0 else None
+
+    @staticmethod
+    def page_for(parsed: ParsedDocument, offset: int) -> Optional[int]:
+        """Page containing a text offset, without building a locator."""
+        i = bisect_right([start for _, start, _ in parsed.pages], offset) - 1
+        return parsed.pages[i][0] if i >= 0 else None
+
+    def locate(self, snippet: Optional[str]) -> Optional[dict]:
+        if not snippet:
+            return None
+        needle, _, _ = _normalize(_clean_snippet(snippet))
+        needle = needle.strip()
+        if len(needle) < CITATION_MIN_CHARS:
+            return None
+
+        pos = self.norm.find(needle)
+        score = 1.0
+        length = len(needle)
+        if pos == -1:
+            pos, length, score = self._fuzzy(needle)
+            if pos == -1:
+                return None
+
+        start = self._to_original(pos)
+        end = self._to_original(pos + length - 1) + 1
+        return {"page_number": self.page_at(start), "start": start, "end": end, "score": round(score, 3)}
+
+    def _fuzzy(self, needle: str) -> Tuple[int, int, float]:
+        # Candidate windows come from exact hits of short slices of the snippet
+        n = len(needle)
+        offsets = {0, max(0, n - _ANCHOR_CHARS), n // 4, n // 2, (3 * n) // 4}
+        candidates = set()
+        for offset in sorted(offsets):
+            anchor = needle[offset:offset + _ANCHOR_CHARS]
+            if len(anchor) < CITATION_MIN_CHARS:
+                continue
+            hit = self.norm.find(anchor)
+            while hit != -1 and len(candidates) < _MAX_CANDIDATES:
+                candidates.add(max(0, hit - offset))
+                hit = self.norm.find(anchor, hit + 1)
+
+        best = (-1, 0, 0.0)
+        for start in candidates:
+            window = self.norm[start:start + n]
+            matcher = SequenceMatcher(None, needle, window, autojunk=False)
+            if matcher.quick_ratio() < CITATION_MIN_RATIO:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best[2]:
+                # Trim the window to the matched region so the span hugs the quote
+                blocks = [b for b in matcher.get_matching_blocks() if b.size]
+                first, last = blocks[0], blocks[-1]
+                best = (start + first.b, last.b + last.size - first.b, ratio)
+        if best[2] < CITATION_MIN_RATIO:
+            return -1, 0, 0.0
+        return best
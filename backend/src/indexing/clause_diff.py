@@ -0,0 +1,240 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Tuple
+import os
+import re
+import zlib
+import logging
+import numpy as np
+from .chunker import clause_spans
+from .parse_cache import ParseCache
+from .parser import PARSER_VERSION, ParsedDocument
+from .citations import CitationLocator
+
+logger = logging.getLogger(__name__)
+
+# Diff results are cached per (left, right) content-hash pair next to the parse cache
+CLAUSE_DIFF_CACHE_DIR = os.getenv(
+    "CLAUSE_DIFF_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.cache/clause-diff"))
+)
+# Clause size bounds: shorter fragments join the next clause, longer ones are split
+CLAUSE_MIN_CHARS = int(os.getenv("CLAUSE_MIN_CHARS", "80"))
+CLAUSE_MAX_CHARS = int(os.getenv("CLAUSE_MAX_CHARS", "3000"))
+# Aligned clauses need at least this estimated Jaccard similarity of their shingles
+CLAUSE_MATCH_MIN = float(os.getenv("CLAUSE_MATCH_MIN", "0.3"))
+
+# Bump when segmentation, fingerprinting or the result format changes
+DIFF_VERSION = "1"
+SHINGLE_WORDS = 3
+# 32 bands of 4 rows: pairs around Jaccard 0.4 and up almost always share a bucket
+MINHASH_BANDS = 32
+MINHASH_ROWS = 4
+_NUM_PERM = MINHASH_BANDS * MINHASH_ROWS
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, _PRIME, size=_NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.integers(0, _PRIME, size=_NUM_PERM, dtype=np.int64)
+# Shingles permuted at once; bounds the (shingles x permutations) matrix to ~16 MB
+_SIGNATURE_BLOCK_SHINGLES = 16384
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Word-level diff tokens keep their trailing whitespace so ops rebuild the text exactly
+_DIFF_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+diff_cache = ParseCache(CLAUSE_DIFF_CACHE_DIR)
+
+
+@dataclass
+class Clause:
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def segment(parsed: ParsedDocument) -> List[Clause]:
+    spans = clause_spans(parsed.text, CLAUSE_MIN_CHARS, CLAUSE_MAX_CHARS)
+    return [Clause(index=i, start=s, end=e, text=parsed.text[s:e]) for i, (s, e) in enumerate(spans)]
+
+
+def _token_hashes(words: List[str], vocabulary: Dict[str, int]) -> np.ndarray:
+    hashes = []
+    for word in words:
+        h = vocabulary.get(word)
+        if h is None:
+            h = vocabulary[word] = zlib.crc32(word.encode("utf-8"))
+        hashes.append(h)
+    return np.array(hashes, dtype=np.int64)
+
+
+def signatures(clauses: List[Clause]) -> np.ndarray:
+    """
+    (clauses x permutations) MinHash signatures over word 3-gram shingles.
+
+    Shingle hashes of a block of clauses are concatenated and every
+    permutation (a*x + b mod p) is applied in one array operation; per-clause
+    minima come from np.minimum.reduceat over the clause boundaries. Blocks
+    hold up to _SIGNATURE_BLOCK_SHINGLES shingles (at least one clause).
+    """
+    vocabulary: Dict[str, int] = {}
+    parts = []
+    for clause in clauses:
+        words = _token_hashes(_WORD_RE.findall(clause.text.lower()), vocabulary)
+        if len(words) >= SHINGLE_WORDS:
+            shingles = words[:-2] * 1000003 + words[1:-1] * 10007 + words[2:]
+        else:
+            # Too short for a shingle: the whole clause is one
+            shingles = np.array([int(words.sum()) if len(words) else 0], dtype=np.int64)
+        parts.append(np.unique(shingles % _PRIME))
+    if not parts:
+        return np.zeros((0, _NUM_PERM), dtype=np.int64)
+
+    sigs = np.empty((len(parts), _NUM_PERM), dtype=np.int64)
+    start = 0
+    while start < len(parts):
+        end, total = start + 1, len(parts[start])
+        while end < len(parts) and total + len(parts[end]) <= _SIGNATURE_BLOCK_SHINGLES:
+            total += len(parts[end])
+            end += 1
+        block = parts[start:end]
+        offsets = np.concatenate([[0], np.cumsum([len(p) for p in block])[:-1]])
+        shingles = np.concatenate(block)
+        permuted = (shingles[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % _PRIME
+        sigs[start:end] = np.minimum.reduceat(permuted, offsets, axis=0)
+        start = end
+    return sigs
+
+
+def candidate_pairs(left: np.ndarray, right: np.ndarray) -> List[Tuple[int, int]]:
+    """Clause pairs sharing at least one LSH band bucket."""
+    buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+    for i, row in enumerate(left):
+        for band in range(MINHASH_BANDS):
+            key = row[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS].tobytes()
+            buckets[(band, key)].append(i)
+    pairs = set()
+    for j, row in enumerate(right):
+        for band in range(MINHASH_BANDS):
+            key = row[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS].tobytes()
+            for i in buckets.get((band, key), ()):
+                pairs.add((i, j))
+    return sorted(pairs)
+
+
+def word_diff(left: str, right: str) -> List[Dict]:
+    """Word-level opcodes between two aligned clauses."""
+    a = _DIFF_TOKEN_RE.findall(left)
+    b = _DIFF_TOKEN_RE.findall(right)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        ops.append({"op": tag, "left": "".join(a[i1:i2]), "right": "".join(b[j1:j2])})
+    return ops
+
+
+def _describe(parsed: ParsedDocument, clause: Clause) -> Dict:
+    return {"index": clause.index, "start": clause.start, "end": clause.end,
+            "page_number": CitationLocator.page_for(parsed, clause.start), "text": clause.text}
+
+
+def _normalized(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class ClauseDiff:
+    """
+    Aligns the clauses of two parsed documents and diffs the aligned pairs.
+
+    Clauses are fingerprinted with MinHash over word shingles and bucketed
+    with LSH, so only clauses that share a bucket are ever compared; this is
+    roughly linear in the number of clauses instead of every-pair. Candidate
+    pairs are ranked by estimated Jaccard similarity and matched greedily
+    one-to-one, and only matched pairs get a word-level diff.
+    """
+
+    @staticmethod
+    def compare(left: ParsedDocument, right: ParsedDocument) -> Dict:
+        left_clauses = segment(left)
+        right_clauses = segment(right)
+        left_sigs = signatures(left_clauses)
+        right_sigs = signatures(right_clauses)
+
+        candidates = candidate_pairs(left_sigs, right_sigs)
+        if candidates:
+            li = np.array([i for i, _ in candidates])
+            ri = np.array([j for _, j in candidates])
+            scores = (left_sigs[li] == right_sigs[ri]).mean(axis=1)
+            order = np.argsort(-scores, kind="stable")
+        else:
+            li = ri = scores = order = np.array([], dtype=np.int64)
+
+        matched_left: Dict[int, Tuple[int, float]] = {}
+        matched_right = set()
+        for k in order:
+            if scores[k] < CLAUSE_MATCH_MIN:
+                break
+            i, j = int(li[k]), int(ri[k])
+            if i in matched_left or j in matched_right:
+                continue
+            matched_left[i] = (j, float(scores[k]))
+            matched_right.add(j)
+
+        pairs = []
+        counts = {"unchanged": 0, "changed": 0, "removed": 0, "added": 0}
+        for clause in left_clauses:
+            match = matched_left.get(clause.index)
+            if match is None:
+                pairs.append({"status": "removed", "similarity": 0.0,
+                              "left": _describe(left, clause), "right": None})
+                counts["removed"] += 1
+                continue
+            j, score = match
+            other = right_clauses[j]
+            if _normalized(clause.text) == _normalized(other.text):
+                status, diff = "unchanged", []
+            else:
+                status, diff = "changed", word_diff(clause.text, other.text)
+            counts[status] += 1
+            pairs.append({"status": status, "similarity": round(score, 3),
+                          "left": _describe(left, clause), "right": _describe(right, other),
+                          "diff": diff})
+
+        # Added clauses are placed after the left clause aligned to their nearest preceding right clause
+        right_to_left = {j: i for i, (j, _) in matched_left.items()}
+        position = {p["left"]["index"]: n for n, p in enumerate(pairs) if p["left"]}
+        inserts: Dict[int, List[Dict]] = defaultdict(list)
+        anchor = -1
+        for clause in right_clauses:
+            if clause.index in right_to_left:
+                anchor = position[right_to_left[clause.index]]
+                continue
+            inserts[anchor].append({"status": "added", "similarity": 0.0, "left": None,
+                                    "right": _describe(right, clause)})
+            counts["added"] += 1
+        ordered = list(inserts.get(-1, []))
+        for n, pair in enumerate(pairs):
+            ordered.append(pair)
+            ordered.extend(inserts.get(n, []))
+
+        return {
+            "summary": {
+                "left_clauses": len(left_clauses),
+                "right_clauses": len(right_clauses),
+                "candidate_pairs": len(candidates),
+                **counts,
+            },
+            "pairs": ordered,
+        }
+
+    @staticmethod
+    def compare_cached(left: ParsedDocument, right: ParsedDocument) -> Dict:
+        key = f"{left.content_hash}-{right.content_hash}"
+        # Segmentation and matching settings change the result as much as the code does
+        version = f"{DIFF_VERSION}.{PARSER_VERSION}.{CLAUSE_MIN_CHARS}-{CLAUSE_MAX_CHARS}-{CLAUSE_MATCH_MIN}"
+        cached = diff_cache.get(key, version)
+        if cached is not None:
+            return cached
+        result = ClauseDiff.compare(left, right)
+        diff_cache.put(key, version, result)
+        return result
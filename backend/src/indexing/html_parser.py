@@ -0,0 +1,261 @@
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "auto" uses lxml's C tokenizer when installed and falls back to the stdlib html.parser
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "auto")
+
+BLOCK_TAGS = {
+    "p", "div", "li", "dd", "dt", "blockquote", "pre", "section", "article", "header",
+    "footer", "center", "address", "title", "ul", "ol", "dl", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+# Short blocks that look like clause or article headings
+HEADING_MAX_CHARS = 100
+_HEADING_RE = re.compile(
+    r'^(?:(?:ARTICLE|Article|SECTION|Section|EXHIBIT|Exhibit|SCHEDULE|Schedule)\s+[\dIVXLC]+'
+    r'|\d{1,3}(?:\.\d{1,3})*\.?\s+[A-Z])'
+)
+_BLOCK_SEPARATOR = "\n\n"
+
+
+@dataclass
+class TextBlock:
+    # "heading", "paragraph" or "table"
+    kind: str
+    text: str
+    # Offsets of this block within the joined document text
+    start: int = 0
+    end: int = 0
+
+
+class _Table:
+    def __init__(self):
+        self.rows: List[List[str]] = []
+        self.row: Optional[List[str]] = None
+        self.cell: Optional[List[str]] = None
+
+    def close_cell(self) -> None:
+        if self.cell is not None:
+            if self.row is None:
+                self.row = []
+            self.row.append(_clean("".join(self.cell)))
+            self.cell = None
+
+    def close_row(self) -> None:
+        self.close_cell()
+        if self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+
+
+def _clean(text: str) -> str:
+    # str.split() collapses all whitespace runs, including non-breaking spaces
+    if "\n" not in text:
+        return " ".join(text.split())
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+class BlockBuilder:
+    """
+    Turns a stream of start/end/data events into text blocks. Follows the
+    lxml parser-target protocol (start/end/data/close); the stdlib backend
+    adapts its callbacks onto the same methods.
+
+    Block-level tags close the current paragraph. Tables are collected
+    row by row: a single-row table (SEC exhibits lay out numbered clauses
+    as "1.1 | Heading. Body" rows) becomes one paragraph, and a multi-row
+    table becomes a "table" block with one line per row and " | " between
+    cells.
+    """
+
+    def __init__(self):
+        self.blocks: List[TextBlock] = []
+        self._buffer: List[str] = []
+        self._tables: List[_Table] = []
+        self._skip = 0
+        self._heading = 0
+
+    def start(self, tag: str, attrib: Optional[Dict[str, str]] = None) -> None:
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if tag == "table":
+            self._flush()
+            self._tables.append(_Table())
+            return
+        if self._tables:
+            table = self._tables[-1]
+            if tag == "tr":
+                table.close_row()
+                table.row = []
+            elif tag in ("td", "th"):
+                table.close_cell()
+                table.cell = []
+            elif tag == "br" or tag in BLOCK_TAGS:
+                self._write("\n")
+            return
+        if tag == "br":
+            self._write("\n")
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag in HEADING_TAGS:
+                self._heading += 1
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if tag == "table":
+            if self._tables:
+                self._end_table(self._tables.pop())
+            return
+        if self._tables:
+            table = self._tables[-1]
+            if tag == "tr":
+                table.close_row()
+            elif tag in ("td", "th"):
+                table.close_cell()
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+            if tag in HEADING_TAGS:
+                self._heading = max(0, self._heading - 1)
+
+    def data(self, text: str) -> None:
+        if not self._skip:
+            self._write(text.replace("\n", " "))
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def close(self) -> List[TextBlock]:
+        while self._tables:
+            self._end_table(self._tables.pop())
+        self._flush()
+        return self.blocks
+
+    def _write(self, text: str) -> None:
+        if self._tables:
+            table = self._tables[-1]
+            if table.cell is None:
+                # Stray text between cells still belongs to the row
+                table.cell = []
+            table.cell.append(text)
+        else:
+            self._buffer.append(text)
+
+    def _flush(self) -> None:
+        text = _clean("".join(self._buffer))
+        self._buffer = []
+        if not text:
+            return
+        heading = self._heading > 0 or (len(text) <= HEADING_MAX_CHARS and (
+            text.isupper() or _HEADING_RE.match(text) is not None))
+        self._emit("heading" if heading else "paragraph", text)
+
+    def _end_table(self, table: _Table) -> None:
+        table.close_row()
+        rows = [[c for c in row if c] for row in table.rows]
+        rows = [row for row in rows if row]
+        if not rows:
+            return
+        if len(rows) == 1:
+            text = " ".join(rows[0])
+        else:
+            text = "\n".join(" | ".join(row) for row in rows)
+        if self._tables:
+            # Nested table: its text is part of the enclosing cell
+            self._write(text + "\n")
+        elif len(rows) == 1:
+            self._buffer.append(text)
+            self._flush()
+        else:
+            self._emit("table", text)
+
+    def _emit(self, kind: str, text: str) -> None:
+        self.blocks.append(TextBlock(kind=kind, text=text))
+
+
+class _StdlibAdapter(HTMLParser):
+    def __init__(self, builder: BlockBuilder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs))
+        if tag in ("br", "hr"):
+            # Void elements never get an end tag
+            self.builder.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs))
+        self.builder.end(tag)
+
+    def handle_endtag(self, tag):
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+
+def _parse_lxml(raw: bytes) -> List[TextBlock]:
+    from lxml import etree
+
+    parser = etree.HTMLParser(target=BlockBuilder(), remove_comments=True)
+    parser.feed(raw)
+    return parser.close()
+
+
+def _parse_stdlib(raw: bytes) -> List[TextBlock]:
+    builder = BlockBuilder()
+    adapter = _StdlibAdapter(builder)
+    adapter.feed(raw.decode("utf-8", errors="replace"))
+    adapter.close()
+    return builder.close()
+
+
+def resolve_backend(name: str = HTML_PARSER_BACKEND) -> str:
+    if name != "auto":
+        return name
+    try:
+        import lxml.etree  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+_BACKENDS = {"lxml": _parse_lxml, "html.parser": _parse_stdlib}
+
+
+def parse_html(path: str, backend: str = HTML_PARSER_BACKEND) -> Tuple[str, List[TextBlock]]:
+    """
+    Text of an HTML file as blank-line separated blocks, plus the blocks with
+    their offsets into that text.
+    """
+    name = resolve_backend(backend)
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    with open(path, "rb") as f:
+        raw = f.read()
+    blocks = _BACKENDS[name](raw)
+
+    offset = 0
+    for i, block in enumerate(blocks):
+        if i:
+            offset += len(_BLOCK_SEPARATOR)
+        block.start = offset
+        block.end = offset + len(block.text)
+        offset = block.end
+    return _BLOCK_SEPARATOR.join(b.text for b in blocks), blocks
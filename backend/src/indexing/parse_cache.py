@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parsed text is cached on disk next to the DB by default; override for shared volumes.
+PARSE_CACHE_DIR = os.getenv(
+    "PARSE_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.cache/parse"))
+)
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_content_hash(path: str) -> str:
+    """
+    SHA-256 of the file contents, read in fixed-size blocks.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """
+    Content-addressed store of parsed documents.
+
+    Entries are keyed by (content hash, parser version), so editing a file or
+    bumping the parser version both produce a miss. Hashes are memoized per
+    (path, size, mtime) so a hit does not re-read large files.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._hash_memo: Dict[Tuple[str, int, float], str] = {}
+
+    def content_hash(self, path: str) -> str:
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime)
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            digest = file_content_hash(path)
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    def _entry_path(self, content_hash: str, parser_version: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}-v{parser_version}.json")
+
+    def get(self, content_hash: str, parser_version: str) -> Optional[dict]:
+        entry_path = self._entry_path(content_hash, parser_version)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable parse cache entry {entry_path}: {e}")
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, content_hash: str, parser_version: str, entry: dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._entry_path(content_hash, parser_version)
+        # Write to a temp file then rename so concurrent readers never see a partial entry
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Failed to write parse cache entry {entry_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+parse_cache = ParseCache(PARSE_CACHE_DIR)
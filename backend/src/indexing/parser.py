@@ -1,51 +1,218 @@
-import pdfplumber
-from bs4 import BeautifulSoup
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
 import os
 import warnings
 import logging
+from .parse_cache import parse_cache, file_content_hash
+from .html_parser import parse_html
+from .chunker import CHUNK_MAX_CHARS, CHUNK_MIN_CHARS, Chunk, chunk_pages
+from ..monitoring.metrics import stage_timer
 
 # Suppress pdfminer font warnings
 logging.getLogger('pdfminer').setLevel(logging.ERROR)
 warnings.filterwarnings('ignore', category=UserWarning, module='pdfminer')
 
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+PARSER_VERSION = "3"
+
+@dataclass
+class PageText:
+    page_number: int
+    text: str
+    # Offsets of this page within the full document text
+    start: int
+    end: int
+
+@dataclass
+class ParsedDocument:
+    text: str
+    # (page_number, start_offset, end_offset) into text; HTML/TXT are a single page
+    pages: List[Tuple[int, int, int]] = field(default_factory=list)
+    content_hash: str = ""
+    # (kind, start_offset, end_offset) of structural blocks ("heading", "paragraph",
+    # "table"); only HTML documents carry them
+    blocks: List[Tuple[str, int, int]] = field(default_factory=list)
+    # (start_offset, end_offset, page_number) of retrieval chunks, computed at
+    # parse time with the chunk sizes in chunk_params
+    chunks: List[Tuple[int, int, Optional[int]]] = field(default_factory=list)
+    chunk_params: Tuple[int, int] = (0, 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "text": self.text,
+            "pages": [list(p) for p in self.pages],
+            "content_hash": self.content_hash,
+            "blocks": [list(b) for b in self.blocks],
+            "chunks": [list(c) for c in self.chunks],
+            "chunk_params": list(self.chunk_params),
+        }
+
+    def get_chunks(self) -> List[Chunk]:
+        """
+        Retrieval chunks, from the precomputed offsets when they were made with
+        the current chunk settings, otherwise chunked now.
+        """
+        if self.chunks and self.chunk_params == (CHUNK_MAX_CHARS, CHUNK_MIN_CHARS):
+            return [
+                Chunk(index=i, start=start, end=end, text=self.text[start:end], page_number=page_number)
+                for i, (start, end, page_number) in enumerate(self.chunks)
+            ]
+        return list(chunk_pages(self.iter_pages()))
+
+    def iter_pages(self) -> Iterator[PageText]:
+        for page_number, start, end in self.pages:
+            yield PageText(page_number=page_number, text=self.text[start:end], start=start, end=end)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedDocument":
+        return cls(
+            text=data["text"],
+            pages=[tuple(p) for p in data.get("pages", [])],
+            content_hash=data.get("content_hash", ""),
+            blocks=[tuple(b) for b in data.get("blocks", [])],
+            chunks=[tuple(c) for c in data.get("chunks", [])],
+            chunk_params=tuple(data.get("chunk_params", (0, 0))),
+        )
+
 class DocumentParser:
     @staticmethod
-    def extract_text(file_path: str) -> str:
+    def extract_text(file_path: str, use_cache: bool = True) -> str:
         """
         Extract text from a file based on its extension.
         """
+        return DocumentParser.parse(file_path, use_cache=use_cache).text
+
+    @staticmethod
+    def parse(file_path: str, use_cache: bool = True) -> ParsedDocument:
+        """
+        Parse a file into text plus per-page offsets, consulting the
+        content-addressed parse cache first.
+        """
+        if use_cache:
+            cached = DocumentParser.get_cached(file_path)
+            if cached is not None:
+                return cached
+
+        parsed = DocumentParser.parse_uncached(file_path)
+        if use_cache:
+            DocumentParser.store_cached(parsed)
+        return parsed
+
+    @staticmethod
+    def get_cached(file_path: str) -> Optional[ParsedDocument]:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        with stage_timer("parse_cache_read"):
+            cached = parse_cache.get(parse_cache.content_hash(file_path), PARSER_VERSION)
+            if cached is None:
+                return None
+            logger.info(f"Parse cache hit for {os.path.basename(file_path)}")
+            return ParsedDocument.from_dict(cached)
+
+    @staticmethod
+    def store_cached(parsed: ParsedDocument) -> None:
+        parse_cache.put(parsed.content_hash, PARSER_VERSION, parsed.to_dict())
+
+    @staticmethod
+    def parse_uncached(file_path: str) -> ParsedDocument:
+        """
+        Parse without touching the cache. Safe to run in a worker process.
+        Chunk offsets are computed here too, so extraction starts from a
+        pre-chunked document. Timings recorded in a worker process stay
+        there; pool parses are timed by the submitter as "parse_pool".
+
+        The full text is still assembled: the parse cache, citations, search
+        and clause diff all work on it, so memory grows with the document.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        with stage_timer("parse"):
+            parsed = DocumentParser._parse_by_extension(file_path)
+            parsed.content_hash = file_content_hash(file_path)
+            parsed.chunk_params = (CHUNK_MAX_CHARS, CHUNK_MIN_CHARS)
+        return parsed
+
+    @staticmethod
+    def iter_pages(file_path: str) -> Iterator[PageText]:
+        """
+        Stream a document page by page. Offsets assume pages are joined with
+        a single newline, matching ParsedDocument.text. HTML and TXT files are
+        yielded as one page.
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
         ext = os.path.splitext(file_path)[1].lower()
         if ext == '.pdf':
-            return DocumentParser._extract_from_pdf(file_path)
+            yield from DocumentParser._iter_pdf_pages(file_path)
         elif ext in ['.html', '.htm']:
-            return DocumentParser._extract_from_html(file_path)
+            text = DocumentParser._extract_from_html(file_path)
+            yield PageText(page_number=1, text=text, start=0, end=len(text))
         elif ext == '.txt':
-            return DocumentParser._extract_from_txt(file_path)
+            text = DocumentParser._extract_from_txt(file_path)
+            yield PageText(page_number=1, text=text, start=0, end=len(text))
         else:
             raise ValueError(f"Unsupported file format: {ext}")
 
     @staticmethod
-    def _extract_from_pdf(path: str) -> str:
-        text = []
+    def _parse_by_extension(file_path: str) -> ParsedDocument:
+        """Parsed document with chunk offsets (chunk texts are not kept)."""
+        if os.path.splitext(file_path)[1].lower() in ['.html', '.htm']:
+            text, blocks = parse_html(file_path)
+            page = PageText(page_number=1, text=text, start=0, end=len(text))
+            return ParsedDocument(
+                text=text,
+                pages=[(1, 0, len(text))],
+                blocks=[(b.kind, b.start, b.end) for b in blocks],
+                chunks=[(c.start, c.end, c.page_number) for c in chunk_pages([page])],
+            )
+
+        texts = []
+        pages = []
+
+        def collect() -> Iterator[PageText]:
+            # Chunked as the pages stream in rather than re-sliced from the joined text
+            for page in DocumentParser.iter_pages(file_path):
+                texts.append(page.text)
+                pages.append((page.page_number, page.start, page.end))
+                yield page
+
+        chunks = [(c.start, c.end, c.page_number) for c in chunk_pages(collect())]
+        return ParsedDocument(text="\n".join(texts), pages=pages, chunks=chunks)
+
+    @staticmethod
+    def _iter_pdf_pages(path: str) -> Iterator[PageText]:
+        # Imported on first use: pdfplumber/pdfminer are slow to import and only parse workers need them
+        import pdfplumber
+
+        offset = 0
+        first = True
         try:
             with pdfplumber.open(path) as pdf:
                 for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text.append(page_text)
+                    try:
+                        page_text = page.extract_text()
+                    finally:
+                        # Drop the page's parsed layout objects before moving on
+                        page.close()
+                    if not page_text:
+                        continue
+                    if not first:
+                        offset += 1  # "\n" separator
+                    first = False
+                    yield PageText(page_number=page.page_number, text=page_text,
+                                   start=offset, end=offset + len(page_text))
+                    offset += len(page_text)
         except Exception as e:
             logging.error(f"Error extracting PDF {path}: {e}")
             raise
-        return "\n".join(text)
 
     @staticmethod
     def _extract_from_html(path: str) -> str:
-        with open(path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-            return soup.get_text(separator="\n")
+        # Blank-line separated blocks; see html_parser for backends and table handling
+        return parse_html(path)[0]
 
     @staticmethod
     def _extract_from_txt(path: str) -> str:
@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+import math
+import os
+import re
+from .chunker import Chunk
+
+# Number of chunks sent to the LLM per question
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+PHRASE_BOOST = 2.0
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to was were will with what which who whom when where how any all shall such".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index over a document's chunks.
+    """
+
+    def __init__(self, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for chunk in chunks:
+            counts = Counter(tokenize(chunk.text))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings[term].append((chunk.index, tf))
+        n = len(chunks)
+        self._avg_len = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(posts) + 0.5) / (len(posts) + 0.5))
+            for term, posts in self._postings.items()
+        }
+
+    def search(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[Tuple[Chunk, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for idx, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[idx] / (self._avg_len or 1))
+                scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+        # Reward chunks containing the query terms as a contiguous phrase ("governing law")
+        phrase = " ".join(tokenize(query))
+        if " " in phrase:
+            for idx in scores:
+                if phrase in " ".join(tokenize(self.chunks[idx].text)):
+                    scores[idx] *= PHRASE_BOOST
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        return [(self.chunks[idx], score) for idx, score in ranked]
+
+    def select(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[Chunk]:
+        """
+        Top-k chunks for a query, padded with the document's leading chunks
+        (where parties and dates usually live) when too few terms match.
+        """
+        picked = [chunk for chunk, _ in self.search(query, top_k)]
+        seen = {c.index for c in picked}
+        for chunk in self.chunks:
+            if len(picked) >= top_k:
+                break
+            if chunk.index not in seen:
+                picked.append(chunk)
+                seen.add(chunk.index)
+        return picked
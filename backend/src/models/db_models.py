@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, JSON, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, JSON, DateTime, Boolean, Index
+from sqlalchemy.orm import deferred, relationship
 from ..storage.db import Base
 from datetime import datetime
 import uuid
@@ -7,6 +7,12 @@ import uuid
 def generate_uuid():
     return str(uuid.uuid4())
 
+# Stable question ids: the same question text maps to the same id across runs
+QUESTION_NAMESPACE = uuid.UUID("6f1c3a52-8d0e-4b7a-9a43-2f5d1e7c9b10")
+
+def question_id_for(question_text: str) -> str:
+    return str(uuid.uuid5(QUESTION_NAMESPACE, question_text))
+
 class ProjectModel(Base):
     __tablename__ = "projects"
 
@@ -23,10 +29,16 @@ class DocumentModel(Base):
     __tablename__ = "documents"
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    project_id = Column(String, ForeignKey("projects.id"))
+    project_id = Column(String, ForeignKey("projects.id"), index=True)
     filename = Column(String)
-    content = Column(Text, nullable=True)
+    # Parsed text, filled at ingest and indexed by documents_fts; deferred so
+    # project and document queries do not load it
+    content = deferred(Column(Text, nullable=True))
+    # SHA-256 of the file the current answers were extracted from
+    content_hash = Column(String, nullable=True)
     status = Column(String, default="pending")
+    # Key of the row's documents_fts entry, set by the search triggers (see storage.db)
+    search_rowid = Column(Integer, nullable=True, unique=True, index=True)
 
     project = relationship("ProjectModel", back_populates="documents")
 
@@ -35,6 +47,7 @@ class AnswerModel(Base):
 
     id = Column(String, primary_key=True, default=generate_uuid)
     project_id = Column(String, ForeignKey("projects.id"))
+    document_id = Column(String, ForeignKey("documents.id"), nullable=True)
     question_id = Column(String)
     question_text = Column(String)
     value = Column(String, nullable=True)
@@ -42,5 +55,36 @@ class AnswerModel(Base):
     citations = Column(JSON, default=list)
     normalization_output = Column(JSON, nullable=True)
     status = Column(String, default="pending")
+    # Key of the row's answers_fts entry, set by the search triggers (see storage.db)
+    search_rowid = Column(Integer, nullable=True, unique=True, index=True)
 
     project = relationship("ProjectModel", back_populates="answers")
+
+    __table_args__ = (
+        # One answer per cell; also the conflict target for bulk upserts and
+        # the index behind per-project / per-document answer paging
+        Index("ux_answers_cell", "project_id", "document_id", "question_id", unique=True),
+        Index("ix_answers_project_question", "project_id", "question_id"),
+    )
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    project_id = Column(String, ForeignKey("projects.id"), index=True)
+    kind = Column(String, default="generate_answers")
+    status = Column(String, default="pending")
+    questions = Column(JSON, default=list)
+    force = Column(Boolean, default=False)
+    total_documents = Column(Integer, default=0)
+    completed_documents = Column(Integer, default=0)
+    failed_documents = Column(Integer, default=0)
+    total_answers = Column(Integer, default=0)
+    completed_answers = Column(Integer, default=0)
+    cancel_requested = Column(Boolean, default=False)
+    error = Column(Text, nullable=True)
+    # Process that queued the job (workers.job_queue.INSTANCE_ID) and its last sign of life
+    owner = Column(String, nullable=True, index=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
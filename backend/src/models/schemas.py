@@ -9,11 +9,13 @@ class ProcessStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class Document(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     filename: str
     content: Optional[str] = None
+    content_hash: Optional[str] = None
     status: str = "pending"  # Changed from Enum to string matching DB
 
     model_config = {"from_attributes": True}
@@ -22,10 +24,25 @@ class Citation(BaseModel):
     source_document_id: str
     text_snippet: str
     page_number: Optional[int] = None
+    # Span of the snippet in the parsed document text, when it could be located
+    start: Optional[int] = None
+    end: Optional[int] = None
     model_config = {"from_attributes": True}
 
+class DocumentSpan(BaseModel):
+    document_id: str
+    filename: str
+    page_number: Optional[int] = None
+    start: int
+    end: int
+    text: str
+    # Surrounding text for display
+    before: str = ""
+    after: str = ""
+
 class Answer(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    document_id: Optional[str] = None
     question_id: str
     question_text: str
     value: Optional[str] = None
@@ -47,16 +64,95 @@ class Project(BaseModel):
 
     model_config = {"from_attributes": True}
 
+class DocumentSummary(BaseModel):
+    id: str
+    filename: str
+    status: str = "pending"
+    content_hash: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+class ProjectSummary(BaseModel):
+    id: str
+    name: str
+    description: Optional[str] = None
+    created_at: datetime
+    status: str = "pending"
+    document_count: int = 0
+    answer_count: int = 0
+
+class ProjectInfo(ProjectSummary):
+    documents: List[DocumentSummary] = []
+
+class ProjectPage(BaseModel):
+    items: List[ProjectSummary]
+    total: int
+    offset: int
+    limit: int
+
+class AnswerPage(BaseModel):
+    items: List[Answer]
+    total: int
+    offset: int
+    limit: int
+
+class SearchHit(BaseModel):
+    kind: str  # "document" or "answer"
+    project_id: str
+    project_name: Optional[str] = None
+    document_id: Optional[str] = None
+    filename: Optional[str] = None
+    question_text: Optional[str] = None
+    # Matching excerpt with hits wrapped in [ ]
+    snippet: Optional[str] = None
+    score: float = 0.0
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    total: int
+    offset: int
+    limit: int
+
 class ProjectCreateRequest(BaseModel):
     name: str
     description: Optional[str] = None
     filenames: List[str] # Simulating file upload by just passing names for now
 
+class UploadedFile(BaseModel):
+    # Name under the data directory; an existing file's name when the upload was a duplicate
+    filename: str
+    content_hash: str
+    size: int
+    duplicate: bool = False
+    # "queued", "parsed" (already in the parse cache) or "failed"
+    parse_status: str
+
+class UploadResponse(BaseModel):
+    files: List[UploadedFile]
+    project_id: Optional[str] = None
+    # Documents added to the project, when one was given
+    documents: List[DocumentSummary] = []
+
+class GoldLabel(BaseModel):
+    # Human-labeled reference value for one (document, question) cell; empty means the field is absent
+    filename: str
+    question: str
+    value: Optional[str] = None
+
 class Answerrequest(BaseModel):
     question_text: str
 
+class JobProgress(BaseModel):
+    total_documents: int = 0
+    completed_documents: int = 0
+    failed_documents: int = 0
+    total_answers: int = 0
+    completed_answers: int = 0
+
 class RequestStatus(BaseModel):
     request_id: str
     status: ProcessStatus
+    project_id: Optional[str] = None
+    progress: Optional[JobProgress] = None
     result: Optional[Any] = None
     error: Optional[str] = None
@@ -0,0 +1,250 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the stage and request latency histograms; +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# (metric name, type, help, [(labels, value)]) produced at scrape time
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(dict(zip(self.label_names, k)))} {_format_value(v)}"
+                for k, v in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, (list(counts), total)) for k, (counts, total) in self._series.items())
+        out = []
+        for key, (counts, total) in series:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                out.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(float(bound))})} "
+                           f"{cumulative}")
+            out.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            out.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return out
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text format.
+
+    Counters, gauges and histograms are updated on the hot path under a
+    per-metric lock. Values that other components already track (cache
+    hit counts, queue depths) are read at scrape time by collectors instead
+    of being mirrored on every update.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def collect(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+            collectors = list(self._collectors)
+        out: List[str] = []
+        for metric in metrics:
+            out.extend(metric.header())
+            out.extend(metric.lines())
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                # One broken source should not take the whole scrape down
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, help_text, values in samples:
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} {kind}")
+                out.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in values)
+        return "\n".join(out) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "legal_review_stage_seconds",
+    "Time spent per pipeline stage (parse, parse_cache_read, parse_pool, retrieval, extract, llm_call, db_commit)",
+    ("stage",),
+)
+
+
+def stage_timer(stage: str):
+    """Context manager observing the block's duration under `stage` in stage_seconds."""
+    return stage_seconds.time(stage=stage)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage=stage)
+
+
+http_request_seconds = metrics.histogram(
+    "legal_review_http_request_seconds",
+    "HTTP request duration until the response body is sent, by route template",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = metrics.gauge(
+    "legal_review_http_requests_in_flight", "HTTP requests currently being served"
+)
+
+
+def _route_template(scope: dict) -> str:
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return "unmatched"
+    # Routes of a router included with a prefix report paths relative to it; put the prefix back
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope.get("path", "")
+    return path[:len(path) - len(concrete)] + template if path.endswith(concrete) else template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request. Requests are labelled with
+    the matched route's template (e.g. /api/get-project-info/{project_id})
+    rather than the raw path, so label values stay bounded; streamed
+    responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_seconds.observe(time.perf_counter() - started, method=scope["method"],
+                                         route=_route_template(scope), status=str(status["code"]))
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from typing import Iterator
+import cProfile
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: when set, each extraction job writes a cProfile dump here as <job_id>.prof
+JOB_PROFILE_DIR = os.getenv("JOB_PROFILE_DIR", "")
+
+
+@contextmanager
+def profiled(name: str) -> Iterator[None]:
+    """
+    Profile the block with cProfile and dump it to JOB_PROFILE_DIR/<name>.prof
+    (read with `python -m pstats` or snakeviz); a no-op unless JOB_PROFILE_DIR
+    is set. cProfile follows the calling thread only: parsing and model calls
+    run in pools and show up as waits, with their own time in
+    legal_review_stage_seconds.
+    """
+    if not JOB_PROFILE_DIR:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            os.makedirs(JOB_PROFILE_DIR, exist_ok=True)
+            path = os.path.join(JOB_PROFILE_DIR, f"{name}.prof")
+            profiler.dump_stats(path)
+            logger.info(f"Wrote profile {path}")
+        except OSError as e:
+            logger.warning(f"Could not write profile for {name}: {e}")
@@ -0,0 +1,363 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import csv
+import os
+import string
+import logging
+import numpy as np
+from sqlalchemy import select
+from ..models.db_models import AnswerModel, DocumentModel
+from ..storage.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Bigram (Dice) similarity at or above this counts as a fuzzy match
+EVAL_FUZZY_THRESHOLD = float(os.getenv("EVAL_FUZZY_THRESHOLD", "0.85"))
+# Only this many leading characters of each value feed the fuzzy profile
+EVAL_FUZZY_MAX_CHARS = int(os.getenv("EVAL_FUZZY_MAX_CHARS", "256"))
+# Worst mismatches listed in the report's notes
+EVAL_NOTE_LIMIT = int(os.getenv("EVAL_NOTE_LIMIT", "25"))
+
+# Fixed-width unicode arrays; numpy's variable-width StringDType is still unreliable for sorting
+_STRING = np.str_
+_FUZZY_BUCKETS = 512
+# Rows per fuzzy block; bounds the (rows x chars) code matrix
+_FUZZY_BLOCK_ROWS = 8192
+_KEY_SEPARATOR = "\x1f"
+
+# Rows and (rows x chars) cells per recode block; rows are grouped by length so
+# one long value only widens its own block
+_RECODE_BLOCK_ROWS = 16384
+_RECODE_BLOCK_CELLS = 1 << 22
+
+
+def _ascii_table(mapping: Dict[str, str]) -> np.ndarray:
+    """Code point lookup for ASCII: identity except `mapping`; an empty replacement drops the character."""
+    table = np.arange(128, dtype=np.int64)
+    for ch, replacement in mapping.items():
+        table[ord(ch)] = ord(replacement) if replacement else 0
+    return table
+
+
+# Normalized form drops case, punctuation (including typographic quotes and dashes) and whitespace
+_NORMALIZE_TABLE = _ascii_table({ch: "" for ch in string.punctuation + string.whitespace})
+_NORMALIZE_DROP = [ord(ch) for ch in "“”‘’–—\xa0"]
+# Shape maps digits to 9 and letters to a, so "October 1, 2014" -> "a 9, 9" after run collapsing
+_SHAPE_TABLE = _ascii_table({**{d: "9" for d in string.digits}, **{c: "a" for c in string.ascii_lowercase}})
+_SHAPE_RUNS = [ord("a"), ord("9")]
+# Normalized values that mean "no answer"
+_MISSING_VALUES = np.array(
+    ["", "none", "na", "nan", "null", "unknown", "notfound", "notspecified", "notapplicable"], dtype=_STRING
+)
+_FIXED_COLUMNS = {"document_id", "filename", "status"}
+
+
+@dataclass
+class LabelColumns:
+    """Column arrays for a set of (document, question, value) cells."""
+    filename: np.ndarray
+    question: np.ndarray
+    value: np.ndarray
+    confidence: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.filename)
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "LabelColumns":
+        """rows: (filename, question, value) or (filename, question, value, confidence) tuples."""
+        if not rows:
+            empty = np.array([], dtype=_STRING)
+            return cls(empty, empty, empty)
+        columns = list(zip(*rows))
+        return cls(
+            filename=np.array(columns[0], dtype=_STRING),
+            question=np.array(columns[1], dtype=_STRING),
+            # NULL values become empty strings, i.e. missing
+            value=np.array(["" if v is None else str(v) for v in columns[2]], dtype=_STRING),
+            confidence=np.array(columns[3], dtype=np.float64) if len(columns) > 3 else None,
+        )
+
+
+def _recode(values: np.ndarray, table: np.ndarray, drop: List[int] = (), collapse: List[int] = ()) -> np.ndarray:
+    """
+    Map every character through an ASCII lookup table on the arrays' code
+    points: zero drops a character, `drop` lists non-ASCII ones to drop, and
+    runs of a character in `collapse` shrink to one. Remaining characters are
+    packed left with a cumulative-sum scatter. Rows are processed shortest
+    first in blocks only as wide as their longest row.
+    """
+    n = len(values)
+    lengths = np.strings.str_len(values)
+    out = np.empty(n, dtype=f"<U{max(1, int(lengths.max())) if n else 1}")
+    order = np.argsort(lengths, kind="stable")
+    start = 0
+    while start < n:
+        end = min(n, start + _RECODE_BLOCK_ROWS)
+        width = max(1, int(lengths[order[end - 1]]))
+        if (end - start) * width > _RECODE_BLOCK_CELLS:
+            end = start + max(1, _RECODE_BLOCK_CELLS // width)
+            width = max(1, int(lengths[order[end - 1]]))
+        rows_in_block = order[start:end]
+        block = values[rows_in_block].astype(f"<U{width}")
+        codes = block.view(np.uint32).reshape(len(block), width).astype(np.int64)
+        ascii_chars = codes < 128
+        codes = np.where(ascii_chars, table[np.where(ascii_chars, codes, 0)], codes)
+        if drop:
+            codes[np.isin(codes, drop)] = 0
+        keep = codes != 0
+        if collapse:
+            keep[:, 1:] &= ~((codes[:, 1:] == codes[:, :-1]) & np.isin(codes[:, 1:], collapse))
+        packed = np.zeros_like(codes)
+        rows, _ = np.nonzero(keep)
+        packed[rows, (np.cumsum(keep, axis=1) - 1)[keep]] = codes[keep]
+        out[rows_in_block] = packed.astype(np.uint32).view(f"<U{width}").reshape(-1)
+        start = end
+    return out
+
+
+def normalize(values: np.ndarray) -> np.ndarray:
+    return _recode(np.strings.lower(values), _NORMALIZE_TABLE, drop=_NORMALIZE_DROP)
+
+
+def is_missing(normalized: np.ndarray) -> np.ndarray:
+    # Model answers like "Not found in the document" count as missing too
+    return np.isin(normalized, _MISSING_VALUES) | (np.strings.find(normalized, "notfound") >= 0)
+
+
+def value_shape(values: np.ndarray) -> np.ndarray:
+    return _recode(np.strings.lower(np.strings.strip(values)), _SHAPE_TABLE, collapse=_SHAPE_RUNS)
+
+
+def _bigram_profiles(values: np.ndarray, width: int) -> np.ndarray:
+    """(rows x buckets) hashed character-bigram counts of the leading `width` characters."""
+    codes = values.astype(f"<U{width}").view(np.uint32).reshape(len(values), width).astype(np.int64)
+    left, right = codes[:, :-1], codes[:, 1:]
+    # Zero code points are padding past the end of shorter strings
+    valid = (left != 0) & (right != 0)
+    buckets = (left * 1000003 + right) % _FUZZY_BUCKETS
+    rows = np.broadcast_to(np.arange(len(values))[:, None], buckets.shape)
+    flat = (rows * _FUZZY_BUCKETS + buckets)[valid]
+    return np.bincount(flat, minlength=len(values) * _FUZZY_BUCKETS).reshape(len(values), _FUZZY_BUCKETS)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Dice coefficient over character bigrams of pairs of normalized strings,
+    computed in blocks of rows with hashed bigram count vectors.
+    """
+    scores = np.zeros(len(a), dtype=np.float64)
+    if not len(a):
+        return scores
+    lengths = np.maximum(np.strings.str_len(a), np.strings.str_len(b))
+    width = int(min(EVAL_FUZZY_MAX_CHARS, max(2, lengths.max())))
+    for start in range(0, len(a), _FUZZY_BLOCK_ROWS):
+        end = min(len(a), start + _FUZZY_BLOCK_ROWS)
+        pa = _bigram_profiles(a[start:end], width)
+        pb = _bigram_profiles(b[start:end], width)
+        total = pa.sum(axis=1) + pb.sum(axis=1)
+        shared = np.minimum(pa, pb).sum(axis=1)
+        scores[start:end] = np.divide(2.0 * shared, total, out=np.zeros(end - start), where=total > 0)
+    # Strings too short for a bigram only match exactly
+    short = lengths < 2
+    scores[short] = (a[short] == b[short]).astype(np.float64)
+    return scores
+
+
+def _cell_keys(filename: np.ndarray, question: np.ndarray) -> np.ndarray:
+    questions = np.strings.lower(np.strings.strip(question))
+    return np.strings.add(np.strings.add(np.strings.strip(filename), _KEY_SEPARATOR), questions)
+
+
+def _rate(hits: np.ndarray, base: np.ndarray) -> float:
+    total = int(base.sum())
+    return round(float((hits & base).sum()) / total, 4) if total else None
+
+
+def _group_rates(index: np.ndarray, groups: int, hits: np.ndarray, base: np.ndarray) -> np.ndarray:
+    totals = np.bincount(index, weights=base, minlength=groups)
+    counts = np.bincount(index, weights=hits & base, minlength=groups)
+    return np.divide(counts, totals, out=np.full(groups, np.nan), where=totals > 0)
+
+
+class EvaluationService:
+    """
+    Scores extracted answers against human-labeled reference values.
+
+    Gold and predicted cells are held as column arrays and aligned on
+    (filename, question) with a sorted search; every metric is an array
+    expression over all cells, and per-field / per-document figures are
+    bincount aggregations, so the cost is a handful of vectorized passes
+    regardless of how many documents are evaluated.
+
+    Metrics, over cells with a gold label:
+      coverage               gold has a value and an answer was produced
+      exact_accuracy         answer equals the gold text (trimmed)
+      normalized_accuracy    equal after dropping case, punctuation and whitespace
+      fuzzy_accuracy         normalized match, bigram similarity >= EVAL_FUZZY_THRESHOLD,
+                             or the gold value contained in the answer
+      normalization_validity answers in the same format as the gold value
+                             (digit/letter shape), for gold values containing digits
+    A gold cell left empty means the field is absent; it counts as correct
+    when the answer is empty or a "not found" placeholder.
+    """
+
+    @staticmethod
+    def load_gold_csv(path: str) -> LabelColumns:
+        """
+        Reference labels from CSV, either long (filename, question, value
+        columns) or wide: the /export-project grid with one column per
+        question, so an exported table can be corrected and used as gold.
+        """
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f))
+        if not rows:
+            return LabelColumns.from_rows([])
+        header = [h.strip() for h in rows[0]]
+        # Pad or trim ragged rows so the body is a rectangular array
+        width = len(header)
+        cells = [(r + [""] * width)[:width] for r in rows[1:] if r]
+        body = np.array(cells, dtype=_STRING).reshape(len(cells), width)
+        lowered = [h.lower() for h in header]
+        if {"filename", "question", "value"} <= set(lowered):
+            return LabelColumns(
+                filename=body[:, lowered.index("filename")],
+                question=body[:, lowered.index("question")],
+                value=body[:, lowered.index("value")],
+            )
+
+        questions = [
+            i for i, h in enumerate(lowered)
+            if h not in _FIXED_COLUMNS and not h.endswith(" (confidence)")
+        ]
+        filenames = body[:, lowered.index("filename")]
+        return LabelColumns(
+            filename=np.repeat(filenames, len(questions)),
+            question=np.tile(np.array([header[i] for i in questions], dtype=_STRING), len(filenames)),
+            value=body[:, questions].reshape(-1),
+        )
+
+    @staticmethod
+    def load_predictions(project_id: str) -> LabelColumns:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(DocumentModel.filename, AnswerModel.question_text, AnswerModel.value, AnswerModel.confidence)
+                .join(DocumentModel, AnswerModel.document_id == DocumentModel.id)
+                .where(AnswerModel.project_id == project_id)
+            ).all()
+        finally:
+            db.close()
+        return LabelColumns.from_rows([tuple(r) for r in rows])
+
+    @staticmethod
+    def evaluate(gold: LabelColumns, predicted: LabelColumns) -> Dict:
+        """Summary, per-field and per-document metrics, plus the worst mismatches as notes."""
+        # Align: factorize both key sets together, then match integer codes. For every gold
+        # cell this picks the first predicted cell with the same key, if any.
+        pred_keys = _cell_keys(predicted.filename, predicted.question)
+        _, codes = np.unique(np.concatenate([pred_keys, _cell_keys(gold.filename, gold.question)]),
+                             return_inverse=True)
+        pred_codes, gold_codes = codes[:len(predicted)], codes[len(predicted):]
+        first = np.full(int(codes.max()) + 1 if len(codes) else 0, -1, dtype=np.int64)
+        # Reversed assignment leaves the lowest row index for repeated keys
+        first[pred_codes[::-1]] = np.arange(len(predicted))[::-1]
+        source = first[gold_codes]
+        found = source >= 0
+        source = np.maximum(source, 0)
+        empty = np.full(len(gold), "", dtype=_STRING)
+        pred_value = np.where(found, predicted.value[source], empty) if len(predicted) else empty
+        confidence = np.where(found, predicted.confidence[source], np.nan) \
+            if predicted.confidence is not None and len(predicted) else np.full(len(gold), np.nan)
+
+        gold_norm = normalize(gold.value)
+        pred_norm = normalize(pred_value)
+        gold_missing = is_missing(gold_norm)
+        pred_missing = is_missing(pred_norm)
+        present = ~gold_missing
+        answered = present & ~pred_missing
+        absent_ok = gold_missing & pred_missing
+
+        score = np.where(answered, similarity(gold_norm, pred_norm), absent_ok.astype(np.float64))
+        contains = answered & (np.strings.str_len(gold_norm) >= 3) & (np.strings.find(pred_norm, gold_norm) >= 0)
+        exact = (answered & (np.strings.strip(gold.value) == np.strings.strip(pred_value))) | absent_ok
+        normalized = (answered & (gold_norm == pred_norm)) | absent_ok
+        fuzzy = normalized | (answered & ((score >= EVAL_FUZZY_THRESHOLD) | contains))
+        gold_shape = value_shape(gold.value)
+        numeric = answered & (np.strings.find(gold_shape, "9") >= 0)
+        format_ok = numeric & (gold_shape == value_shape(pred_value))
+
+        every = np.ones(len(gold), dtype=bool)
+        has_conf = ~np.isnan(confidence) & answered
+        summary = {
+            "cells": int(len(gold)),
+            "gold_present": int(present.sum()),
+            "matched_cells": int(found.sum()),
+            "coverage": _rate(answered, present),
+            "exact_accuracy": _rate(exact, every),
+            "normalized_accuracy": _rate(normalized, every),
+            "fuzzy_accuracy": _rate(fuzzy, every),
+            "mean_similarity": round(float(score.mean()), 4) if len(gold) else None,
+            "normalization_validity": _rate(format_ok, numeric),
+            "mean_confidence_correct": _mean(confidence, has_conf & fuzzy),
+            "mean_confidence_incorrect": _mean(confidence, has_conf & ~fuzzy),
+            "fuzzy_threshold": EVAL_FUZZY_THRESHOLD,
+        }
+
+        metrics = {
+            "coverage": (answered, present),
+            "exact_accuracy": (exact, every),
+            "normalized_accuracy": (normalized, every),
+            "fuzzy_accuracy": (fuzzy, every),
+            "normalization_validity": (format_ok, numeric),
+        }
+
+        def grouped(labels: np.ndarray, name: str) -> List[Dict]:
+            keys, index = np.unique(labels, return_inverse=True)
+            counts = np.bincount(index, minlength=len(keys))
+            columns = {m: _group_rates(index, len(keys), hits, base) for m, (hits, base) in metrics.items()}
+            similarity_mean = np.bincount(index, weights=score, minlength=len(keys)) / np.maximum(counts, 1)
+            return [
+                {
+                    name: str(key),
+                    "cells": int(counts[i]),
+                    **{m: (None if np.isnan(v[i]) else round(float(v[i]), 4)) for m, v in columns.items()},
+                    "mean_similarity": round(float(similarity_mean[i]), 4),
+                }
+                for i, key in enumerate(keys)
+            ]
+
+        # Notes: lowest-scoring wrong cells, with why they failed
+        wrong = np.flatnonzero(~fuzzy)
+        worst = wrong[np.argsort(score[wrong], kind="stable")][:EVAL_NOTE_LIMIT]
+        reasons = np.where(present[worst] & pred_missing[worst], "missing answer",
+                           np.where(gold_missing[worst], "answer where reference has none", "value mismatch"))
+        notes = [
+            {
+                "filename": str(gold.filename[i]),
+                "question": str(gold.question[i]),
+                "expected": str(gold.value[i]),
+                "predicted": str(pred_value[i]),
+                "similarity": round(float(score[i]), 4),
+                "reason": str(reason),
+            }
+            for i, reason in zip(worst, reasons)
+        ]
+
+        return {
+            "summary": summary,
+            "fields": grouped(np.strings.strip(gold.question), "question"),
+            "documents": grouped(np.strings.strip(gold.filename), "filename"),
+            "notes": notes,
+        }
+
+    @staticmethod
+    def evaluate_project(project_id: str, gold: LabelColumns) -> Dict:
+        """Blocking: score a project's stored answers against gold labels."""
+        predicted = EvaluationService.load_predictions(project_id)
+        logger.info(f"Evaluating {len(predicted)} answers against {len(gold)} reference cells")
+        return EvaluationService.evaluate(gold, predicted)
+
+
+def _mean(values: np.ndarray, mask: np.ndarray) -> Optional[float]:
+    return round(float(values[mask].mean()), 4) if mask.any() else None
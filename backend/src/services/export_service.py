@@ -0,0 +1,188 @@
+from typing import Iterator, List, Optional, Tuple
+import csv
+import io
+import os
+import tempfile
+import logging
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.db_models import AnswerModel, DocumentModel, ProjectModel
+from ..storage.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Documents (grid rows) fetched and written per batch; also the Parquet row group size
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "500"))
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+_FIXED_COLUMNS = ["document_id", "filename", "status"]
+_FILE_READ_BYTES = 1024 * 1024
+
+
+class ExportUnavailableError(RuntimeError):
+    """The optional library a format needs is not installed."""
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file object whose contents are drained by the caller between writes."""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ExportService:
+    """
+    Streams a project's answers as a document x question grid.
+
+    The pivot happens in SQL: one row per document with a MAX(CASE ...)
+    column per question, read with a streaming cursor in batches of
+    EXPORT_BATCH_ROWS. Each batch is encoded and handed to the response
+    before the next one is fetched, so memory use does not grow with the
+    number of documents.
+    """
+
+    @staticmethod
+    def _questions(db, project_id: str) -> List[Tuple[str, str]]:
+        """(question_id, question_text) pairs answered in the project, ordered by text."""
+        return db.execute(
+            select(AnswerModel.question_id, func.min(AnswerModel.question_text).label("question_text"))
+            .where(AnswerModel.project_id == project_id)
+            .group_by(AnswerModel.question_id)
+            .order_by("question_text")
+        ).all()
+
+    @staticmethod
+    def _grid_query(project_id: str, questions: List[Tuple[str, str]], confidence: bool):
+        columns = [DocumentModel.id, DocumentModel.filename, DocumentModel.status]
+        for i, (question_id, _) in enumerate(questions):
+            columns.append(func.max(case(
+                (AnswerModel.question_id == question_id, AnswerModel.value)
+            )).label(f"v{i}"))
+            if confidence:
+                columns.append(func.max(case(
+                    (AnswerModel.question_id == question_id, AnswerModel.confidence)
+                )).label(f"c{i}"))
+        return (
+            select(*columns)
+            .select_from(DocumentModel)
+            .outerjoin(AnswerModel, AnswerModel.document_id == DocumentModel.id)
+            .where(DocumentModel.project_id == project_id)
+            .group_by(DocumentModel.id, DocumentModel.filename, DocumentModel.status)
+            .order_by(DocumentModel.filename, DocumentModel.id)
+        )
+
+    @staticmethod
+    def _columns(questions: List[Tuple[str, str]], confidence: bool) -> List[Tuple[str, bool]]:
+        """(header, is_numeric) per grid column."""
+        columns = [(name, False) for name in _FIXED_COLUMNS]
+        for _, text in questions:
+            columns.append((text, False))
+            if confidence:
+                columns.append((f"{text} (confidence)", True))
+        return columns
+
+    @staticmethod
+    async def project_name(db: AsyncSession, project_id: str) -> Optional[str]:
+        return (await db.execute(select(ProjectModel.name).where(ProjectModel.id == project_id))).scalar()
+
+    @staticmethod
+    def check_format(fmt: str) -> None:
+        """Raise ExportUnavailableError before streaming starts if the format's library is missing."""
+        try:
+            if fmt == "parquet":
+                import pyarrow.parquet  # noqa: F401
+            elif fmt == "xlsx":
+                import openpyxl  # noqa: F401
+        except ImportError as e:
+            raise ExportUnavailableError(f"{fmt} export needs the {e.name} package") from e
+
+    @staticmethod
+    def stream(project_id: str, fmt: str, confidence: bool = False) -> Iterator[bytes]:
+        """Encoded export in pieces, for a StreamingResponse."""
+        writer = {"csv": ExportService._csv, "xlsx": ExportService._xlsx, "parquet": ExportService._parquet}[fmt]
+        db = SessionLocal()
+        try:
+            questions = ExportService._questions(db, project_id)
+            result = db.execute(
+                ExportService._grid_query(project_id, questions, confidence),
+                execution_options={"stream_results": True, "yield_per": EXPORT_BATCH_ROWS},
+            )
+            batches = ([tuple(row) for row in partition] for partition in result.partitions())
+            yield from writer(ExportService._columns(questions, confidence), batches)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _csv(columns: List[Tuple[str, bool]], batches: Iterator[list]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        out = csv.writer(buffer)
+        # BOM so spreadsheet apps pick UTF-8 when opening the file directly
+        buffer.write("\ufeff")
+        out.writerow([name for name, _ in columns])
+        for rows in batches:
+            out.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _parquet(columns: List[Tuple[str, bool]], batches: Iterator[list]) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, pa.float64() if numeric else pa.string()) for name, numeric in columns])
+        sink = _ByteSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for rows in batches:
+                # One row group per batch
+                values = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(col, type=field.type) for col, field in zip(values, schema)], schema=schema
+                ))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def _xlsx(columns: List[Tuple[str, bool]], batches: Iterator[list]) -> Iterator[bytes]:
+        from openpyxl import Workbook
+
+        # Write-only workbooks stream rows into temporary XML parts; the zip is
+        # only assembled on save, so the file is built on disk and then streamed
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Review")
+        sheet.append([name for name, _ in columns])
+        for rows in batches:
+            for row in rows:
+                sheet.append(row)
+        with tempfile.TemporaryFile() as f:
+            workbook.save(f)
+            f.seek(0)
+            for block in iter(lambda: f.read(_FILE_READ_BYTES), b""):
+                yield block
@@ -0,0 +1,168 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import multiprocessing
+import os
+import threading
+import time
+import logging
+from ..indexing.parser import DocumentParser, ParsedDocument
+from ..indexing.parse_cache import parse_cache
+from ..indexing.citations import CitationLocator
+from ..monitoring.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# PDF parsing is CPU-bound, so it gets its own process pool
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 2)))
+# Documents per run waiting on extraction at once. Model calls themselves are
+# capped process-wide by llm_batcher.LLM_MAX_CONCURRENCY, so this mostly sets
+# how many documents' questions can share a batch.
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "8"))
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+# Parses in flight by content hash, so an upload's ingest parse and an
+# extraction run never parse the same file twice
+_inflight: Dict[str, Future] = {}
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn rather than fork: the server process already runs threads
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+def shutdown_parse_pool() -> None:
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def submit_parse(file_path: str, content_hash: Optional[str] = None) -> Future:
+    """
+    Parse a file in the process pool and store the result in the parse cache.
+    Returns the in-flight future when the same content is already being parsed.
+    """
+    content_hash = content_hash or parse_cache.content_hash(file_path)
+    with _parse_pool_lock:
+        fut = _inflight.get(content_hash)
+        if fut is not None:
+            return fut
+    try:
+        fut = _get_parse_pool().submit(DocumentParser.parse_uncached, file_path)
+    except Exception as e:
+        # A crashed worker breaks the whole pool; rebuild it once before giving up
+        logger.warning(f"Parse pool unavailable ({e}), recreating")
+        shutdown_parse_pool()
+        fut = _get_parse_pool().submit(DocumentParser.parse_uncached, file_path)
+    with _parse_pool_lock:
+        # Another thread may have submitted the same content meanwhile; either result is fine
+        _inflight.setdefault(content_hash, fut)
+    submitted = time.perf_counter()
+    fut.add_done_callback(lambda f: _parse_done(content_hash, submitted, f))
+    return fut
+
+def _parse_done(content_hash: str, submitted: float, fut: Future) -> None:
+    with _parse_pool_lock:
+        if _inflight.get(content_hash) is fut:
+            del _inflight[content_hash]
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    # Queue wait plus parse in the worker process
+    observe_stage("parse_pool", time.perf_counter() - submitted)
+    DocumentParser.store_cached(fut.result())
+
+def parse_queue_depth() -> int:
+    with _parse_pool_lock:
+        return len(_inflight)
+
+
+@dataclass
+class DocumentResult:
+    key: Any
+    parsed: Optional[ParsedDocument] = None
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class ExtractionPipeline:
+    """
+    Runs parse -> LLM extraction for many documents concurrently.
+
+    Cache misses are parsed in a shared process pool; each parsed document is
+    handed straight to a bounded thread pool for the LLM call, so parsing and
+    extraction overlap. Results are yielded in completion order on the
+    caller's thread, which keeps DB sessions single-threaded.
+    """
+
+    def __init__(self, llm, extract_workers: int = EXTRACT_WORKERS):
+        self.llm = llm
+        self.extract_workers = max(1, extract_workers)
+
+    def _extract(self, parsed: ParsedDocument, questions: List[str]) -> List[Dict[str, Any]]:
+        results = self.llm.extract_answers(parsed.text, questions, chunks=parsed.get_chunks())
+        # Resolve citations here, in the extraction thread, so the writer only stores spans
+        locator = CitationLocator(parsed)
+        return [dict(r, citation_span=locator.locate(r.get("citation"))) for r in results]
+
+    def run(self, items: List[Tuple[Any, str, List[str]]]) -> Iterator[DocumentResult]:
+        """
+        items: (key, file_path, questions) triples; key is passed back untouched
+        on each result. Questions are per document so callers can ask each
+        document only what it is missing.
+        """
+        with ThreadPoolExecutor(max_workers=self.extract_workers) as llm_pool:
+            # Documents with identical content share one in-flight parse future
+            parse_futures: Dict[Future, List[Tuple[Any, str, List[str]]]] = {}
+            llm_futures: Dict[Future, Tuple[Any, ParsedDocument]] = {}
+
+            for key, file_path, questions in items:
+                try:
+                    cached = DocumentParser.get_cached(file_path)
+                except Exception as e:
+                    yield DocumentResult(key=key, error=str(e))
+                    continue
+                if cached is not None:
+                    llm_futures[llm_pool.submit(self._extract, cached, questions)] = (key, cached)
+                else:
+                    parse_futures.setdefault(submit_parse(file_path), []).append((key, file_path, questions))
+
+            pending = set(parse_futures) | set(llm_futures)
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        if fut in parse_futures:
+                            waiting = parse_futures.pop(fut)
+                            try:
+                                parsed = fut.result()
+                            except Exception as e:
+                                for key, file_path, _ in waiting:
+                                    logger.error(f"Failed to parse {file_path}: {e}")
+                                    yield DocumentResult(key=key, error=str(e))
+                                continue
+                            for key, _, questions in waiting:
+                                llm_fut = llm_pool.submit(self._extract, parsed, questions)
+                                llm_futures[llm_fut] = (key, parsed)
+                                pending.add(llm_fut)
+                        else:
+                            key, parsed = llm_futures.pop(fut)
+                            try:
+                                result = DocumentResult(key=key, parsed=parsed, results=fut.result())
+                            except Exception as e:
+                                logger.error(f"LLM extraction failed: {e}")
+                                result = DocumentResult(key=key, parsed=parsed, error=str(e))
+                            yield result
+            finally:
+                # Stopping early (e.g. a cancelled job) should not run the queued model
+                # calls; parses are left to finish since they fill the shared parse cache
+                for fut in pending:
+                    if fut in llm_futures:
+                        fut.cancel()
@@ -0,0 +1,126 @@
+from typing import BinaryIO, Dict, Optional, Tuple
+import hashlib
+import os
+import threading
+import uuid
+import logging
+from ..indexing.parse_cache import parse_cache
+from ..indexing.parser import DocumentParser
+from .extraction_pipeline import submit_parse
+from .project_service import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Uploads are copied to disk in pieces of this size, so memory use does not grow with the file
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Largest accepted upload; bigger files are rejected part-way through the copy
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+
+SUPPORTED_EXTENSIONS = {".pdf", ".html", ".htm", ".txt"}
+
+# Partial uploads live here until they are hashed and moved into DATA_DIR
+_UPLOAD_TMP_DIR = os.path.join(DATA_DIR, ".uploads")
+# Serializes the dedupe check and the final rename
+_commit_lock = threading.Lock()
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class IngestService:
+    """
+    Stores uploaded documents in DATA_DIR and queues their parsing.
+
+    Files are streamed to a temporary file while being hashed, then
+    deduplicated by content: an upload identical to a file already in
+    DATA_DIR reuses that file. New content is parsed and chunked in the
+    background parse pool right away, so a later extraction run finds it in
+    the parse cache.
+    """
+
+    @staticmethod
+    def safe_filename(filename: Optional[str]) -> Optional[str]:
+        """Bare file name with a supported extension, or None."""
+        name = os.path.basename((filename or "").replace("\\", "/")).strip()
+        if not name or name.startswith("."):
+            return None
+        if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+            return None
+        return name
+
+    @staticmethod
+    def store_upload(source: BinaryIO, filename: str) -> Dict:
+        """
+        Blocking: copy `source` into DATA_DIR under `filename` (a safe_filename
+        result) and queue it for parsing. Returns the stored file's details.
+        """
+        os.makedirs(_UPLOAD_TMP_DIR, exist_ok=True)
+        tmp_path = os.path.join(_UPLOAD_TMP_DIR, f"{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as out:
+                for block in iter(lambda: source.read(UPLOAD_CHUNK_BYTES), b""):
+                    size += len(block)
+                    if size > UPLOAD_MAX_BYTES:
+                        raise UploadTooLargeError(f"{filename} exceeds {UPLOAD_MAX_BYTES} bytes")
+                    digest.update(block)
+                    out.write(block)
+            content_hash = digest.hexdigest()
+            stored_name, duplicate = IngestService._commit(tmp_path, filename, content_hash)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        status = IngestService._queue_parse(os.path.join(DATA_DIR, stored_name), content_hash)
+        logger.info(f"Stored upload {filename} as {stored_name} ({size} bytes, duplicate={duplicate}, {status})")
+        return {
+            "filename": stored_name,
+            "content_hash": content_hash,
+            "size": size,
+            "duplicate": duplicate,
+            "parse_status": status,
+        }
+
+    @staticmethod
+    def _commit(tmp_path: str, filename: str, content_hash: str) -> Tuple[str, bool]:
+        """Move the upload into DATA_DIR unless identical content is already there."""
+        with _commit_lock:
+            existing = IngestService._find_by_hash(content_hash, prefer=filename)
+            if existing:
+                return existing, True
+            target = filename
+            if os.path.exists(os.path.join(DATA_DIR, target)):
+                # Same name, different content: keep both
+                stem, ext = os.path.splitext(filename)
+                target = f"{stem}-{content_hash[:8]}{ext}"
+            os.replace(tmp_path, os.path.join(DATA_DIR, target))
+            return target, False
+
+    @staticmethod
+    def _find_by_hash(content_hash: str, prefer: str) -> Optional[str]:
+        # parse_cache memoizes hashes per (path, size, mtime), so only new files are read
+        names = sorted(os.listdir(DATA_DIR), key=lambda n: n != prefer)
+        for name in names:
+            path = os.path.join(DATA_DIR, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            try:
+                if parse_cache.content_hash(path) == content_hash:
+                    return name
+            except OSError:
+                continue
+        return None
+
+    @staticmethod
+    def _queue_parse(file_path: str, content_hash: str) -> str:
+        try:
+            if DocumentParser.get_cached(file_path) is not None:
+                return "parsed"
+            submit_parse(file_path, content_hash)
+            return "queued"
+        except Exception as e:
+            # Extraction parses the file itself if this fails
+            logger.warning(f"Could not queue parse for {file_path}: {e}")
+            return "failed"
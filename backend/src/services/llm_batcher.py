@@ -0,0 +1,212 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on in-flight model calls across all requests in this process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# A batch is flushed once adding the next question would exceed either budget...
+LLM_BATCH_MAX_PROMPT_CHARS = int(os.getenv("LLM_BATCH_MAX_PROMPT_CHARS", "60000"))
+LLM_BATCH_MAX_QUESTIONS = int(os.getenv("LLM_BATCH_MAX_QUESTIONS", "40"))
+# ...or when its oldest question has waited this long
+LLM_BATCH_MAX_WAIT_MS = int(os.getenv("LLM_BATCH_MAX_WAIT_MS", "50"))
+
+# Fixed prompt scaffolding counted against the budget
+_PROMPT_OVERHEAD_CHARS = 1200
+
+
+@dataclass
+class BatchItem:
+    """
+    One (document, question) cell waiting for the model. `excerpts` maps the
+    chunk index to its text; `doc_ref` identifies the document so excerpts
+    shared by several questions are only sent once per batch.
+    """
+    doc_ref: str
+    question: str
+    excerpts: Dict[int, str]
+    future: Future = field(default_factory=Future)
+
+    def excerpt_ids(self) -> List[str]:
+        return [f"{self.doc_ref}:E{idx}" for idx in sorted(self.excerpts)]
+
+
+class _Batch:
+    def __init__(self, call: Callable[[str], List[Dict[str, Any]]], deadline: float):
+        self.call = call
+        self.deadline = deadline
+        self.items: List[BatchItem] = []
+        self.excerpts: Dict[str, str] = {}
+        self.chars = _PROMPT_OVERHEAD_CHARS
+
+    def _added_chars(self, item: BatchItem) -> int:
+        new = sum(len(text) for idx, text in item.excerpts.items()
+                  if f"{item.doc_ref}:E{idx}" not in self.excerpts)
+        return new + len(item.question) + 64
+
+    def fits(self, item: BatchItem) -> bool:
+        if len(self.items) >= LLM_BATCH_MAX_QUESTIONS:
+            return False
+        # An oversized question still gets a batch of its own
+        return not self.items or self.chars + self._added_chars(item) <= LLM_BATCH_MAX_PROMPT_CHARS
+
+    def add(self, item: BatchItem) -> None:
+        self.chars += self._added_chars(item)
+        for idx in sorted(item.excerpts):
+            self.excerpts.setdefault(f"{item.doc_ref}:E{idx}", item.excerpts[idx])
+        self.items.append(item)
+
+    @property
+    def full(self) -> bool:
+        return len(self.items) >= LLM_BATCH_MAX_QUESTIONS or self.chars >= LLM_BATCH_MAX_PROMPT_CHARS
+
+    def prompt(self) -> str:
+        questions = [
+            {"id": f"q{i}", "question": item.question, "excerpts": item.excerpt_ids()}
+            for i, item in enumerate(self.items)
+        ]
+        excerpt_block = "\n\n".join(f"[{ex_id}]\n{text}" for ex_id, text in self.excerpts.items())
+        return f"""
+        You are a legal AI assistant. Answer each question below using only the legal document excerpts provided.
+        Excerpt ids have the form DOCUMENT:EXCERPT. Each question lists the excerpts of its own document
+        most likely to contain the answer; never answer from another document's excerpts.
+
+        Questions:
+        {json.dumps(questions, indent=2)}
+
+        Output format: one entry per question id with the extracted value, confidence (0.0-1.0), and a short citation/snippet.
+        You must output valid JSON only. Do not wrap in markdown code blocks.
+
+        JSON format:
+        [
+            {{
+                "id": "question id, copied exactly",
+                "question": "question text",
+                "value": "extracted value or 'Not Found'",
+                "confidence": 0.9,
+                "citation": "exact text snippet from the excerpt"
+            }},
+            ...
+        ]
+
+        Document Excerpts:
+        {excerpt_block}
+        """
+
+
+class LLMBatcher:
+    """
+    Groups pending (document, question) work from concurrent requests into
+    shared prompts.
+
+    Items are collected per model on a scheduler thread and flushed when the
+    prompt budget or question cap is reached, or LLM_BATCH_MAX_WAIT_MS after
+    the first item arrived. Flushed batches run on a pool of
+    LLM_MAX_CONCURRENCY threads, and each answer is routed back to the future
+    of the item it belongs to by its question id.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.batches = 0
+        self.items = 0
+        self.in_flight = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-batch")
+                self._thread = threading.Thread(target=self._loop, name="llm-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, model: str, call: Callable[[str], List[Dict[str, Any]]],
+               items: List[BatchItem]) -> List[Future]:
+        """
+        Queue items for `model`. `call` sends a prompt and returns the parsed
+        JSON list; any caller's call may be used for a mixed batch, so it must
+        not depend on the caller.
+        """
+        self._ensure_started()
+        for item in items:
+            self._queue.put((model, call, item))
+        return [item.future for item in items]
+
+    def _loop(self) -> None:
+        pending: Dict[str, _Batch] = {}
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(b.deadline for b in pending.values()) - time.monotonic())
+            try:
+                model, call, item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                batch = pending.get(model)
+                if batch is not None and not batch.fits(item):
+                    self._dispatch(pending.pop(model))
+                    batch = None
+                if batch is None:
+                    batch = pending[model] = _Batch(call, time.monotonic() + LLM_BATCH_MAX_WAIT_MS / 1000)
+                batch.add(item)
+                if batch.full:
+                    self._dispatch(pending.pop(model))
+
+            now = time.monotonic()
+            for model in [m for m, b in pending.items() if b.deadline <= now]:
+                self._dispatch(pending.pop(model))
+
+    def _dispatch(self, batch: _Batch) -> None:
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch.items)
+            self.in_flight += 1
+        logger.info(f"Dispatching LLM batch: {len(batch.items)} questions, "
+                    f"{len(batch.excerpts)} excerpts, ~{batch.chars} chars")
+        self._pool.submit(self._execute, batch)
+
+    def _execute(self, batch: _Batch) -> None:
+        # Every item's future is resolved on every path; callers block on them
+        try:
+            data = batch.call(batch.prompt())
+            if not isinstance(data, list):
+                raise ValueError(f"LLM batch response is a {type(data).__name__}, not a list of answers")
+            by_id = {r["id"]: r for r in data if isinstance(r, dict) and isinstance(r.get("id"), str)}
+            for i, item in enumerate(batch.items):
+                result = by_id.get(f"q{i}")
+                if result is not None:
+                    result = {k: v for k, v in result.items() if k != "id"}
+                    result["question"] = item.question
+                item.future.set_result(result)
+        except Exception as e:
+            for item in batch.items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "questions": self.items,
+                "avg_questions_per_batch": (self.items / self.batches) if self.batches else 0.0,
+                "queued_questions": self._queue.qsize(),
+                "in_flight_batches": self.in_flight,
+            }
+
+
+llm_batcher = LLMBatcher()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.cache/llm_cache.sqlite"))
+)
+# Eviction bounds: entries older than the TTL are dropped, then least recently used beyond the cap
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Run eviction every N writes rather than on each one
+_EVICT_EVERY = 200
+
+
+def cache_key(doc_hash: str, question: str, model: str, prompt_version: str) -> str:
+    raw = json.dumps([doc_hash, question, model, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent per-question cache of LLM answers, stored in a small SQLite file.
+
+    Each entry also records the model latency attributed to that question, so
+    hits can report how much time they saved.
+    """
+
+    def __init__(self, path: str, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: int = LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, latency REAL NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, latency, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[2] > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any], latency: float) -> None:
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, latency, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value), latency, now, now),
+                )
+                conn.commit()
+                self._writes += 1
+                if self._writes % _EVICT_EVERY == 0:
+                    self._evict(conn, now)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+llm_cache = LLMResponseCache(LLM_CACHE_PATH)
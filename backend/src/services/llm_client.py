@@ -0,0 +1,273 @@
+from collections import deque
+from typing import Callable, Deque, Optional
+import os
+import random
+import threading
+import time
+import logging
+from ..monitoring.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# Provider quota; calls block in the client rather than being sent and rejected
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+# How much unused quota may accumulate for a burst, in seconds of refill
+LLM_RATE_BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", "1"))
+# Retry policy for throttled / transient failures
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "1.0"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "30.0"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "120"))
+# Consecutive failed calls (after retries) that open the circuit, and how long it stays open
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+LLM_CIRCUIT_RESET_S = float(os.getenv("LLM_CIRCUIT_RESET_S", "60"))
+
+# Rough prompt-size-to-token ratio used for the token budget
+CHARS_PER_TOKEN = 4
+# Recent calls kept for latency percentiles
+_LATENCY_WINDOW = 1000
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(Exception):
+    """The model could not be reached: retries exhausted or the circuit is open."""
+
+
+class TokenBucket:
+    """
+    Refills continuously at `per_minute` units per minute and holds at most
+    `burst_seconds` worth of refill, so no 60 s window sees much more than the
+    quota (a full minute of burst would allow twice the quota in the first
+    minute). acquire() blocks until the bucket can cover the request; a
+    request larger than the bucket is admitted once it is full and leaves the
+    bucket in debt, which later callers wait out.
+    """
+
+    def __init__(self, per_minute: int, burst_seconds: float = LLM_RATE_BURST_SECONDS):
+        self.rate = max(1, per_minute) / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` units, sleeping as needed; returns the seconds waited."""
+        needed = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return waited
+                delay = (needed - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self) -> None:
+        # The server says we are over quota, so trust it over the local estimate
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; after
+    `reset_seconds` one trial call is let through (half-open), and its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_CIRCUIT_FAILURES, reset_seconds: float = LLM_CIRCUIT_RESET_S):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_thread: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            self._trial_thread = threading.get_ident()
+            return True
+
+    def release_trial(self) -> None:
+        """
+        End this thread's half-open trial without recording an outcome (e.g. a
+        bad request, which says nothing about the service); the next call
+        becomes the trial. No-op when the calling thread holds no trial.
+        """
+        with self._lock:
+            if self._trial_in_flight and self._trial_thread == threading.get_ident():
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"LLM circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def _status_code(e: Exception) -> Optional[int]:
+    # google.api_core errors expose the HTTP status as `code`; other clients use `status_code`
+    for attr in ("code", "status_code"):
+        value = getattr(e, attr, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_retryable(e: Exception) -> bool:
+    if isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    return _status_code(e) in _RETRYABLE_STATUS
+
+
+def is_throttled(e: Exception) -> bool:
+    return _status_code(e) == 429
+
+
+class RateLimitedClient:
+    """
+    Process-wide gate in front of the model API: `generate(prompt, send)`
+    runs `send(prompt, timeout) -> text` under request- and
+    token-per-minute buckets, jittered exponential backoff on throttling and
+    transient errors, a per-call timeout and a circuit breaker. Errors are
+    raised to the caller instead of being papered over, so a quota outage
+    shows up as failed documents rather than fallback answers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+        timeout: float = LLM_TIMEOUT_S,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    def generate(self, prompt: str, send: Callable[[str, float], str]) -> str:
+        if not self.breaker.allow():
+            with self._lock:
+                self.rejected += 1
+            raise LLMUnavailableError("LLM circuit is open; not sending request")
+
+        try:
+            return self._generate(prompt, send)
+        finally:
+            # Exits that record neither success nor failure must not keep the trial slot forever
+            self.breaker.release_trial()
+
+    def _generate(self, prompt: str, send: Callable[[str, float], str]) -> str:
+        estimated_tokens = len(prompt) / CHARS_PER_TOKEN
+        attempt = 0
+        while True:
+            waited = self.requests.acquire(1) + self.tokens.acquire(estimated_tokens)
+            started = time.perf_counter()
+            try:
+                text = send(prompt, self.timeout)
+            except Exception as e:
+                throttled = is_throttled(e)
+                with self._lock:
+                    self.wait_seconds += waited
+                    self.throttled += int(throttled)
+                if throttled:
+                    self.requests.drain()
+                if not is_retryable(e):
+                    # A bad request says nothing about the service's health
+                    raise
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    self.breaker.record_failure()
+                    raise LLMUnavailableError(f"LLM call failed after {attempt + 1} attempt(s): {e}") from e
+                delay = self._backoff(attempt)
+                logger.warning(f"LLM call failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - started
+            observe_stage("llm_call", elapsed)
+            with self._lock:
+                self.calls += 1
+                self.wait_seconds += waited
+                self._latencies.append(elapsed)
+            self.breaker.record_success()
+            return text
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform over [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * (2 ** attempt)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "rejected_open_circuit": self.rejected,
+                "rate_limit_wait_seconds": round(self.wait_seconds, 3),
+            }
+        stats["circuit"] = self.breaker.state
+
+        def pct(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        stats["latency_s"] = {"p50": pct(0.50), "p90": pct(0.90), "p99": pct(0.99)}
+        return stats
+
+
+llm_client = RateLimitedClient()
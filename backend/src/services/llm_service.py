@@ -1,176 +1,194 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import os
-from typing import List, Dict, Any, Optional
+import hashlib
+import time
+from typing import List, Dict, Any, Iterable, Optional
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
-from pathlib import Path
+import threading
 from ..models.schemas import Answer, ProcessStatus
+from ..indexing.chunker import Chunk, chunk_pages
+from ..indexing.parser import PageText
+from ..indexing.retrieval import BM25Index, RETRIEVAL_TOP_K
+from .llm_cache import llm_cache, cache_key
+from .rule_extractor import rule_extractor
+from .llm_batcher import BatchItem, llm_batcher
+from .llm_client import CHARS_PER_TOKEN, llm_client
+from ..monitoring.metrics import metrics, stage_timer
 import uuid
 import logging
 
-# Load .env from backend directory
-env_path = Path(__file__).resolve().parent.parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'gemini-2.5-flash'
+# Alternate API endpoint (REST transport), e.g. benchmarks/fake_gemini_server.py for load testing
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+# Bump whenever the prompt or context selection changes so cached answers are not reused
+PROMPT_VERSION = "4"
+# Longest wait for a document's batched answers, including rate-limit waits and retries
+LLM_RESULT_TIMEOUT_S = float(os.getenv("LLM_RESULT_TIMEOUT_S", "900"))
+
+llm_chars = metrics.counter(
+    "legal_review_llm_chars_total", "Characters sent to (prompt) and received from (response) the model",
+    ("direction",),
+)
+llm_tokens = metrics.counter(
+    "legal_review_llm_tokens_total",
+    "Model tokens by direction; source is reported (API usage metadata) or estimated (from characters)",
+    ("direction", "source"),
+)
+
 class LLMService:
+    """
+    Thread-safe; one instance is shared by the API and the job workers through
+    get_llm_service() so the SDK is configured once per process.
+    """
+
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
         logger.info(f"GEMINI_API_KEY loaded: {'Yes' if self.api_key else 'No'}")
         if self.api_key:
-            logger.info(f"API Key (first 10 chars): {self.api_key[:10]}...")
-            genai.configure(api_key=self.api_key)
+            # The SDK takes about a second to import, so only load it when a key is configured
+            import google.generativeai as genai
+
+            if GEMINI_API_ENDPOINT:
+                logger.info(f"Using Gemini API endpoint: {GEMINI_API_ENDPOINT}")
+                genai.configure(api_key=self.api_key, transport="rest",
+                                client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+            else:
+                genai.configure(api_key=self.api_key)
             # Use gemini-2.5-flash - faster model with higher quota limits
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            self.model = genai.GenerativeModel(MODEL_NAME)
             self.client_ready = True
-            logger.info("Gemini model initialized: gemini-2.5-flash")
+            logger.info(f"Gemini model initialized: {MODEL_NAME}")
         else:
             logger.warning("GEMINI_API_KEY not found. LLM service will use mock data.")
             self.client_ready = False
 
-    def extract_answers(self, text: str, questions: List[str]) -> List[Dict[str, Any]]:
+    def extract_answers(self, text: str, questions: List[str], pages: Optional[Iterable[PageText]] = None,
+                        chunks: Optional[List[Chunk]] = None) -> List[Dict[str, Any]]:
+        """
+        Answer questions about a document. `chunks` are the document's
+        precomputed retrieval chunks (ParsedDocument.get_chunks); otherwise
+        `pages`, the parser's page stream for the same text, is chunked here,
+        and when both are omitted the text is treated as a single page.
+
+        Model failures (quota, outages, unparseable output) are raised rather
+        than answered from the rule-based fallback, so the document is marked
+        failed and retried on the next run instead of storing guesses.
+        """
+        with stage_timer("extract"):
+            return self._extract_answers(text, questions, pages, chunks)
+
+    def _extract_answers(self, text: str, questions: List[str], pages: Optional[Iterable[PageText]],
+                         chunks: Optional[List[Chunk]]) -> List[Dict[str, Any]]:
         if not self.client_ready:
             logger.info("Using mock extraction (API not ready)")
             return self._mock_extract(text, questions)
 
-        logger.info(f"Starting Gemini extraction for {len(questions)} questions")
-        logger.info(f"Document text length: {len(text)} characters")
-        
-        # Truncate text if absolutely massive, but Gemini 1.5 has 1M-2M context window.
-        # We'll be safe with 100k chars for now to avoid accidental huge costs/latency if user unloads insane data.
-        truncated_text = text[:100000] 
-        if len(text) > 100000:
-            logger.warning(f"Text truncated from {len(text)} to 100000 characters")
-        
-        prompt = f"""
-        You are a legal AI assistant. Extract the following information from the legal document text provided below.
-        
-        Questions:
-        {json.dumps(questions, indent=2)}
-        
-        Output format: Dictionary mapping question text to extracted value, confidence (0.0-1.0), and a short citation/snippet.
-        You must output valid JSON only. Do not wrap in markdown code blocks.
-        
-        JSON format:
-        [
-            {{
-                "question": "question text",
-                "value": "extracted value or 'Not Found'",
-                "confidence": 0.9,
-                "citation": "exact text snippet from doc"
-            }},
-            ...
-        ]
-        
-        Document Text:
-        {truncated_text}
-        """
+        # Answers are cached per question, so only questions not seen before for
+        # this exact text (and model/prompt version) reach the model.
+        doc_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        keys = {q: cache_key(doc_hash, q, MODEL_NAME, PROMPT_VERSION) for q in questions}
+        cached = {}
+        for q in questions:
+            hit = llm_cache.get(keys[q])
+            if hit is not None:
+                cached[q] = hit
+        missing = [q for q in questions if q not in cached]
+        logger.info(f"LLM cache: {len(cached)} hits, {len(missing)} misses")
+        if not missing:
+            return [cached[q] for q in questions]
 
+        started = time.perf_counter()
+        if chunks is None:
+            if pages is None:
+                pages = [PageText(page_number=1, text=text, start=0, end=len(text))]
+            chunks = list(chunk_pages(pages))
+        with stage_timer("retrieval"):
+            items = self._build_items(doc_hash[:12], chunks, missing)
+        futures = llm_batcher.submit(MODEL_NAME, self._generate, items)
+        deadline = time.monotonic() + LLM_RESULT_TIMEOUT_S
         try:
-            logger.info("Sending request to Gemini API...")
-            response = self.model.generate_content(prompt)
-            logger.info("Received response from Gemini API")
-            content = response.text
-            logger.info(f"Response length: {len(content)} characters")
-            
-            # Clean content if it has markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            data = json.loads(content)
-            logger.info(f"Successfully parsed {len(data)} results from Gemini")
-            return data
-        except Exception as e:
-            logger.error(f"LLM Extraction failed: {e}")
-            return self._mock_extract(text, questions)
+            fresh = {q: f.result(timeout=max(0.0, deadline - time.monotonic())) for q, f in zip(missing, futures)}
+        except FutureTimeoutError:
+            raise TimeoutError(f"No LLM answer within {LLM_RESULT_TIMEOUT_S:.0f}s for {len(missing)} questions")
+        elapsed = time.perf_counter() - started
 
-    def _mock_extract(self, text: str, questions: List[str]) -> List[Dict[str, Any]]:
+        per_question_latency = elapsed / len(missing)
+        for q in missing:
+            if fresh[q] is not None:
+                llm_cache.put(keys[q], fresh[q], per_question_latency)
+
+        results = [cached.get(q) or fresh.get(q) for q in questions]
+        return [r for r in results if r is not None]
+
+    def _build_items(self, doc_ref: str, chunks: List[Chunk], questions: List[str]) -> List[BatchItem]:
         """
-        Generate elaborate mock data based on document content analysis.
-        This simulates real extraction by analyzing the text.
+        Pick each question's top-k chunks with BM25, so long contracts are
+        covered end to end and short prompts stay short.
         """
-        logger.info("Generating elaborate mock data based on document analysis...")
-        results = []
+        index = BM25Index(chunks)
+        return [
+            BatchItem(
+                doc_ref=doc_ref,
+                question=q,
+                excerpts={c.index: c.text for c in index.select(q, RETRIEVAL_TOP_K)},
+            )
+            for q in questions
+        ]
+
+    def _send(self, prompt: str, timeout: float) -> str:
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        text = response.text
+        usage = getattr(response, "usage_metadata", None)
+        # Proto defaults read as 0 when the endpoint reports no usage
+        if usage is not None and getattr(usage, "prompt_token_count", 0):
+            llm_tokens.inc(usage.prompt_token_count, direction="prompt", source="reported")
+            llm_tokens.inc(usage.candidates_token_count or 0, direction="response", source="reported")
+        else:
+            llm_tokens.inc(len(prompt) / CHARS_PER_TOKEN, direction="prompt", source="estimated")
+            llm_tokens.inc(len(text) / CHARS_PER_TOKEN, direction="response", source="estimated")
+        return text
+
+    def _generate(self, prompt: str) -> List[Dict[str, Any]]:
+        logger.info(f"Sending request to Gemini API ({len(prompt)} prompt characters)...")
+        content = llm_client.generate(prompt, self._send)
+        llm_chars.inc(len(prompt), direction="prompt")
+        llm_chars.inc(len(content), direction="response")
+        logger.info("Received response from Gemini API")
+        logger.info(f"Response length: {len(content)} characters")
         
-        # Try to extract some real patterns from the text
-        text_lower = text.lower()
-        text_sample = text[:5000]  # First 5000 chars for analysis
+        # Clean content if it has markdown code blocks
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0]
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0]
         
-        for q in questions:
-            q_lower = q.lower()
-            
-            # Smart extraction based on question type
-            if "date" in q_lower or "effective" in q_lower:
-                # Look for date patterns
-                import re
-                date_patterns = re.findall(r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}|(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4})', text_sample, re.IGNORECASE)
-                val = date_patterns[0] if date_patterns else "Date not found in document"
-                conf = 0.75 if date_patterns else 0.3
-                citation = f"Found near: ...{text_sample[max(0, text_sample.find(val)-50):text_sample.find(val)+100]}..." if date_patterns else "No date pattern detected"
-                
-            elif "part" in q_lower or "entity" in q_lower or "compan" in q_lower:
-                # Look for company/party names (capitalized words)
-                import re
-                # Find capitalized phrases that might be company names
-                company_patterns = re.findall(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,3}(?:\s+(?:Inc|LLC|Corp|Corporation|Ltd|Limited))?)', text_sample)
-                parties = list(set(company_patterns[:5]))  # Get unique parties
-                val = ", ".join(parties) if parties else "Parties not clearly identified"
-                conf = 0.7 if parties else 0.4
-                citation = f"Identified entities: {', '.join(parties[:3])}" if parties else "No clear party names found"
-                
-            elif "law" in q_lower or "jurisdiction" in q_lower or "governing" in q_lower:
-                # Look for jurisdiction mentions
-                jurisdictions = ["Delaware", "New York", "California", "Nevada", "Texas"]
-                found_jurisdiction = None
-                for jurisdiction in jurisdictions:
-                    if jurisdiction.lower() in text_lower:
-                        found_jurisdiction = jurisdiction
-                        break
-                val = f"Governed by laws of {found_jurisdiction}" if found_jurisdiction else "Jurisdiction not specified"
-                conf = 0.8 if found_jurisdiction else 0.35
-                citation = f"Mention of {found_jurisdiction} found in document" if found_jurisdiction else "No jurisdiction keywords detected"
-                
-            elif "termination" in q_lower or "term" in q_lower:
-                # Look for termination-related text
-                if "termination" in text_lower:
-                    # Find context around termination
-                    term_idx = text_lower.find("termination")
-                    context = text[max(0, term_idx-100):min(len(text), term_idx+200)]
-                    val = f"Termination clause present (see citation)"
-                    conf = 0.65
-                    citation = f"...{context}..."
-                else:
-                    val = "No termination clause found"
-                    conf = 0.4
-                    citation = "Keyword 'termination' not found in document"
-                    
-            else:
-                # Generic extraction - try to find the question keywords in text
-                keywords = [word for word in q_lower.split() if len(word) > 3]
-                found_keywords = [kw for kw in keywords if kw in text_lower]
-                
-                if found_keywords:
-                    # Find context around first keyword
-                    kw_idx = text_lower.find(found_keywords[0])
-                    context = text[max(0, kw_idx-100):min(len(text), kw_idx+200)]
-                    val = f"Related content found (see citation)"
-                    conf = 0.55
-                    citation = f"...{context}..."
-                else:
-                    val = f"No clear answer found for: {q}"
-                    conf = 0.25
-                    citation = "Question keywords not found in document"
-            
-            results.append({
-                "question": q,
-                "value": val,
-                "confidence": conf,
-                "citation": citation[:500]  # Limit citation length
-            })
-            
+        data = json.loads(content)
+        logger.info(f"Successfully parsed {len(data)} results from Gemini")
+        return data
+
+    def _mock_extract(self, text: str, questions: List[str]) -> List[Dict[str, Any]]:
+        """
+        Offline fallback: answer from the rule-based extractor, which builds a
+        single keyword index over the document for all questions.
+        """
+        logger.info("Generating rule-based answers from document analysis...")
+        results = rule_extractor.extract(text, questions)
         logger.info(f"Generated {len(results)} mock results with document-based analysis")
         return results
+
+
+_service: Optional[LLMService] = None
+_service_lock = threading.Lock()
+
+
+def get_llm_service() -> LLMService:
+    """Process-wide LLMService, created on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = LLMService()
+    return _service
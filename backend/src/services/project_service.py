@@ -1,10 +1,22 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from ..models.schemas import ProjectCreateRequest, ProcessStatus
-from ..models.db_models import ProjectModel, DocumentModel, AnswerModel
-from ..storage.db import SessionLocal
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.schemas import (
+    Answer, AnswerPage, DocumentSpan, DocumentSummary, ProjectCreateRequest, ProjectInfo, ProjectPage,
+    ProjectSummary, ProcessStatus
+)
+from ..models.db_models import ProjectModel, DocumentModel, AnswerModel, JobModel, question_id_for
+from ..storage.db import SessionLocal, dialect_insert
+from ..services.llm_service import get_llm_service
+from ..services.extraction_pipeline import ExtractionPipeline, submit_parse
+from ..services.search_service import SearchService
+from ..monitoring.metrics import stage_timer
+from ..indexing.parse_cache import parse_cache
 from ..indexing.parser import DocumentParser
-from ..services.llm_service import LLMService
+from ..indexing.citations import CitationLocator
+from ..indexing.clause_diff import ClauseDiff
+import asyncio
 import uuid
 import os
 import logging
@@ -13,48 +25,213 @@ logger = logging.getLogger(__name__)
 
 # Base path for data - normally would be configured
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../data"))
+# Answers are written in batches of this size during extraction
+ANSWER_BATCH_SIZE = int(os.getenv("ANSWER_BATCH_SIZE", "500"))
+
+_PROJECT_COLUMNS = (
+    ProjectModel.id, ProjectModel.name, ProjectModel.description,
+    ProjectModel.created_at, ProjectModel.status,
+)
 
 class ProjectService:
+    """
+    The async methods serve API requests and take the request's AsyncSession
+    (see storage.db.get_async_db). Extraction runs in worker threads on sync
+    sessions from SessionLocal.
+    """
+
     @staticmethod
-    def get_db():
-        return SessionLocal()
+    async def create_project(db: AsyncSession, data: ProjectCreateRequest) -> ProjectInfo:
+        project = ProjectModel(
+            name=data.name,
+            description=data.description,
+            status=ProcessStatus.PENDING
+        )
+        db.add(project)
+        await db.flush()
+
+        # Add documents
+        documents = [
+            DocumentModel(project_id=project.id, filename=f, status=ProcessStatus.PENDING)
+            for f in data.filenames
+        ]
+        db.add_all(documents)
+        with stage_timer("db_commit"):
+            await db.commit()
+        await asyncio.to_thread(ProjectService._index_documents, data.filenames)
+
+        return ProjectInfo(
+            id=project.id, name=project.name, description=project.description,
+            created_at=project.created_at, status=project.status,
+            document_count=len(documents), answer_count=0,
+            documents=[
+                DocumentSummary(id=d.id, filename=d.filename, status=d.status, content_hash=d.content_hash)
+                for d in sorted(documents, key=lambda d: d.filename)
+            ],
+        )
 
     @staticmethod
-    async def create_project(data: ProjectCreateRequest) -> ProjectModel:
-        db = ProjectService.get_db()
-        try:
-            project = ProjectModel(
-                name=data.name,
-                description=data.description,
-                status=ProcessStatus.PENDING
-            )
-            db.add(project)
-            db.commit()
-            db.refresh(project)
+    async def add_documents(db: AsyncSession, project_id: str, filenames: List[str]) -> List[DocumentSummary]:
+        """
+        Attach files to a project, skipping names it already has. Returns the
+        newly added documents.
+        """
+        existing = set((await db.execute(
+            select(DocumentModel.filename).where(DocumentModel.project_id == project_id)
+        )).scalars())
+        documents = [
+            DocumentModel(project_id=project_id, filename=f, status=ProcessStatus.PENDING)
+            for f in dict.fromkeys(filenames) if f not in existing
+        ]
+        db.add_all(documents)
+        with stage_timer("db_commit"):
+            await db.commit()
+        await asyncio.to_thread(ProjectService._index_documents, [d.filename for d in documents])
+        return [
+            DocumentSummary(id=d.id, filename=d.filename, status=d.status, content_hash=d.content_hash)
+            for d in documents
+        ]
 
-            # Add documents
-            for f in data.filenames:
-                doc = DocumentModel(project_id=project.id, filename=f, status=ProcessStatus.PENDING)
-                db.add(doc)
-            
+    @staticmethod
+    def _index_documents(filenames: List[str]) -> None:
+        """
+        Blocking: store the searchable text of newly added documents. Files
+        without a cached parse are queued; their text is stored when it finishes.
+        """
+        db = SessionLocal()
+        try:
+            for filename in dict.fromkeys(filenames):
+                file_path = os.path.join(DATA_DIR, filename)
+                try:
+                    parsed = DocumentParser.get_cached(file_path)
+                    if parsed is None:
+                        SearchService.index_when_parsed(submit_parse(file_path), file_path)
+                        continue
+                except Exception as e:
+                    logger.warning(f"Could not index {filename}: {e}")
+                    continue
+                SearchService.store_document_text(db, filename, parsed.text)
             db.commit()
-            db.refresh(project) # Load relationships
-            return project
         finally:
             db.close()
 
+    @staticmethod
+    async def project_exists(db: AsyncSession, project_id: str) -> bool:
+        result = await db.execute(select(ProjectModel.id).where(ProjectModel.id == project_id))
+        return result.first() is not None
 
+    @staticmethod
+    async def _counts(db: AsyncSession, model, project_ids: List[str]) -> Dict[str, int]:
+        if not project_ids:
+            return {}
+        result = await db.execute(
+            select(model.project_id, func.count(model.id))
+            .where(model.project_id.in_(project_ids))
+            .group_by(model.project_id)
+        )
+        return dict(result.all())
 
     @staticmethod
-    async def get_project(project_id: str) -> Optional[ProjectModel]:
-        db = ProjectService.get_db()
-        try:
-            return db.query(ProjectModel).options(
-                joinedload(ProjectModel.documents),
-                joinedload(ProjectModel.answers)
-            ).filter(ProjectModel.id == project_id).first()
-        finally:
-            db.close()
+    async def get_project_info(db: AsyncSession, project_id: str) -> Optional[ProjectInfo]:
+        """
+        Project header plus its document list, without answers or document text.
+        """
+        row = (await db.execute(select(*_PROJECT_COLUMNS).where(ProjectModel.id == project_id))).first()
+        if not row:
+            return None
+        documents = (await db.execute(
+            select(DocumentModel.id, DocumentModel.filename, DocumentModel.status, DocumentModel.content_hash)
+            .where(DocumentModel.project_id == project_id)
+            .order_by(DocumentModel.filename)
+        )).all()
+        answer_count = (await ProjectService._counts(db, AnswerModel, [project_id])).get(project_id, 0)
+        return ProjectInfo(
+            **row._asdict(),
+            document_count=len(documents),
+            answer_count=answer_count,
+            documents=[DocumentSummary(**d._asdict()) for d in documents],
+        )
+
+    @staticmethod
+    async def get_project_answers(db: AsyncSession, project_id: str, offset: int = 0, limit: int = 500,
+                                  document_id: Optional[str] = None,
+                                  question_id: Optional[str] = None) -> AnswerPage:
+        conditions = [AnswerModel.project_id == project_id]
+        if document_id:
+            conditions.append(AnswerModel.document_id == document_id)
+        if question_id:
+            conditions.append(AnswerModel.question_id == question_id)
+        total = (await db.execute(select(func.count(AnswerModel.id)).where(*conditions))).scalar()
+        # Stable order so consecutive pages neither skip nor repeat rows
+        rows = (await db.execute(
+            select(AnswerModel).where(*conditions)
+            .order_by(AnswerModel.document_id, AnswerModel.question_id, AnswerModel.id)
+            .offset(offset).limit(limit)
+        )).scalars().all()
+        return AnswerPage(
+            items=[Answer.model_validate(r) for r in rows],
+            total=total, offset=offset, limit=limit,
+        )
+
+    @staticmethod
+    async def get_document_span(db: AsyncSession, document_id: str, start: int, end: int,
+                                context: int = 200) -> Optional[DocumentSpan]:
+        """
+        Text at a stored citation span (plus some context), read from the
+        document's cached parse so the client can jump straight to it.
+        """
+        doc = (await db.execute(
+            select(DocumentModel.id, DocumentModel.filename).where(DocumentModel.id == document_id)
+        )).first()
+        if not doc:
+            return None
+        file_path = os.path.join(DATA_DIR, doc.filename)
+        if not os.path.exists(file_path):
+            return None
+        # Parse cache hit in the common case; the file is re-parsed if the entry was evicted
+        parsed = await asyncio.to_thread(DocumentParser.parse, file_path)
+        start = max(0, min(start, len(parsed.text)))
+        end = max(start, min(end, len(parsed.text)))
+        return DocumentSpan(
+            document_id=doc.id,
+            filename=doc.filename,
+            page_number=CitationLocator.page_for(parsed, start),
+            start=start,
+            end=end,
+            text=parsed.text[start:end],
+            before=parsed.text[max(0, start - context):start],
+            after=parsed.text[end:end + context],
+        )
+
+    @staticmethod
+    async def compare_documents(db: AsyncSession, left_id: str, right_id: str,
+                                include_unchanged: bool = False) -> Optional[Dict]:
+        """
+        Clause-level diff between two documents: aligned clauses with their
+        word-level changes, plus clauses only present on one side.
+        """
+        docs = {}
+        for document_id in (left_id, right_id):
+            doc = (await db.execute(
+                select(DocumentModel.id, DocumentModel.filename).where(DocumentModel.id == document_id)
+            )).first()
+            if not doc or not os.path.exists(os.path.join(DATA_DIR, doc.filename)):
+                return None
+            docs[document_id] = doc
+        left, right = await asyncio.gather(
+            asyncio.to_thread(DocumentParser.parse, os.path.join(DATA_DIR, docs[left_id].filename)),
+            asyncio.to_thread(DocumentParser.parse, os.path.join(DATA_DIR, docs[right_id].filename)),
+        )
+        result = await asyncio.to_thread(ClauseDiff.compare_cached, left, right)
+        pairs = result["pairs"]
+        if not include_unchanged:
+            pairs = [p for p in pairs if p["status"] != "unchanged"]
+        return {
+            "left": {"document_id": left_id, "filename": docs[left_id].filename, "content_hash": left.content_hash},
+            "right": {"document_id": right_id, "filename": docs[right_id].filename, "content_hash": right.content_hash},
+            "summary": result["summary"],
+            "pairs": pairs,
+        }
 
     @staticmethod
     async def list_available_files() -> List[str]:
@@ -67,81 +244,229 @@ class ProjectService:
         return files
 
     @staticmethod
-    async def list_projects() -> List[ProjectModel]:
-        db = ProjectService.get_db()
-        try:
-            return db.query(ProjectModel).options(
-                joinedload(ProjectModel.documents),
-                joinedload(ProjectModel.answers)
-            ).all()
-        finally:
-            db.close()
+    async def list_projects(db: AsyncSession, offset: int = 0, limit: int = 50, status: Optional[str] = None,
+                            search: Optional[str] = None) -> ProjectPage:
+        """
+        Page of project summaries. Only the listed columns are read and
+        document/answer counts are aggregated for the returned page only.
+        """
+        conditions = []
+        if status:
+            conditions.append(ProjectModel.status == status)
+        if search:
+            conditions.append(ProjectModel.name.ilike(f"%{search}%"))
+        total = (await db.execute(select(func.count(ProjectModel.id)).where(*conditions))).scalar()
+        rows = (await db.execute(
+            select(*_PROJECT_COLUMNS).where(*conditions)
+            .order_by(ProjectModel.created_at.desc(), ProjectModel.id)
+            .offset(offset).limit(limit)
+        )).all()
+
+        ids = [r.id for r in rows]
+        doc_counts = await ProjectService._counts(db, DocumentModel, ids)
+        answer_counts = await ProjectService._counts(db, AnswerModel, ids)
+        items = [
+            ProjectSummary(
+                **r._asdict(),
+                document_count=doc_counts.get(r.id, 0),
+                answer_count=answer_counts.get(r.id, 0),
+            )
+            for r in rows
+        ]
+        return ProjectPage(items=items, total=total, offset=offset, limit=limit)
 
     @staticmethod
-    async def delete_project(project_id: str) -> bool:
-        db = ProjectService.get_db()
-        try:
-            project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
-            if not project:
-                return False
-            
-            # SQLAlchemy will cascade delete documents and answers due to relationship configuration
-            db.delete(project)
-            db.commit()
-            return True
-        finally:
-            db.close()
+    async def delete_project(db: AsyncSession, project_id: str) -> bool:
+        if not await ProjectService.project_exists(db, project_id):
+            return False
+        # Set-based deletes instead of loading every document and answer into the session
+        await db.execute(delete(AnswerModel).where(AnswerModel.project_id == project_id))
+        await db.execute(delete(DocumentModel).where(DocumentModel.project_id == project_id))
+        # Jobs reference the project too; callers cancel unfinished ones first (JobQueue.cancel_project)
+        await db.execute(delete(JobModel).where(JobModel.project_id == project_id))
+        await db.execute(delete(ProjectModel).where(ProjectModel.id == project_id))
+        with stage_timer("db_commit"):
+            await db.commit()
+        return True
+
+    @staticmethod
+    async def generate_answers(project_id: str, questions: List[str], force: bool = False) -> Optional[ProjectModel]:
+        # The pipeline blocks on parsing, LLM calls and sync DB writes; keep it off the event loop
+        return await asyncio.to_thread(ProjectService.run_generation, project_id, questions, force=force)
 
     @staticmethod
-    async def generate_answers(project_id: str, questions: List[str]) -> ProjectModel:
-        db = ProjectService.get_db()
-        llm = LLMService()
+    def _plan_cells(db: Session, project: ProjectModel, questions: List[str], force: bool):
+        """
+        Work out which (document, question) cells need extracting.
+
+        A cell is reused when an answer already exists for it, completed, and
+        the document file is unchanged since that answer was written. Rows left
+        by older non-incremental runs are repaired on the way: duplicates per
+        cell are deleted and random question ids are replaced by stable ones.
+        Returns (pipeline items, existing answer ids by (document_id, question_text)).
+        """
+        existing = {}
+        duplicates = []
+        legacy_ids = []
+        rows = db.query(
+            AnswerModel.id, AnswerModel.document_id, AnswerModel.question_id,
+            AnswerModel.question_text, AnswerModel.status
+        ).filter(AnswerModel.project_id == project.id).all()
+        for answer_id, document_id, question_id, question_text, status in rows:
+            key = (document_id, question_text)
+            if key in existing:
+                duplicates.append(answer_id)
+                continue
+            existing[key] = (answer_id, status)
+            if question_id != question_id_for(question_text or ""):
+                legacy_ids.append({"id": answer_id, "question_id": question_id_for(question_text or "")})
+
+        if duplicates:
+            db.query(AnswerModel).filter(AnswerModel.id.in_(duplicates)).delete(synchronize_session=False)
+        if legacy_ids:
+            db.bulk_update_mappings(AnswerModel, legacy_ids)
+        if duplicates or legacy_ids:
+            with stage_timer("db_commit"):
+                db.commit()
+
+        items = []
+        for doc in project.documents:
+            file_path = os.path.join(DATA_DIR, doc.filename)
+            try:
+                current_hash = parse_cache.content_hash(file_path)
+            except OSError:
+                current_hash = None  # let the pipeline report the missing file
+
+            if force or current_hash is None or current_hash != doc.content_hash:
+                needed = list(questions)
+            else:
+                needed = [
+                    q for q in questions
+                    if existing.get((doc.id, q), (None, None))[1] != ProcessStatus.COMPLETED
+                ]
+            if needed:
+                items.append((doc, file_path, needed))
+
+        existing_ids = {key: answer_id for key, (answer_id, _) in existing.items()}
+        return items, existing_ids
+
+    @staticmethod
+    def _upsert_answers(db: Session, rows: List[dict]) -> None:
+        """
+        Insert-or-update a batch of answer rows in one executemany statement,
+        keyed on the (project_id, document_id, question_id) cell.
+        """
+        if not rows:
+            return
+        # The model may repeat a question; last answer for a cell wins
+        unique_rows = list({(r["project_id"], r["document_id"], r["question_id"]): r for r in rows}.values())
+        stmt = dialect_insert(AnswerModel.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "document_id", "question_id"],
+            set_={
+                col: stmt.excluded[col]
+                for col in ("question_text", "value", "confidence", "citations", "status")
+            },
+        )
+        db.execute(stmt, unique_rows)
+
+    @staticmethod
+    def run_generation(project_id: str, questions: List[str], job=None, force: bool = False) -> Optional[ProjectModel]:
+        """
+        Blocking extraction run. Only missing or invalidated cells are
+        extracted (everything when force=True) and results are upserted per
+        (document, question). `job` (a workers.job_queue.JobContext) receives
+        progress updates and is polled for cancellation between documents.
+        """
+        db = SessionLocal()
+        llm = get_llm_service()
         try:
             project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
             if not project:
                 return None
-            
-            # Clear old answers just in case? Or append? Appending for now but might duplicate if re-run.
-            # Ideally we should check if question already exists.
-            
-            for doc in project.documents:
-                # 1. Parse Document
-                file_path = os.path.join(DATA_DIR, doc.filename)
-                try:
-                    text = DocumentParser.extract_text(file_path)
-                    doc.status = "parsed"
+
+            items, existing_ids = ProjectService._plan_cells(db, project, questions, force)
+            logger.info(f"Incremental plan for project {project_id}: "
+                        f"{sum(len(q) for _, _, q in items)} cells across {len(items)} documents")
+
+            pipeline = ExtractionPipeline(llm)
+            rows = []
+            if job:
+                job.start(total_documents=len(items), total_answers=sum(len(q) for _, _, q in items))
+
+            def flush():
+                with stage_timer("db_commit"):
+                    ProjectService._upsert_answers(db, rows)
                     db.commit()
-                except Exception as e:
-                    logger.error(f"Failed to parse {doc.filename}: {e}")
+                rows.clear()
+
+            for outcome in pipeline.run(items):
+                if job and job.cancelled:
+                    logger.info(f"Generation for project {project_id} cancelled")
+                    break
+
+                doc = outcome.key
+                if outcome.error is not None:
+                    # Parse or model failure; the document's cells stay pending for the next run
+                    logger.error(f"Failed to process {doc.filename}: {outcome.error}")
                     doc.status = "failed"
-                    db.commit()
+                    if job:
+                        job.document_done(failed=True, answers=0)
                     continue
+                doc.status = "parsed"
+                written = 0
 
-                # 2. Extract with LLM
-                results = llm.extract_answers(text, questions)
-
-                # 3. Save Answers
-                for res in results:
+                for res in outcome.results:
                     q_text = res.get("question")
                     val = res.get("value")
                     conf = res.get("confidence", 0.0)
                     cit = res.get("citation", "")
+                    citation = {"text": cit, "source": doc.filename}
+                    if res.get("citation_span"):
+                        # page_number / start / end into the parsed document text
+                        citation.update(res["citation_span"])
 
                     if not q_text: continue
 
-                    ans = AnswerModel(
+                    rows.append(dict(
+                        id=existing_ids.get((doc.id, q_text)) or str(uuid.uuid4()),
                         project_id=project.id,
-                        question_id=str(uuid.uuid4()),
+                        document_id=doc.id,
+                        question_id=question_id_for(q_text),
                         question_text=q_text,
                         value=str(val),
                         confidence=float(conf),
-                        citations=[{"text": cit, "source": doc.filename}], # Store basic citation
+                        citations=[citation],
                         status=ProcessStatus.COMPLETED
+                    ))
+                    written += 1
+
+                if outcome.parsed.content_hash != doc.content_hash:
+                    # The file changed, so every stored answer of the document is stale, including
+                    # questions this run did not ask; pending cells are re-extracted when next asked.
+                    # This run's answers complete their cells again when flushed.
+                    db.query(AnswerModel).filter(AnswerModel.document_id == doc.id).update(
+                        {AnswerModel.status: ProcessStatus.PENDING}, synchronize_session=False
                     )
-                    db.add(ans)
-            
-            project.status = ProcessStatus.COMPLETED
-            db.commit()
+                    doc.content_hash = outcome.parsed.content_hash
+                    # Short transaction of its own; index_parsed below needs the write lock
+                    with stage_timer("db_commit"):
+                        db.commit()
+                # Own short transaction, so this run's session holds no write lock between flushes
+                SearchService.index_parsed(os.path.join(DATA_DIR, doc.filename), outcome.parsed)
+                if job:
+                    job.document_done(failed=False, answers=written)
+
+                # Flush in batches rather than committing per document
+                if len(rows) >= ANSWER_BATCH_SIZE:
+                    flush()
+
+            if job and job.cancelled and not db.query(ProjectModel.id).filter(ProjectModel.id == project_id).first():
+                # Cancelled because the project was deleted; its answers have nowhere to go
+                return None
+            if not (job and job.cancelled):
+                project.status = ProcessStatus.COMPLETED
+            flush()
             db.refresh(project)
             return project
         except Exception as e:
@@ -0,0 +1,207 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only the head of the document is scanned for dates and party names
+SAMPLE_CHARS = 5000
+
+_DATE_RE = re.compile(
+    r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}|'
+    r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4})',
+    re.IGNORECASE,
+)
+_COMPANY_RE = re.compile(
+    r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,3}(?:\s+(?:Inc|LLC|Corp|Corporation|Ltd|Limited))?)'
+)
+JURISDICTIONS = ["Delaware", "New York", "California", "Nevada", "Texas"]
+# Below this many distinct keywords, one C-level str.find per keyword beats a
+# single regex pass; above it the single pass wins and keeps cost ~O(text).
+SINGLE_PASS_MIN_KEYWORDS = 200
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Regex source for a set of literals, shaped as a trie ("term(?:ination)?")
+    so the engine walks shared prefixes once instead of trying every
+    alternative at every position. Optional suffixes are greedy, so the
+    longest keyword at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+@lru_cache(maxsize=256)
+def _keyword_matcher(keywords: Tuple[str, ...]) -> Tuple["re.Pattern", Dict[str, List[str]]]:
+    """
+    One regex that reports, at every position, the longest keyword starting
+    there (zero-width lookahead so overlapping matches are all seen), plus for
+    each keyword the shorter keywords that are its prefixes and therefore
+    occur at the same position.
+    """
+    ordered = sorted(set(keywords))
+    pattern = re.compile("(?=(" + _trie_pattern(ordered) + "))")
+    prefixes = {k: [p for p in ordered if p != k and k.startswith(p)] for k in ordered}
+    return pattern, prefixes
+
+
+class KeywordIndex:
+    """
+    First-occurrence offsets of a fixed keyword set over the (lower-cased)
+    text, computed once per distinct keyword. Large keyword sets are found in
+    a single pass over the text. Matching is substring-based, like str.find.
+    """
+
+    def __init__(self, text_lower: str, keywords: List[str]):
+        self.first: Dict[str, int] = {}
+        wanted = {k for k in keywords if k}
+        if len(wanted) < SINGLE_PASS_MIN_KEYWORDS:
+            for k in wanted:
+                pos = text_lower.find(k)
+                if pos != -1:
+                    self.first[k] = pos
+            return
+        pattern, prefixes = _keyword_matcher(tuple(sorted(wanted)))
+        for m in pattern.finditer(text_lower):
+            hit = m.group(1)
+            pos = m.start()
+            if hit not in self.first:
+                self.first[hit] = pos
+            for shorter in prefixes[hit]:
+                self.first.setdefault(shorter, pos)
+            if len(self.first) == len(wanted):
+                break
+
+    def find(self, keyword: str) -> int:
+        return self.first.get(keyword, -1)
+
+
+def _question_keywords(q_lower: str) -> List[str]:
+    return [word for word in q_lower.split() if len(word) > 3]
+
+
+def _question_kind(q_lower: str) -> str:
+    if "date" in q_lower or "effective" in q_lower:
+        return "date"
+    if "part" in q_lower or "entity" in q_lower or "compan" in q_lower:
+        return "parties"
+    if "law" in q_lower or "jurisdiction" in q_lower or "governing" in q_lower:
+        return "law"
+    if "termination" in q_lower or "term" in q_lower:
+        return "termination"
+    return "generic"
+
+
+class RuleBasedExtractor:
+    """
+    Offline extraction used when no LLM is configured. Model failures are
+    raised, not answered from here.
+
+    Patterns are compiled once at import, the date/party scans run once per
+    document rather than once per question, and every keyword lookup for all
+    questions is answered from one KeywordIndex pass, so cost is roughly
+    O(len(text) + number of questions).
+    """
+
+    def extract(self, text: str, questions: List[str]) -> List[Dict[str, Any]]:
+        text_lower = text.lower()
+        text_sample = text[:SAMPLE_CHARS]
+
+        kinds = [(q, q.lower(), _question_kind(q.lower())) for q in questions]
+
+        # Collect every keyword any question will look up, then index them in one pass
+        keywords: List[str] = []
+        for _, q_lower, kind in kinds:
+            if kind == "law":
+                keywords.extend(j.lower() for j in JURISDICTIONS)
+            elif kind == "termination":
+                keywords.append("termination")
+            elif kind == "generic":
+                keywords.extend(_question_keywords(q_lower))
+        index = KeywordIndex(text_lower, keywords)
+
+        dates: Optional[List[str]] = None
+        parties: Optional[List[str]] = None
+        results = []
+
+        for q, q_lower, kind in kinds:
+            if kind == "date":
+                if dates is None:
+                    dates = _DATE_RE.findall(text_sample)
+                val = dates[0] if dates else "Date not found in document"
+                conf = 0.75 if dates else 0.3
+                if dates:
+                    at = text_sample.find(val)
+                    citation = f"Found near: ...{text_sample[max(0, at - 50):at + 100]}..."
+                else:
+                    citation = "No date pattern detected"
+
+            elif kind == "parties":
+                if parties is None:
+                    # Unique names in order of first appearance among the first five matches
+                    parties = list(dict.fromkeys(_COMPANY_RE.findall(text_sample)[:5]))
+                val = ", ".join(parties) if parties else "Parties not clearly identified"
+                conf = 0.7 if parties else 0.4
+                citation = f"Identified entities: {', '.join(parties[:3])}" if parties else "No clear party names found"
+
+            elif kind == "law":
+                found = next((j for j in JURISDICTIONS if index.find(j.lower()) != -1), None)
+                val = f"Governed by laws of {found}" if found else "Jurisdiction not specified"
+                conf = 0.8 if found else 0.35
+                citation = f"Mention of {found} found in document" if found else "No jurisdiction keywords detected"
+
+            elif kind == "termination":
+                term_idx = index.find("termination")
+                if term_idx != -1:
+                    context = text[max(0, term_idx - 100):min(len(text), term_idx + 200)]
+                    val = "Termination clause present (see citation)"
+                    conf = 0.65
+                    citation = f"...{context}..."
+                else:
+                    val = "No termination clause found"
+                    conf = 0.4
+                    citation = "Keyword 'termination' not found in document"
+
+            else:
+                found_at = next(
+                    (index.find(kw) for kw in _question_keywords(q_lower) if index.find(kw) != -1), -1
+                )
+                if found_at != -1:
+                    context = text[max(0, found_at - 100):min(len(text), found_at + 200)]
+                    val = "Related content found (see citation)"
+                    conf = 0.55
+                    citation = f"...{context}..."
+                else:
+                    val = f"No clear answer found for: {q}"
+                    conf = 0.25
+                    citation = "Question keywords not found in document"
+
+            results.append({
+                "question": q,
+                "value": val,
+                "confidence": conf,
+                "citation": citation[:500]  # Limit citation length
+            })
+
+        return results
+
+
+rule_extractor = RuleBasedExtractor()
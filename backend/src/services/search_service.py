@@ -0,0 +1,186 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+import os
+import re
+import logging
+from sqlalchemy import and_, func, literal, null, or_, select, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.db_models import AnswerModel, DocumentModel, ProjectModel
+from ..models.schemas import SearchHit, SearchPage
+from ..indexing.parser import ParsedDocument
+from ..storage.db import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# Words of context kept around the hits in result snippets
+SEARCH_SNIPPET_TOKENS = int(os.getenv("SEARCH_SNIPPET_TOKENS", "12"))
+
+# "quoted phrases", words, and word* prefixes; everything else in the query is ignored
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\w+)(\*?)')
+_WORD_RE = re.compile(r"\w+")
+
+# Text of background parses is written here, off the parse pool's callback thread
+_index_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+
+# FROM/WHERE of each FTS5 search; bm25 weights are per indexed column
+_FTS_SOURCES = {
+    "documents": (
+        "'document' AS kind, d.project_id, p.name AS project_name, d.id AS document_id, d.filename, "
+        "NULL AS question_text, snippet(documents_fts, -1, '[', ']', ' ... ', :tokens) AS snippet, "
+        "bm25(documents_fts, 2.0, 1.0) AS rank",
+        "FROM documents_fts JOIN documents d ON d.search_rowid = documents_fts.rowid "
+        "LEFT JOIN projects p ON p.id = d.project_id "
+        "WHERE documents_fts MATCH :match",
+        "d.project_id",
+    ),
+    "answers": (
+        "'answer' AS kind, a.project_id, p.name AS project_name, a.document_id, d.filename, "
+        "a.question_text, snippet(answers_fts, -1, '[', ']', ' ... ', :tokens) AS snippet, "
+        "bm25(answers_fts, 1.0, 2.0) AS rank",
+        "FROM answers_fts JOIN answers a ON a.search_rowid = answers_fts.rowid "
+        "LEFT JOIN documents d ON d.id = a.document_id "
+        "LEFT JOIN projects p ON p.id = a.project_id "
+        "WHERE answers_fts MATCH :match",
+        "a.project_id",
+    ),
+}
+
+
+def match_expression(query: str) -> str:
+    """
+    FTS5 MATCH expression for a user query: every word and "quoted phrase"
+    must appear, and a trailing * matches a prefix. Operators and other
+    syntax are not passed through, so no query can be malformed.
+    """
+    terms = []
+    for phrase, word, star in _QUERY_TOKEN_RE.findall(query):
+        if phrase:
+            words = _WORD_RE.findall(phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word:
+            # An empty "" phrase matches with neither group set
+            terms.append(f'"{word}"{star}')
+    return " ".join(terms)
+
+
+class SearchService:
+    """
+    Ranked full-text search over document text and answer values.
+
+    On SQLite the documents_fts and answers_fts FTS5 tables (created in
+    storage.db.init_db) are kept in sync by triggers, so every insert,
+    update or delete of a document or answer updates the index in the same
+    transaction. Document text is stored once its parse is available: at
+    project creation or upload when the parse is cached, otherwise when the
+    queued parse finishes.
+    """
+
+    @staticmethod
+    def store_document_text(db: Session, filename: str, content: str) -> int:
+        """Set the text of every document row for `filename` whose stored text differs."""
+        result = db.execute(
+            update(DocumentModel)
+            .where(DocumentModel.filename == filename,
+                   or_(DocumentModel.content.is_(None), DocumentModel.content != content))
+            .values(content=content)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def index_parsed(file_path: str, parsed: ParsedDocument) -> None:
+        """Blocking: store a finished parse's text for the documents that reference the file."""
+        db = SessionLocal()
+        try:
+            updated = SearchService.store_document_text(db, os.path.basename(file_path), parsed.text)
+            db.commit()
+            if updated:
+                logger.info(f"Indexed text of {os.path.basename(file_path)} for {updated} documents")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not index {file_path}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def index_when_parsed(fut: Future, file_path: str) -> None:
+        """Store the text of a queued parse (see submit_parse) once it succeeds."""
+        def done(f: Future) -> None:
+            if not f.cancelled() and f.exception() is None:
+                _index_writer.submit(SearchService.index_parsed, file_path, f.result())
+        fut.add_done_callback(done)
+
+    @staticmethod
+    async def search(db: AsyncSession, query: str, scope: str = "all", project_id: Optional[str] = None,
+                     offset: int = 0, limit: int = 20) -> SearchPage:
+        expression = match_expression(query)
+        if not expression:
+            return SearchPage(items=[], total=0, offset=offset, limit=limit)
+        if engine.dialect.name != "sqlite":
+            return await SearchService._search_like(db, query, scope, project_id, offset, limit)
+
+        sources = [_FTS_SOURCES[s] for s in ("documents", "answers") if scope in ("all", s)]
+        params = {"match": expression, "tokens": SEARCH_SNIPPET_TOKENS, "offset": offset, "limit": limit}
+        if project_id:
+            params["project_id"] = project_id
+
+        def where(from_where: str, project_column: str) -> str:
+            return f"{from_where} AND {project_column} = :project_id" if project_id else from_where
+
+        total = 0
+        for _, from_where, project_column in sources:
+            total += (await db.execute(
+                text(f"SELECT count(*) {where(from_where, project_column)}"), params
+            )).scalar()
+        rows = (await db.execute(text(
+            " UNION ALL ".join(f"SELECT {columns} {where(from_where, project_column)}"
+                               for columns, from_where, project_column in sources)
+            + " ORDER BY rank LIMIT :limit OFFSET :offset"
+        ), params)).mappings().all()
+
+        return SearchPage(
+            # bm25 is lower-is-better; flip it so higher scores rank first
+            items=[SearchHit(**{k: v for k, v in row.items() if k != "rank"}, score=round(-row["rank"], 6))
+                   for row in rows],
+            total=total, offset=offset, limit=limit,
+        )
+
+    @staticmethod
+    async def _search_like(db: AsyncSession, query: str, scope: str, project_id: Optional[str],
+                           offset: int, limit: int) -> SearchPage:
+        """Unranked substring fallback for databases without FTS5."""
+        words = _WORD_RE.findall(query)
+        selects = []
+        if scope in ("all", "documents"):
+            conditions = [or_(DocumentModel.content.ilike(f"%{w}%"), DocumentModel.filename.ilike(f"%{w}%"))
+                          for w in words]
+            if project_id:
+                conditions.append(DocumentModel.project_id == project_id)
+            selects.append(
+                select(literal("document").label("kind"), DocumentModel.project_id,
+                       ProjectModel.name.label("project_name"), DocumentModel.id.label("document_id"),
+                       DocumentModel.filename, null().label("question_text"))
+                .outerjoin(ProjectModel, ProjectModel.id == DocumentModel.project_id)
+                .where(and_(*conditions))
+            )
+        if scope in ("all", "answers"):
+            conditions = [or_(AnswerModel.value.ilike(f"%{w}%"), AnswerModel.question_text.ilike(f"%{w}%"))
+                          for w in words]
+            if project_id:
+                conditions.append(AnswerModel.project_id == project_id)
+            selects.append(
+                select(literal("answer").label("kind"), AnswerModel.project_id,
+                       ProjectModel.name.label("project_name"), AnswerModel.document_id,
+                       DocumentModel.filename, AnswerModel.question_text)
+                .outerjoin(ProjectModel, ProjectModel.id == AnswerModel.project_id)
+                .outerjoin(DocumentModel, DocumentModel.id == AnswerModel.document_id)
+                .where(and_(*conditions))
+            )
+        hits = union_all(*selects).subquery()
+        total = (await db.execute(select(func.count()).select_from(hits))).scalar()
+        rows = (await db.execute(
+            select(hits).order_by(hits.c.filename, hits.c.kind).offset(offset).limit(limit)
+        )).mappings().all()
+        return SearchPage(items=[SearchHit(**row) for row in rows], total=total, offset=offset, limit=limit)
@@ -1,12 +1,66 @@
-from sqlalchemy import create_engine
+from typing import AsyncIterator
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import OperationalError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+import logging
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./legal_review.db"
+logger = logging.getLogger(__name__)
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./legal_review.db")
+
+def _async_url(url: str) -> str:
+    # Same database through an asyncio driver
+    for sync_prefix, async_prefix in (
+        ("sqlite:", "sqlite+aiosqlite:"),
+        ("postgresql+psycopg2:", "postgresql+asyncpg:"),
+        ("postgresql:", "postgresql+asyncpg:"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+# Used by the API's request-scoped sessions; extraction workers keep the sync engine
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(SQLALCHEMY_DATABASE_URL))
+
+# Connection pool sizing; extraction workers and API requests share this engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# How long a SQLite writer waits for the lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+_is_sqlite = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False} if _is_sqlite else {},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
 )
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+
+def _configure_sqlite(dbapi_conn, _record):
+    # WAL lets readers proceed while an extraction job is writing
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+if _is_sqlite:
+    event.listen(engine, "connect", _configure_sqlite)
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -17,5 +71,120 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Request-scoped session for FastAPI routes (use with Depends)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def dialect_insert(table):
+    """
+    INSERT construct supporting on_conflict_do_update for the active backend.
+    """
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+def _add_missing_columns() -> set:
+    """
+    create_all() never alters existing tables, so add any newly declared
+    columns to an existing database. Only additive, nullable changes are handled.
+    """
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                added.add((table.name, column.name))
+    return added
+
+def _add_missing_indexes() -> None:
+    # Same story as columns: indexes declared after a table was created are not added by create_all()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except (OperationalError, IntegrityError) as e:
+                logger.warning(f"Could not create index {index.name}: {e}")
+
+# Column linking a row to its FTS entry. The tables have string primary keys, so
+# their implicit rowid is not stable: VACUUM may renumber it.
+SEARCH_ROWID = "search_rowid"
+_FTS_TRIGGERS = ("ai", "ad", "au")
+
+def _fts_table(name: str, source: str, columns: tuple) -> list:
+    """
+    DDL for an external-content FTS5 table over `source` plus the triggers
+    that keep it in step with every insert, update and delete. New rows get
+    the next search_rowid on insert; it never changes afterwards.
+    """
+    cols = ", ".join(columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({cols}, content='{source}', "
+        f"content_rowid='{SEARCH_ROWID}', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {source} BEGIN "
+        f"UPDATE {source} SET {SEARCH_ROWID} = (SELECT coalesce(max({SEARCH_ROWID}), 0) + 1 FROM {source}) "
+        f"WHERE rowid = new.rowid; "
+        f"INSERT INTO {name}(rowid, {cols}) SELECT {SEARCH_ROWID}, {cols} FROM {source} "
+        f"WHERE rowid = new.rowid; END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.{SEARCH_ROWID}, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.{SEARCH_ROWID}, {old}); "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.{SEARCH_ROWID}, {new}); END",
+    ]
+
+# Full-text indexes behind /search; they store no text of their own, only the inverted index
+SEARCH_INDEXES = {
+    "documents_fts": ("documents", ("filename", "content")),
+    "answers_fts": ("answers", ("question_text", "value")),
+}
+
+def _create_search_indexes() -> None:
+    if not _is_sqlite:
+        # Search falls back to LIKE scans on other databases
+        return
+    with engine.begin() as conn:
+        existing = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'table'")).all())
+        for name, (source, columns) in SEARCH_INDEXES.items():
+            if name in existing and f"content_rowid='{SEARCH_ROWID}'" not in existing[name]:
+                # Built on the implicit rowid by an earlier version; relink it through search_rowid
+                conn.execute(text(f"DROP TABLE {name}"))
+                for trigger in _FTS_TRIGGERS:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {name}_{trigger}"))
+                del existing[name]
+            # Rows written before the triggers existed, numbered past any key already in use
+            conn.execute(text(
+                f"UPDATE {source} SET {SEARCH_ROWID} = "
+                f"(SELECT coalesce(max({SEARCH_ROWID}), 0) FROM {source}) + rowid WHERE {SEARCH_ROWID} IS NULL"
+            ))
+            for statement in _fts_table(name, source, columns):
+                conn.execute(text(statement))
+            if name not in existing:
+                # Index rows written before the FTS table existed
+                conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+
 def init_db():
+    added = _add_missing_columns()
     Base.metadata.create_all(bind=engine)
+    if ("answers", "document_id") in added:
+        # Older answers only recorded their document through the citation's filename
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE answers SET document_id = ("
+                " SELECT d.id FROM documents d WHERE d.project_id = answers.project_id"
+                " AND d.filename = json_extract(answers.citations, '$[0].source') LIMIT 1)"
+                " WHERE document_id IS NULL"
+            ))
+    _add_missing_indexes()
+    _create_search_indexes()
@@ -0,0 +1,307 @@
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+import logging
+from sqlalchemy import func, or_
+from ..models.db_models import JobModel
+from ..models.schemas import JobProgress, ProcessStatus, RequestStatus
+from ..storage.db import SessionLocal
+from ..services.project_service import ProjectService
+from ..monitoring.metrics import stage_timer
+from ..monitoring.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+# Number of extraction jobs that may run at once in this process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# How often this process marks its unfinished jobs alive, and how long a job may go
+# without a heartbeat before another process (or a restart) fails it as orphaned
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S", "15"))
+JOB_STALE_AFTER_S = float(os.getenv("JOB_STALE_AFTER_S", "120"))
+
+# Identifies this process as the owner of the jobs it queues
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_FINISHED = {ProcessStatus.COMPLETED, ProcessStatus.FAILED, ProcessStatus.CANCELLED}
+_UNFINISHED = [ProcessStatus.PENDING, ProcessStatus.PROCESSING]
+
+
+class JobContext:
+    """
+    Handle given to a running job for reporting progress and checking
+    whether it has been cancelled.
+    """
+
+    def __init__(self, job_id: str, cancel_event: threading.Event):
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def start(self, total_documents: int, total_answers: int) -> None:
+        self._update(total_documents=total_documents, total_answers=total_answers)
+
+    def document_done(self, failed: bool, answers: int) -> None:
+        db = SessionLocal()
+        try:
+            job = db.get(JobModel, self.job_id)
+            if job is None:
+                return
+            if failed:
+                job.failed_documents = (job.failed_documents or 0) + 1
+            else:
+                job.completed_documents = (job.completed_documents or 0) + 1
+            job.completed_answers = (job.completed_answers or 0) + answers
+            db.commit()
+        finally:
+            db.close()
+
+    def _update(self, **fields) -> None:
+        db = SessionLocal()
+        try:
+            job = db.get(JobModel, self.job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+            db.commit()
+        finally:
+            db.close()
+
+
+class JobQueue:
+    """
+    In-process queue of extraction jobs backed by the `jobs` table.
+
+    Jobs are persisted on submit so their status survives the request, then
+    executed by a small pool of daemon worker threads. Running jobs stop at
+    the next document boundary once cancelled.
+
+    Each job records the process that owns it, which heartbeats its
+    unfinished jobs; jobs whose owner stopped heartbeating are failed by
+    recover() at startup and by any live process's heartbeat thereafter.
+    Jobs of other live processes sharing the database are left alone.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._heartbeat: Optional[threading.Thread] = None
+        self.running = 0
+
+    def recover(self) -> int:
+        """Fail jobs orphaned by stopped processes and start heartbeating; called at app startup."""
+        self._ensure_heartbeat()
+        return self._fail_stale_jobs()
+
+    def _ensure_started(self) -> None:
+        self._ensure_heartbeat()
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _ensure_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            time.sleep(JOB_HEARTBEAT_S)
+            try:
+                self._touch_owned_jobs()
+                self._fail_stale_jobs()
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+    def _touch_owned_jobs(self) -> None:
+        db = SessionLocal()
+        try:
+            db.query(JobModel).filter(
+                JobModel.owner == INSTANCE_ID, JobModel.status.in_(_UNFINISHED)
+            ).update(
+                # Keep updated_at for real state changes
+                {JobModel.heartbeat_at: datetime.utcnow(), JobModel.updated_at: JobModel.updated_at},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail_stale_jobs(self) -> int:
+        # Rows from before owners were recorded fall back to their last update
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER_S)
+        db = SessionLocal()
+        try:
+            failed = db.query(JobModel).filter(
+                JobModel.status.in_(_UNFINISHED),
+                or_(JobModel.owner.is_(None), JobModel.owner != INSTANCE_ID),
+                func.coalesce(JobModel.heartbeat_at, JobModel.updated_at, JobModel.created_at) < cutoff,
+            ).update(
+                {JobModel.status: ProcessStatus.FAILED,
+                 JobModel.error: "Interrupted: the server running it stopped"},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+        if failed:
+            logger.warning(f"Failed {failed} orphaned jobs with no heartbeat for {JOB_STALE_AFTER_S:.0f}s")
+        return failed
+
+    def submit(self, project_id: str, questions: List[str], force: bool = False) -> str:
+        self._ensure_started()
+        db = SessionLocal()
+        try:
+            job = JobModel(project_id=project_id, questions=questions, force=force, status=ProcessStatus.PENDING,
+                           owner=INSTANCE_ID, heartbeat_at=datetime.utcnow())
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self._queue.put(job_id)
+        logger.info(f"Queued job {job_id} for project {project_id} ({len(questions)} questions)")
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            job = db.get(JobModel, job_id)
+            if job is None:
+                return False
+            if job.status in _FINISHED:
+                return True
+            job.cancel_requested = True
+            if job.status == ProcessStatus.PENDING:
+                job.status = ProcessStatus.CANCELLED
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        return True
+
+    def cancel_project(self, project_id: str) -> int:
+        """Cancel every unfinished job of a project, e.g. before it is deleted."""
+        db = SessionLocal()
+        try:
+            job_ids = [job_id for (job_id,) in db.query(JobModel.id).filter(
+                JobModel.project_id == project_id, JobModel.status.in_(_UNFINISHED)
+            )]
+        finally:
+            db.close()
+        for job_id in job_ids:
+            self.cancel(job_id)
+        return len(job_ids)
+
+    def get_status(self, job_id: str) -> Optional[RequestStatus]:
+        db = SessionLocal()
+        try:
+            job = db.get(JobModel, job_id)
+            if job is None:
+                return None
+            return RequestStatus(
+                request_id=job.id,
+                status=job.status,
+                project_id=job.project_id,
+                progress=JobProgress(
+                    total_documents=job.total_documents or 0,
+                    completed_documents=job.completed_documents or 0,
+                    failed_documents=job.failed_documents or 0,
+                    total_answers=job.total_answers or 0,
+                    completed_answers=job.completed_answers or 0,
+                ),
+                error=job.error,
+            )
+        finally:
+            db.close()
+
+    def _worker_loop(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {e}")
+            finally:
+                with self._lock:
+                    self._cancel_events.pop(job_id, None)
+                self._queue.task_done()
+
+    def _set_status(self, job_id: str, status: ProcessStatus, error: Optional[str] = None) -> None:
+        db = SessionLocal()
+        try:
+            job = db.get(JobModel, job_id)
+            if job is None:
+                return
+            job.status = status
+            job.error = error
+            job.updated_at = datetime.utcnow()
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            job = db.get(JobModel, job_id)
+            if job is None or job.status != ProcessStatus.PENDING:
+                return
+            project_id, questions, force = job.project_id, list(job.questions or []), bool(job.force)
+            job.status = ProcessStatus.PROCESSING
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            cancel_event = self._cancel_events.setdefault(job_id, threading.Event())
+        context = JobContext(job_id, cancel_event)
+
+        with self._lock:
+            self.running += 1
+        try:
+            with profiled(job_id), stage_timer("job"):
+                project = ProjectService.run_generation(project_id, questions, job=context, force=force)
+        except Exception as e:
+            self._set_status(job_id, ProcessStatus.FAILED, error=str(e))
+            return
+        finally:
+            with self._lock:
+                self.running -= 1
+
+        if project is None:
+            self._set_status(job_id, ProcessStatus.FAILED, error="Project not found")
+        elif context.cancelled:
+            self._set_status(job_id, ProcessStatus.CANCELLED)
+        else:
+            self._set_status(job_id, ProcessStatus.COMPLETED)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), "running": self.running}
+
+
+job_queue = JobQueue()
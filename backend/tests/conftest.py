@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# Tests import the app as `src.*` and the fake server from benchmarks/, like the app and benchmarks do
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Settings are read at import; point the database and caches at a scratch directory and
+# keep the model offline before any src module is imported
+_SCRATCH = tempfile.mkdtemp(prefix="legal-review-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_SCRATCH, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["LLM_CACHE_PATH"] = os.path.join(_SCRATCH, "llm-cache.sqlite")
+os.environ["PARSE_CACHE_DIR"] = os.path.join(_SCRATCH, "parse-cache")
+os.environ["CLAUSE_DIFF_CACHE_DIR"] = os.path.join(_SCRATCH, "clause-diff")
+os.environ["GEMINI_API_KEY"] = ""
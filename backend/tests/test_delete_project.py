@@ -0,0 +1,63 @@
+"""Deleting a project removes its jobs too, after cancelling unfinished ones."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import app
+from src.models.db_models import AnswerModel, DocumentModel, JobModel, ProjectModel
+from src.models.schemas import ProcessStatus
+from src.storage.db import SessionLocal, async_engine, engine, init_db
+
+
+def _enforce_foreign_keys(dbapi_conn, _record):
+    # Off by default in SQLite; on here so deletes behave as they would on Postgres
+    dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture
+def client():
+    init_db()
+    event.listen(engine, "connect", _enforce_foreign_keys)
+    event.listen(async_engine.sync_engine, "connect", _enforce_foreign_keys)
+    engine.dispose()
+    async_engine.sync_engine.dispose()
+    yield TestClient(app)
+    event.remove(engine, "connect", _enforce_foreign_keys)
+    event.remove(async_engine.sync_engine, "connect", _enforce_foreign_keys)
+    engine.dispose()
+    async_engine.sync_engine.dispose()
+
+
+def test_delete_project_removes_and_cancels_jobs(client):
+    db = SessionLocal()
+    try:
+        project = ProjectModel(name="to delete", description="")
+        db.add(project)
+        db.flush()
+        document = DocumentModel(project_id=project.id, filename="a.txt", status="parsed")
+        db.add(document)
+        db.flush()
+        db.add(AnswerModel(project_id=project.id, document_id=document.id, question_id="q", question_text="Q"))
+        done = JobModel(project_id=project.id, status=ProcessStatus.COMPLETED)
+        queued = JobModel(project_id=project.id, status=ProcessStatus.PENDING)
+        db.add_all([done, queued])
+        db.commit()
+        project_id, job_ids = project.id, [done.id, queued.id]
+    finally:
+        db.close()
+
+    response = client.delete(f"/api/delete-project/{project_id}")
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        assert db.query(JobModel).filter(JobModel.project_id == project_id).count() == 0
+        assert db.get(ProjectModel, project_id) is None
+    finally:
+        db.close()
+    for job_id in job_ids:
+        assert client.get(f"/api/get-request-status/{job_id}").status_code == 404
+
+
+def test_delete_unknown_project(client):
+    assert client.delete("/api/delete-project/missing").status_code == 404
@@ -0,0 +1,104 @@
+"""
+Incremental answer generation: only missing or invalidated cells are
+extracted, and a changed file invalidates every answer of that document.
+"""
+import os
+
+import pytest
+
+from src.models import db_models  # noqa: F401  (registers the tables)
+from src.models.db_models import AnswerModel, DocumentModel, ProjectModel
+from src.models.schemas import ProcessStatus
+from src.services import project_service
+from src.services.project_service import ProjectService
+from src.storage.db import SessionLocal, init_db
+
+CONTRACT = (
+    "SUPPLY AGREEMENT\n\n"
+    "This Agreement is entered into on {date} between Acme Corp and Globex Inc.\n\n"
+    "This Agreement shall be governed by the laws of the State of {state}.\n"
+)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    init_db()
+    monkeypatch.setattr(project_service, "DATA_DIR", str(tmp_path))
+    db = SessionLocal()
+    try:
+        project = ProjectModel(name="incremental", description="")
+        db.add(project)
+        db.flush()
+        db.add(DocumentModel(project_id=project.id, filename="contract.txt", status="pending"))
+        db.commit()
+        project_id = project.id
+    finally:
+        db.close()
+    yield project_id, tmp_path / "contract.txt"
+
+
+def write_contract(path, date: str, state: str = "Delaware") -> None:
+    path.write_text(CONTRACT.format(date=date, state=state), encoding="utf-8")
+    # Hashes are memoized per (size, mtime); make sure an edit is seen as one
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+
+def answers(project_id: str) -> dict:
+    db = SessionLocal()
+    try:
+        rows = db.query(AnswerModel).filter(AnswerModel.project_id == project_id).all()
+        return {a.question_text: (a.value, a.status) for a in rows}
+    finally:
+        db.close()
+
+
+def planned_cells(project_id: str, questions) -> int:
+    db = SessionLocal()
+    try:
+        project = db.get(ProjectModel, project_id)
+        items, _ = ProjectService._plan_cells(db, project, questions, force=False)
+        return sum(len(needed) for _, _, needed in items)
+    finally:
+        db.close()
+
+
+def test_unchanged_cells_are_not_extracted_again(project):
+    project_id, path = project
+    write_contract(path, "January 1, 2020")
+    ProjectService.run_generation(project_id, ["Effective Date"])
+
+    assert planned_cells(project_id, ["Effective Date"]) == 0
+    assert planned_cells(project_id, ["Effective Date", "Governing Law"]) == 1
+
+
+def test_changed_file_invalidates_answers_to_other_questions(project):
+    project_id, path = project
+    write_contract(path, "January 1, 2020")
+    ProjectService.run_generation(project_id, ["Effective Date"])
+    assert answers(project_id)["Effective Date"] == ("January 1, 2020", ProcessStatus.COMPLETED)
+
+    # Edit the file, then ask only about something else
+    write_contract(path, "March 3, 2021")
+    ProjectService.run_generation(project_id, ["Governing Law"])
+    after_edit = answers(project_id)
+    assert after_edit["Governing Law"][1] == ProcessStatus.COMPLETED
+    assert after_edit["Effective Date"][1] == ProcessStatus.PENDING
+
+    # The stale date is re-extracted, not reused
+    assert planned_cells(project_id, ["Effective Date", "Governing Law"]) == 1
+    ProjectService.run_generation(project_id, ["Effective Date", "Governing Law"])
+    assert answers(project_id)["Effective Date"] == ("March 3, 2021", ProcessStatus.COMPLETED)
+
+
+def test_force_extracts_every_cell(project):
+    project_id, path = project
+    write_contract(path, "January 1, 2020")
+    ProjectService.run_generation(project_id, ["Effective Date", "Governing Law"])
+    db = SessionLocal()
+    try:
+        items, _ = ProjectService._plan_cells(db, db.get(ProjectModel, project_id),
+                                              ["Effective Date", "Governing Law"], force=True)
+    finally:
+        db.close()
+    assert sum(len(needed) for _, _, needed in items) == 2
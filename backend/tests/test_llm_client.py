@@ -0,0 +1,176 @@
+"""
+RateLimitedClient against the local fake Gemini server: client-side
+throttling, retry with backoff on 429/503, and circuit breaker transitions.
+"""
+import json
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from fake_gemini_server import FakeGemini, make_handler
+from src.services import llm_client as llm_client_module
+from src.services.llm_client import CircuitBreaker, LLMUnavailableError, RateLimitedClient, TokenBucket
+
+PROMPT = 'Questions: [{"id": "q1", "question": "Governing law?", "excerpts": []}] Output format: JSON'
+
+
+@pytest.fixture
+def fake():
+    fake = FakeGemini(rpm=1000, latency=0.0, error_rate=0.0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fake))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client_module, "LLM_BACKOFF_BASE_S", 0.01)
+    monkeypatch.setattr(llm_client_module, "LLM_BACKOFF_MAX_S", 0.02)
+
+
+def sender(fake, method: str = "generateContent"):
+    """A send callable posting to the fake server; HTTP errors carry .code like the SDK's."""
+    def send(prompt: str, timeout: float) -> str:
+        body = json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode("utf-8")
+        request = urllib.request.Request(f"{fake.url}/v1beta/models/fake:{method}", data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = json.loads(response.read())
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+    return send
+
+
+def make_client(max_retries: int = 3, breaker: CircuitBreaker = None, rpm: int = 6000) -> RateLimitedClient:
+    return RateLimitedClient(requests_per_minute=rpm, tokens_per_minute=10_000_000, max_retries=max_retries,
+                             timeout=5.0, breaker=breaker or CircuitBreaker(failure_threshold=2, reset_seconds=0.2))
+
+
+def test_success_returns_answer_text(fake):
+    client = make_client()
+    answers = json.loads(client.generate(PROMPT, sender(fake)))
+    assert answers[0]["id"] == "q1"
+    assert client.stats()["calls"] == 1
+    assert client.breaker.state == "closed"
+
+
+def test_request_bucket_paces_calls():
+    # 120/min with a 1 s burst holds 2 requests; the next two wait ~0.5 s each
+    bucket = TokenBucket(120, burst_seconds=1.0)
+    started = time.monotonic()
+    waited = sum(bucket.acquire(1) for _ in range(4))
+    assert time.monotonic() - started >= 0.9
+    assert waited >= 0.9
+
+
+def test_server_throttling_is_retried_then_gives_up(fake):
+    fake.rpm = 1
+    client = make_client(max_retries=2)
+    client.generate(PROMPT, sender(fake))
+    with pytest.raises(LLMUnavailableError):
+        client.generate(PROMPT, sender(fake))
+    stats = client.stats()
+    assert fake.throttled == 3
+    assert stats["throttled"] == 3
+    assert stats["retries"] == 2
+    assert stats["failures"] == 1
+    # A 429 empties the local bucket so the next call waits for refill instead of piling on
+    assert client.requests.tokens < 1
+
+
+def test_transient_errors_are_retried_with_backoff(fake, monkeypatch):
+    delays = []
+    monkeypatch.setattr(llm_client_module.time, "sleep", lambda s: delays.append(s))
+    fake.error_rate = 1.0
+    send = sender(fake)
+
+    def recover_after_two(prompt: str, timeout: float) -> str:
+        if fake.failed >= 2:
+            fake.error_rate = 0.0
+        return send(prompt, timeout)
+
+    client = make_client(max_retries=3)
+    assert json.loads(client.generate(PROMPT, recover_after_two))[0]["id"] == "q1"
+    assert fake.failed == 2
+    assert client.stats()["retries"] == 2
+    assert len(delays) == 2
+    assert all(0 <= d <= 0.02 for d in delays)
+    assert client.breaker.failures == 0
+
+
+def test_breaker_opens_rejects_and_closes_after_trial(fake):
+    fake.error_rate = 1.0
+    client = make_client(max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            client.generate(PROMPT, sender(fake))
+    assert client.breaker.state == "open"
+
+    sent = fake.failed + fake.served
+    with pytest.raises(LLMUnavailableError, match="circuit is open"):
+        client.generate(PROMPT, sender(fake))
+    assert fake.failed + fake.served == sent
+    assert client.stats()["rejected_open_circuit"] == 1
+
+    time.sleep(0.25)
+    assert client.breaker.state == "half_open"
+    fake.error_rate = 0.0
+    client.generate(PROMPT, sender(fake))
+    assert client.breaker.state == "closed"
+
+
+def test_failed_trial_reopens_circuit(fake):
+    fake.error_rate = 1.0
+    client = make_client(max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            client.generate(PROMPT, sender(fake))
+    time.sleep(0.25)
+    with pytest.raises(LLMUnavailableError, match="after 1 attempt"):
+        client.generate(PROMPT, sender(fake))
+    assert client.breaker.state == "open"
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_non_retryable_error_releases_trial(fake):
+    fake.error_rate = 1.0
+    client = make_client(max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            client.generate(PROMPT, sender(fake))
+    time.sleep(0.25)
+
+    # The trial hits a 404: not counted against the service, but the slot must be freed
+    with pytest.raises(urllib.error.HTTPError) as error:
+        client.generate(PROMPT, sender(fake, method="unknownMethod"))
+    assert error.value.code == 404
+    assert client.breaker.state == "half_open"
+
+    fake.error_rate = 0.0
+    client.generate(PROMPT, sender(fake))
+    assert client.breaker.state == "closed"
+
+
+def test_release_trial_ignores_other_threads():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    releaser = threading.Thread(target=breaker.release_trial)
+    releaser.start()
+    releaser.join()
+    assert not breaker.allow()
@@ -0,0 +1,143 @@
+"""
+Full-text search: query translation and the FTS5 indexes the triggers keep
+in step with documents and answers.
+"""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from src.models import db_models  # noqa: F401  (registers the tables)
+from src.models.db_models import AnswerModel, DocumentModel, ProjectModel
+from src.services.project_service import ProjectService
+from src.services.search_service import SearchService, match_expression
+from src.storage.db import AsyncSessionLocal, SEARCH_INDEXES, SessionLocal, engine, init_db
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("governing law", '"governing" "law"'),
+    ('"governing law" delaware', '"governing law" "delaware"'),
+    ("terminat*", '"terminat"*'),
+    ("law OR NOT delaware", '"law" "OR" "NOT" "delaware"'),
+    ('law AND (x NEAR y) col:val ^start -minus', '"law" "AND" "x" "NEAR" "y" "col" "val" "start" "minus"'),
+    ('"unclosed phrase', '"unclosed" "phrase"'),
+    ('"" *** ()', ""),
+])
+def test_match_expression(query, expected):
+    assert match_expression(query) == expected
+
+
+def test_operator_input_is_a_valid_query():
+    init_db()
+    for query in ("law OR NOT", 'NEAR(a b', "col:val", "^start -minus"):
+        page = search(query)
+        assert page.total == 0
+
+
+def search(query: str, scope: str = "all", project_id: str = None):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await SearchService.search(db, query, scope=scope, project_id=project_id)
+    return asyncio.run(run())
+
+
+def integrity_check() -> None:
+    # Raises if an external-content FTS index disagrees with its table
+    with engine.begin() as conn:
+        for name in SEARCH_INDEXES:
+            conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('integrity-check')"))
+
+
+@pytest.fixture
+def project_id():
+    init_db()
+    db = SessionLocal()
+    try:
+        project = ProjectModel(name="search", description="")
+        db.add(project)
+        db.commit()
+        yield project.id
+    finally:
+        db.close()
+
+
+def add_document(project_id: str, filename: str, content: str) -> str:
+    db = SessionLocal()
+    try:
+        document = DocumentModel(project_id=project_id, filename=filename, content=content)
+        db.add(document)
+        db.commit()
+        return document.id
+    finally:
+        db.close()
+
+
+def hits(query: str, project_id: str):
+    return [(h.kind, h.filename) for h in search(query, project_id=project_id).items]
+
+
+def test_document_insert_update_delete_stay_in_sync(project_id):
+    doc_id = add_document(project_id, "lease.txt", "The tenant shall pay rent monthly")
+    add_document(project_id, "nda.txt", "Confidential information shall not be disclosed")
+    assert hits("rent", project_id) == [("document", "lease.txt")]
+    integrity_check()
+
+    db = SessionLocal()
+    try:
+        db.get(DocumentModel, doc_id).content = "The licensee shall pay royalties quarterly"
+        db.commit()
+    finally:
+        db.close()
+    assert hits("rent", project_id) == []
+    assert hits("royalties", project_id) == [("document", "lease.txt")]
+    integrity_check()
+
+    db = SessionLocal()
+    try:
+        db.delete(db.get(DocumentModel, doc_id))
+        db.commit()
+    finally:
+        db.close()
+    assert hits("royalties", project_id) == []
+    assert hits("confidential", project_id) == [("document", "nda.txt")]
+    integrity_check()
+
+
+def test_answer_upsert_updates_the_index(project_id):
+    doc_id = add_document(project_id, "supply.txt", "Supply agreement")
+    row = dict(id=str(uuid.uuid4()), project_id=project_id, document_id=doc_id, question_id="q-law",
+               question_text="Governing Law", value="Governed by laws of Delaware", confidence=0.8,
+               citations=[], status="completed")
+    db = SessionLocal()
+    try:
+        ProjectService._upsert_answers(db, [row])
+        db.commit()
+        assert hits("delaware", project_id) == [("answer", "supply.txt")]
+
+        # Same cell again: the conflict path updates the row and must re-index it
+        ProjectService._upsert_answers(db, [{**row, "id": str(uuid.uuid4()), "value": "Governed by laws of Texas"}])
+        db.commit()
+    finally:
+        db.close()
+    assert hits("delaware", project_id) == []
+    assert hits("texas", project_id) == [("answer", "supply.txt")]
+    integrity_check()
+
+
+def test_index_survives_renumbered_rowids(project_id):
+    # VACUUM may renumber the implicit rowid of tables without an INTEGER PRIMARY KEY
+    add_document(project_id, "first.txt", "Warranty period of twelve months")
+    add_document(project_id, "second.txt", "Indemnification by the supplier")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE documents SET rowid = rowid + 1000"))
+    assert hits("warranty", project_id) == [("document", "first.txt")]
+    assert hits("indemnification", project_id) == [("document", "second.txt")]
+    integrity_check()
+
+
+def test_search_scope_and_project_filter(project_id):
+    add_document(project_id, "scoped.txt", "Arbitration in Singapore")
+    assert search("arbitration", scope="answers", project_id=project_id).total == 0
+    assert search("arbitration", scope="documents", project_id=project_id).total == 1
+    assert search("arbitration", project_id="another-project").total == 0
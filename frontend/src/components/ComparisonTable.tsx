@@ -10,6 +10,7 @@ interface ComparisonTableProps {
             value: string;
             confidence: number;
             citation?: string;
+            citations?: { page_number?: number }[];
         }[];
     }[];
 }
@@ -67,6 +68,7 @@ export const ComparisonTable: React.FC<ComparisonTableProps> = ({ questions, doc
                                                             fontWeight: 500
                                                         }}>
                                                             📄 View Citation
+                                                            {ans.citations?.[0]?.page_number != null && ` (p. ${ans.citations?.[0]?.page_number})`}
                                                         </summary>
                                                         <div style={{
                                                             marginTop: 'var(--spacing-sm)',
@@ -5,12 +5,16 @@ import { ComparisonTable } from '../components/ComparisonTable';
 import { FieldEditor } from '../components/FieldEditor';
 import { FilterPanel, FilterState } from '../components/FilterPanel';
 import { DocumentPreview } from '../components/DocumentPreview';
-import { ExportService } from '../services/export';
+
+// Answers are fetched a page at a time; more are loaded on request
+const ANSWER_PAGE_SIZE = 500;
 
 export const ProjectDetail: React.FC = () => {
     const { id } = useParams<{ id: string }>();
     const [project, setProject] = useState<Project | null>(null);
     const [loading, setLoading] = useState(false);
+    const [answerTotal, setAnswerTotal] = useState(0);
+    const [loadingAnswers, setLoadingAnswers] = useState(false);
     const [generating, setGenerating] = useState(false);
     const [previewDoc, setPreviewDoc] = useState<{ id: string; filename: string } | null>(null);
     const [filters, setFilters] = useState<FilterState>({
@@ -34,8 +38,12 @@ export const ProjectDetail: React.FC = () => {
     const loadProject = async (projectId: string) => {
         setLoading(true);
         try {
-            const data = await api.getProject(projectId);
-            setProject(data);
+            const [data, page] = await Promise.all([
+                api.getProject(projectId),
+                api.getProjectAnswers(projectId, 0, ANSWER_PAGE_SIZE),
+            ]);
+            setProject({ ...data, answers: page.items });
+            setAnswerTotal(page.total);
         } catch (error) {
             console.error(error);
         } finally {
@@ -43,12 +51,32 @@ export const ProjectDetail: React.FC = () => {
         }
     };
 
+    const loadMoreAnswers = async () => {
+        if (!project) return;
+        setLoadingAnswers(true);
+        try {
+            const page = await api.getProjectAnswers(project.id, project.answers.length, ANSWER_PAGE_SIZE);
+            setProject(current => current && { ...current, answers: [...current.answers, ...page.items] });
+            setAnswerTotal(page.total);
+        } catch (error) {
+            console.error(error);
+        } finally {
+            setLoadingAnswers(false);
+        }
+    };
+
     const handleGenerate = async () => {
         if (!project) return;
         setGenerating(true);
         try {
-            await api.generateAnswers(project.id, fields);
-            setTimeout(() => loadProject(project.id), 1000);
+            const { request_id } = await api.generateAnswers(project.id, fields);
+            // Extraction runs as a background job; poll until it finishes
+            let status = await api.getRequestStatus(request_id);
+            while (status.status === 'pending' || status.status === 'processing') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                status = await api.getRequestStatus(request_id);
+            }
+            await loadProject(project.id);
         } catch (error) {
             console.error(error);
         } finally {
@@ -56,24 +84,15 @@ export const ProjectDetail: React.FC = () => {
         }
     };
 
+    // Exports are built server-side from every stored answer and streamed as a download
     const handleExportCSV = () => {
         if (!project) return;
-        const comparisonData = [{
-            id: project.id,
-            filename: "Consolidated Results",
-            answers: project.answers
-        }];
-        ExportService.exportExtractionResults(project.name, fields, comparisonData);
+        window.location.href = api.exportUrl(project.id, 'csv');
     };
 
     const handleExportExcel = () => {
         if (!project) return;
-        const comparisonData = [{
-            id: project.id,
-            filename: "Consolidated Results",
-            answers: project.answers
-        }];
-        ExportService.exportExtractionResultsToExcel(project.name, fields, comparisonData);
+        window.location.href = api.exportUrl(project.id, 'xlsx');
     };
 
     if (loading && !project) {
@@ -267,6 +286,17 @@ export const ProjectDetail: React.FC = () => {
                         </p>
                     </div>
                 )}
+
+                {project.answers.length < answerTotal && (
+                    <div style={{ display: 'flex', justifyContent: 'center', alignItems: 'center', gap: 'var(--spacing-md)', marginTop: 'var(--spacing-lg)' }}>
+                        <span style={{ fontSize: '0.875rem', color: 'var(--text-secondary)' }}>
+                            Showing {project.answers.length} of {answerTotal} answers; filters apply to loaded answers
+                        </span>
+                        <button onClick={loadMoreAnswers} disabled={loadingAnswers} className="btn btn-secondary">
+                            {loadingAnswers ? 'Loading...' : `Load ${Math.min(ANSWER_PAGE_SIZE, answerTotal - project.answers.length)} more`}
+                        </button>
+                    </div>
+                )}
             </div>
 
             {previewDoc && (
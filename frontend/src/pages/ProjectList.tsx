@@ -2,8 +2,12 @@ import React, { useEffect, useState } from 'react';
 import { api, Project } from '../services/api';
 import { Link } from 'react-router-dom';
 
+const PROJECT_PAGE_SIZE = 20;
+
 export const ProjectList: React.FC = () => {
     const [projects, setProjects] = useState<Project[]>([]);
+    const [projectOffset, setProjectOffset] = useState(0);
+    const [projectTotal, setProjectTotal] = useState(0);
     const [newProjectName, setNewProjectName] = useState('');
     const [availableFiles, setAvailableFiles] = useState<string[]>([]);
     const [selectedFiles, setSelectedFiles] = useState<Set<string>>(new Set());
@@ -11,15 +15,24 @@ export const ProjectList: React.FC = () => {
     const [loadingProjects, setLoadingProjects] = useState(true);
 
     useEffect(() => {
-        loadProjects();
         loadFiles();
     }, []);
 
-    const loadProjects = async () => {
+    useEffect(() => {
+        loadProjects(projectOffset);
+    }, [projectOffset]);
+
+    const loadProjects = async (offset = projectOffset) => {
         setLoadingProjects(true);
         try {
-            const data = await api.listProjects();
-            setProjects(data);
+            const page = await api.listProjects(offset, PROJECT_PAGE_SIZE);
+            // Deleting the last project on a page leaves it empty; step back a page
+            if (page.items.length === 0 && offset > 0) {
+                setProjectOffset(Math.max(0, offset - PROJECT_PAGE_SIZE));
+                return;
+            }
+            setProjects(page.items);
+            setProjectTotal(page.total);
         } catch (error) {
             console.error(error);
         } finally {
@@ -46,6 +59,23 @@ export const ProjectList: React.FC = () => {
         setSelectedFiles(newSet);
     };
 
+    const handleUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
+        const files = Array.from(e.target.files || []);
+        e.target.value = '';
+        if (files.length === 0) return;
+        setLoading(true);
+        try {
+            const uploaded = await api.uploadDocuments(files);
+            await loadFiles();
+            setSelectedFiles(new Set([...selectedFiles, ...uploaded.map(f => f.filename)]));
+        } catch (error) {
+            console.error(error);
+            alert('Failed to upload documents');
+        } finally {
+            setLoading(false);
+        }
+    };
+
     const handleCreate = async () => {
         if (!newProjectName) return;
         setLoading(true);
@@ -53,7 +83,9 @@ export const ProjectList: React.FC = () => {
             await api.createProject(newProjectName, 'Description', Array.from(selectedFiles));
             setNewProjectName('');
             setSelectedFiles(new Set());
-            loadProjects();
+            // New projects are listed first
+            if (projectOffset === 0) loadProjects(0);
+            else setProjectOffset(0);
         } catch (error) {
             console.error(error);
         } finally {
@@ -103,6 +135,14 @@ export const ProjectList: React.FC = () => {
                     <label style={{ display: 'block', marginBottom: 'var(--spacing-sm)', fontWeight: 500, color: 'var(--text-secondary)', fontSize: '0.875rem' }}>
                         Select Documents ({selectedFiles.size} selected)
                     </label>
+                    <input
+                        type="file"
+                        multiple
+                        accept=".pdf,.html,.htm,.txt"
+                        onChange={handleUpload}
+                        disabled={loading}
+                        style={{ marginBottom: 'var(--spacing-sm)' }}
+                    />
                     <div style={{
                         maxHeight: '300px',
                         overflowY: 'auto',
@@ -241,6 +281,28 @@ export const ProjectList: React.FC = () => {
                         ))}
                     </div>
                 )}
+
+                {projectTotal > PROJECT_PAGE_SIZE && (
+                    <div style={{ display: 'flex', justifyContent: 'center', alignItems: 'center', gap: 'var(--spacing-md)', marginTop: 'var(--spacing-lg)' }}>
+                        <button
+                            onClick={() => setProjectOffset(Math.max(0, projectOffset - PROJECT_PAGE_SIZE))}
+                            disabled={loadingProjects || projectOffset === 0}
+                            className="btn btn-secondary"
+                        >
+                            ← Previous
+                        </button>
+                        <span style={{ fontSize: '0.875rem', color: 'var(--text-secondary)' }}>
+                            {projectOffset + 1}–{Math.min(projectOffset + PROJECT_PAGE_SIZE, projectTotal)} of {projectTotal}
+                        </span>
+                        <button
+                            onClick={() => setProjectOffset(projectOffset + PROJECT_PAGE_SIZE)}
+                            disabled={loadingProjects || projectOffset + PROJECT_PAGE_SIZE >= projectTotal}
+                            className="btn btn-secondary"
+                        >
+                            Next →
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
@@ -1,10 +1,66 @@
 const API_BASE_URL = 'http://localhost:8000/api';
 
+export interface CitationSpan {
+    text: string;
+    source?: string;
+    // Location in the parsed document text, when the snippet was found
+    page_number?: number;
+    start?: number;
+    end?: number;
+}
+
 export interface Answer {
     question_text: string;
     value: string;
     confidence: number;
+    document_id?: string;
     citation?: string;
+    citations?: CitationSpan[];
+}
+
+export interface DocumentSpan {
+    document_id: string;
+    filename: string;
+    page_number?: number;
+    start: number;
+    end: number;
+    text: string;
+    before: string;
+    after: string;
+}
+
+export interface ClauseRef {
+    index: number;
+    start: number;
+    end: number;
+    page_number: number | null;
+    text: string;
+}
+
+export interface ClausePair {
+    status: 'unchanged' | 'changed' | 'removed' | 'added';
+    similarity: number;
+    left: ClauseRef | null;
+    right: ClauseRef | null;
+    diff?: { op: 'equal' | 'replace' | 'delete' | 'insert'; left: string; right: string }[];
+}
+
+export interface DocumentComparison {
+    left: { document_id: string; filename: string; content_hash: string };
+    right: { document_id: string; filename: string; content_hash: string };
+    summary: Record<string, number>;
+    pairs: ClausePair[];
+}
+
+export interface SearchHit {
+    kind: 'document' | 'answer';
+    project_id: string;
+    project_name?: string;
+    document_id?: string;
+    filename?: string;
+    question_text?: string;
+    snippet?: string;
+    score: number;
 }
 
 export interface Project {
@@ -13,13 +69,44 @@ export interface Project {
     description?: string;
     created_at: string;
     status: string;
+    document_count?: number;
+    answer_count?: number;
     answers: Answer[];
     documents: any[];
 }
 
+export interface Page<T> {
+    items: T[];
+    total: number;
+    offset: number;
+    limit: number;
+}
+
+export interface RequestStatus {
+    request_id: string;
+    status: 'pending' | 'processing' | 'completed' | 'failed' | 'cancelled';
+    project_id?: string;
+    progress?: {
+        total_documents: number;
+        completed_documents: number;
+        failed_documents: number;
+        total_answers: number;
+        completed_answers: number;
+    };
+    error?: string;
+}
+
+export interface UploadedFile {
+    filename: string;
+    content_hash: string;
+    size: number;
+    duplicate: boolean;
+    parse_status: 'queued' | 'parsed' | 'failed';
+}
+
 export const api = {
-    async listProjects(): Promise<Project[]> {
-        const response = await fetch(`${API_BASE_URL}/list-projects`);
+    async listProjects(offset = 0, limit = 50): Promise<Page<Project>> {
+        const response = await fetch(`${API_BASE_URL}/list-projects?offset=${offset}&limit=${limit}`);
         if (!response.ok) throw new Error('Failed to fetch projects');
         return response.json();
     },
@@ -30,6 +117,23 @@ export const api = {
         return response.json();
     },
 
+    async uploadDocuments(files: File[], projectId?: string): Promise<UploadedFile[]> {
+        const form = new FormData();
+        files.forEach(file => form.append('files', file));
+        if (projectId) form.append('project_id', projectId);
+        const response = await fetch(`${API_BASE_URL}/upload-documents`, {
+            method: 'POST',
+            body: form,
+        });
+        if (!response.ok) throw new Error('Failed to upload documents');
+        const result = await response.json();
+        return result.files;
+    },
+
+    exportUrl(projectId: string, format: 'csv' | 'xlsx' | 'parquet' = 'csv', confidence = false): string {
+        return `${API_BASE_URL}/export-project/${projectId}?format=${format}&confidence=${confidence}`;
+    },
+
     async createProject(name: string, description: string, filenames: string[]): Promise<Project> {
         const response = await fetch(`${API_BASE_URL}/create-project-async`, {
             method: 'POST',
@@ -41,8 +145,42 @@ export const api = {
     },
 
     async getProject(id: string): Promise<Project> {
+        // Summary and documents only; answers are fetched a page at a time with getProjectAnswers
         const response = await fetch(`${API_BASE_URL}/get-project-info/${id}`);
         if (!response.ok) throw new Error('Failed to fetch project');
+        const project = await response.json();
+        return { ...project, answers: [] };
+    },
+
+    async getProjectAnswers(id: string, offset = 0, limit = 500): Promise<Page<Answer>> {
+        const response = await fetch(`${API_BASE_URL}/get-project-answers/${id}?offset=${offset}&limit=${limit}`);
+        if (!response.ok) throw new Error('Failed to fetch answers');
+        const page: Page<Answer> = await response.json();
+        return { ...page, items: page.items.map(a => ({ ...a, citation: a.citation ?? a.citations?.[0]?.text })) };
+    },
+
+    async getDocumentSpan(documentId: string, start: number, end: number, context = 200): Promise<DocumentSpan> {
+        const response = await fetch(
+            `${API_BASE_URL}/get-document-span/${documentId}?start=${start}&end=${end}&context=${context}`
+        );
+        if (!response.ok) throw new Error('Failed to fetch citation');
+        return response.json();
+    },
+
+    async search(q: string, scope: 'all' | 'documents' | 'answers' = 'all', projectId?: string,
+                 offset = 0, limit = 20): Promise<Page<SearchHit>> {
+        const params = new URLSearchParams({ q, scope, offset: String(offset), limit: String(limit) });
+        if (projectId) params.set('project_id', projectId);
+        const response = await fetch(`${API_BASE_URL}/search?${params}`);
+        if (!response.ok) throw new Error('Search failed');
+        return response.json();
+    },
+
+    async compareDocuments(leftId: string, rightId: string, includeUnchanged = false): Promise<DocumentComparison> {
+        const response = await fetch(
+            `${API_BASE_URL}/compare-documents/${leftId}/${rightId}?include_unchanged=${includeUnchanged}`
+        );
+        if (!response.ok) throw new Error('Failed to compare documents');
         return response.json();
     },
 
@@ -56,6 +194,20 @@ export const api = {
         return response.json();
     },
 
+    async getRequestStatus(requestId: string): Promise<RequestStatus> {
+        const response = await fetch(`${API_BASE_URL}/get-request-status/${requestId}`);
+        if (!response.ok) throw new Error('Failed to fetch request status');
+        return response.json();
+    },
+
+    async cancelRequest(requestId: string) {
+        const response = await fetch(`${API_BASE_URL}/cancel-request/${requestId}`, {
+            method: 'POST',
+        });
+        if (!response.ok) throw new Error('Failed to cancel request');
+        return response.json();
+    },
+
     async deleteProject(projectId: string) {
         const response = await fetch(`${API_BASE_URL}/delete-project/${projectId}`, {
             method: 'DELETE',